@@ -1,10 +1,15 @@
-import requests
-import pandas as pd
 from datetime import datetime, timedelta
 import xml.etree.ElementTree as ET
 import time
 import urllib.parse
 
+from email_index import EmailIndex
+from g2b_export import write_rows
+from g2b_trace import run_main, span
+from g2b_windows import calendar_windows, recent_windows
+from institution_index import InstitutionIndex, item_to_dict
+from raw_archive import http_get
+
 
 SERVICE_KEY = ""
 
@@ -21,39 +26,26 @@ OPERATIONS = {
 
 
 class G2BEmailCollector:
-    def __init__(self, service_key):
+    def __init__(self, service_key, instt_index=None):
         self.service_key = service_key
+        self.instt_index = instt_index  # 전체 공고를 함께 적재할 기관 인덱스 (선택)
+        self.last_fetch_ok = True  # 직전 fetch_data 호출이 오류 없이 끝났는지 여부
 
-    def get_date_chunks(self, days=60):
+    def get_date_chunks(self, days=60, start_date=None, end_date=None):
         """
-        API 부하를 줄이고 데이터 누락을 방지하기 위해
-        전체 기간을 30일 단위로 쪼개서 리스트로 반환
+        조회 기간을 달력 기준 반월 구간(g2b_windows)으로 쪼개서 리스트로 반환
+        start_date가 주어지면 그 시점부터 (증분 수집), 없으면 최근 days일
         """
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-
-        chunks = []
-        current_start = start_date
-
-        while current_start < end_date:
-            current_end = current_start + timedelta(days=29)
-            if current_end > end_date:
-                current_end = end_date
-
-            # API 포맷: YYYYMMDDHHMM
-            str_start = current_start.strftime('%Y%m%d%H%M')
-            str_end = current_end.strftime('%Y%m%d%H%M')
-
-            chunks.append((str_start, str_end))
-            current_start = current_end + timedelta(minutes=1)  # 1분 뒤부터 다시 시작
-
-        return chunks
+        if start_date is None:
+            return recent_windows(days)
+        return calendar_windows(start_date, end_date)
 
     def fetch_data(self, operation_name, operation_code, start_dt, end_dt):
         """특정 오퍼레이션에 대해 API 호출 및 데이터 파싱"""
         url = f"{BASE_URL}/{operation_code}"
         all_rows = []
         page_no = 1
+        self.last_fetch_ok = True
 
         while True:
             params = {
@@ -67,13 +59,15 @@ class G2BEmailCollector:
             }
 
             try:
-                response = requests.get(url, params=params, timeout=30)
+                response = http_get(url, params)
 
                 if response.status_code != 200:
                     print(f"[{operation_name}] HTTP 에러: {response.status_code}")
+                    self.last_fetch_ok = False
                     break
 
-                root = ET.fromstring(response.content)
+                with span('xml', cpu=True, bytes=len(response.content)):
+                    root = ET.fromstring(response.content)
                 result_msg = root.find('.//resultMsg').text if root.find('.//resultMsg') is not None else ""
 
                 # 데이터 없음 처리
@@ -84,6 +78,10 @@ class G2BEmailCollector:
                 if not items:
                     break
 
+                # 이메일 유무와 관계없이 전체 공고를 기관 인덱스에도 적재
+                if self.instt_index is not None:
+                    self.instt_index.ingest([item_to_dict(item) for item in items], operation_name)
+
                 for item in items:
                     # 이메일 추출
                     email = self._get_text(item, 'ntceInsttOfclEmailAdrs')
@@ -113,6 +111,7 @@ class G2BEmailCollector:
 
             except Exception as e:
                 print(f"[{operation_name}] 오류 발생: {e}")
+                self.last_fetch_ok = False
                 break
 
         return all_rows
@@ -123,45 +122,59 @@ class G2BEmailCollector:
 
 
 def main():
-    print("나라장터 이메일 수집기를 시작합니다... (최근 2개월 기준)")
-
-    collector = G2BEmailCollector(SERVICE_KEY)
-    date_chunks = collector.get_date_chunks(days=60)  # 최근 2개월
+    print("나라장터 이메일 수집기를 시작합니다... (이메일 인덱스 증분 갱신)")
+
+    instt_index = InstitutionIndex()
+    collector = G2BEmailCollector(SERVICE_KEY, instt_index)
+    index = EmailIndex()
+    now = datetime.now()
+
+    total_rows = 0
+
+    # 1. 업무 분야(공사, 용역, 외자, 물품)별로 마지막 수집 시점 이후 구간만 조회
+    #    최초 실행(인덱스 비어있음)이면 최근 2개월 전체를 백필
+    for op_name, op_code in OPERATIONS.items():
+        last_synced = index.get_last_synced(op_code)
+        if last_synced:
+            start_date = datetime.strptime(last_synced, '%Y%m%d%H%M') + timedelta(minutes=1)
+            print(f"\n[{op_name}] {last_synced} 이후 신규 구간만 수집합니다.")
+        else:
+            start_date = None
+            print(f"\n[{op_name}] 인덱스가 비어있어 최근 2개월 전체를 수집합니다.")
+
+        # 2. 날짜 구간별 순회 (구간이 성공적으로 끝날 때마다 수집 시점 기록)
+        for start_dt, end_dt in collector.get_date_chunks(days=60, start_date=start_date, end_date=now):
+            rows = collector.fetch_data(op_name, op_code, start_dt, end_dt)
+            index.update(rows)
+            total_rows += len(rows)
 
-    total_data = []
+            if not collector.last_fetch_ok:
+                # 오류가 난 구간부터는 다음 실행에서 다시 수집
+                print(f"[{op_name}] {start_dt[:8]}~{end_dt[:8]} 구간 수집 실패, 다음 실행 시 재수집합니다.")
+                break
+            index.mark_synced(op_code, end_dt)
+            instt_index.mark_covered(op_code, start_dt, end_dt)
 
-    # 1. 날짜 구간별 순회
-    for start_dt, end_dt in date_chunks:
-        # 2. 4가지 업무 분야(공사, 용역, 외자, 물품) 순회
-        for op_name, op_code in OPERATIONS.items():
-            rows = collector.fetch_data(op_name, op_code, start_dt, end_dt)
-            total_data.extend(rows)
+    print(f"\n이번 실행에서 수집된 건수: {total_rows}건")
 
-    if not total_data:
+    # 3. 인덱스 기준 엑셀 저장 (이메일 단위로 이미 중복 제거되어 있음)
+    export_rows = index.export_rows()
+    if not export_rows:
         print("수집된 데이터가 없습니다.")
         return
 
-    # 3. 데이터프레임 변환
-    df = pd.DataFrame(total_data)
-
-    print(f"\n총 수집된 건수: {len(df)}건")
-
-    # 4. 중복 제거 (이메일 기준)
-    # 공고번호나 담당자가 다르더라도, 같은 이메일이면 중복으로 간주하고 제거 (가장 최근 공고 기준 남김)
-    df_unique = df.drop_duplicates(subset=['이메일'], keep='first')
-
-    print(f"중복(이메일 기준) 제거 후 건수: {len(df_unique)}건")
+    print(f"이메일 인덱스 누적 건수: {len(export_rows)}건")
 
-    # 5. 엑셀 저장
+    # 4. 엑셀 저장
     today_str = datetime.now().strftime('%Y-%m-%d')
     file_name = f"나라장터_담당자이메일_{today_str}.xlsx"
 
     try:
-        df_unique.to_excel(file_name, index=False)
+        write_rows(export_rows, {col: col for col in export_rows[0]}, file_name)
         print(f"\n[성공] '{file_name}' 파일로 저장되었습니다.")
     except Exception as e:
         print(f"\n[오류] 엑셀 저장 실패: {e}")
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
@@ -1,13 +1,38 @@
 import requests
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 import xml.etree.ElementTree as ET
 import os
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from deadline_index import DeadlineIndex
+from delta_export import export_delta
+from g2b_dataset import DatasetWriter
+from g2b_export import dedup_rows, write_rows
+from g2b_trace import run_main, span
+from g2b_windows import calendar_windows, recent_windows
+from notice_fts import NoticeSearchIndex
+from raw_archive import http_get
 
 # === [설정] 서비스 키 입력 ===
 SERVICE_KEY = ""
 
+# === [설정] 동시 수집 ===
+MAX_WORKERS = 8         # 동시에 호출할 (분야, 키워드, 기간) 작업 수 (1이면 기존 순차 수집)
+
+# === [설정] 분석용 데이터셋 저장 (g2b_dataset.py, pyarrow 또는 duckdb 필요) ===
+SAVE_DATASET = False
+
+# === [설정] 변경분만 저장 ===
+# True: 이전 실행 이후 새로 올라오거나 내용이 바뀐 사전규격만 저장 / False: 기존처럼 전체 저장
+DELTA_EXPORT = True
+
+# === [설정] 규격문서 다운로드 (doc_download.py) ===
+# True: 저장 후 규격문서파일URL1~5의 첨부 문서를 g2b_docs/에 받음 (이미 받은 파일은 건너뜀)
+DOWNLOAD_DOCS = False
+
 class G2BPublicRangeClient:
     def __init__(self, service_key):
         # 사전규격정보서비스 베이스 URL [cite: 14]
@@ -22,6 +47,16 @@ class G2BPublicRangeClient:
             '공사': 'getPublicPrcureThngInfoCnstwkPPSSrch'
         }
 
+        # 스레드별 HTTP 세션 (동시 수집 시 연결 재사용)
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
     def fetch_pre_specs(self, biz_type, search_params):
         """특정 분야(물품/외자/용역/공사) API 1회 호출"""
         op_name = self.operations.get(biz_type)
@@ -40,12 +75,13 @@ class G2BPublicRangeClient:
         }
 
         try:
-            response = requests.get(url, params=params, timeout=30)
+            response = http_get(url, params, session=self._session())
             if response.status_code != 200:
                 print(f"  [{biz_type} HTTP 오류] {response.status_code}")
                 return []
 
-            root = ET.fromstring(response.content)
+            with span('xml', cpu=True, bytes=len(response.content)):
+                root = ET.fromstring(response.content)
             result_code = root.find('.//resultCode').text if root.find('.//resultCode') is not None else None
 
             if result_code != '00':
@@ -55,7 +91,8 @@ class G2BPublicRangeClient:
                 return []
 
             items = root.findall('.//item')
-            return self._parse_items(items)
+            with span('parse_items', cpu=True, rows=len(items)):
+                return self._parse_items(items)
 
         except Exception as e:
             print(f"  [{biz_type} 시스템 오류] {e}")
@@ -117,49 +154,139 @@ class G2BPublicRangeClient:
 
         return all_data
 
+    def fetch_filtered_pages(self, biz_type, search_params, exclude_matcher=None):
+        """
+        페이징 처리 + 제외 키워드 필터를 페이지 도착 즉시 적용
+        (제외 대상 행은 누적하지 않으므로 메모리는 매칭 건수에 비례)
+        """
+        matched = []
+        raw_count = 0
+        page_no = 1
+        num_of_rows = search_params.get('numOfRows', 100)
+
+        while True:
+            search_params['pageNo'] = page_no
+            data = self.fetch_pre_specs(biz_type, search_params)
+
+            if not data:
+                break
+
+            raw_count += len(data)
+            for row in data:
+                if exclude_matcher is None or not exclude_matcher.search(row['prdctClsfcNoNm']):
+                    matched.append(row)
+
+            if len(data) < num_of_rows:
+                break
+            page_no += 1
+            time.sleep(0.2) # API 부하 방지
+
+        return matched, raw_count
+
+    def collect_concurrent(self, biz_types, keywords, start_dt, end_dt, exclude_keywords=None,
+                           max_workers=MAX_WORKERS):
+        """
+        (분야 x 키워드 x 기간) 작업을 스레드 풀로 동시에 수집
+        - 제외 키워드는 미리 컴파일한 정규식으로 행 단위 즉시 필터링
+        - bfSpecRgstNo 기준 중복 제거는 작업 결과가 도착할 때마다 증분 처리
+        반환값: (중복 제거된 행 목록, 원본 조회 건수, 제외된 건수)
+        """
+        exclude_matcher = None
+        if exclude_keywords:
+            exclude_matcher = re.compile('|'.join(re.escape(k) for k in exclude_keywords), re.IGNORECASE)
+
+        windows = calendar_windows(start_dt, end_dt)
+        tasks = [(biz, keyword, w_start, w_end) for biz in biz_types for keyword in keywords for w_start, w_end in windows]
+
+        results = []
+        seen = set()
+        raw_total = 0
+        matched_total = 0
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for biz, keyword, w_start, w_end in tasks:
+                params = {
+                    'inqryBgnDt': w_start,
+                    'inqryEndDt': w_end,
+                    'numOfRows': 100,
+                    'keyword': keyword
+                }
+                futures[executor.submit(self.fetch_filtered_pages, biz, params, exclude_matcher)] = (biz, keyword)
+
+            for future in as_completed(futures):
+                biz, keyword = futures[future]
+                rows, raw_count = future.result()
+                raw_total += raw_count
+                matched_total += len(rows)
+
+                new_count = 0
+                for row in rows:
+                    if row['bfSpecRgstNo'] in seen:
+                        continue
+                    seen.add(row['bfSpecRgstNo'])
+                    results.append(row)
+                    new_count += 1
+
+                if raw_count:
+                    print(f"  - [{biz}] '{keyword}': {raw_count}건 조회 / 신규 {new_count}건")
+
+        return results, raw_total, raw_total - matched_total
+
+
 def get_automatic_date_ranges():
-    """오늘 기준으로 최근 1개월(30일)의 날짜 범위를 생성"""
-    now = datetime.now()
-    # 2주(timedelta(weeks=2))에서 1개월(timedelta(days=30))로 변경
-    start_date = (now - timedelta(days=70)).replace(hour=0, minute=0)
-    end_date = now
-
-    ranges = []
-    str_start = start_date.strftime('%Y%m%d%H%M') # YYYYMMDDHHMM 형식 [cite: 20]
-    str_end = end_date.strftime('%Y%m%d%H%M')
-    ranges.append((str_start, str_end))
-    return ranges
-
-def save_to_excel(df):
-    if df.empty:
+    """
+    오늘 기준으로 최근 70일을 포함하는 날짜 범위를 생성
+    (달력 기준 반월 구간으로 나누어 지난 구간은 실행마다 같은 요청이 되도록 함)
+    """
+    return recent_windows(70)
+
+
+# 엑셀 출력 컬럼 매핑 (spec_join.py 등에서 역매핑에 재사용)
+EXPORT_COLUMNS = {
+    'bfSpecRgstNo': '사전규격등록번호',
+    'bsnsDivNm': '업무구분',
+    'refNo': '참조번호',
+    'prdctClsfcNoNm': '품명(사업명)',
+    'orderInsttNm': '발주기관',
+    'rlDminsttNm': '수요기관',
+    'asignBdgtAmt': '배정예산',
+    'rcptDt': '접수일시',
+    'opninRgstClseDt': '의견마감일시',
+    'ofclNm': '담당자',
+    'ofclTelNo': '전화번호',
+    'swBizObjYn': 'SW사업여부',
+    'bidNtceNoList': '연관공고번호',
+    'rgstDt': '등록일시'
+}
+
+
+def save_to_dataset(rows):
+    """사전규격을 업무구분/접수월 파티션 데이터셋에 추가 (사전규격등록번호 기준 중복 제거)"""
+    writer = DatasetWriter('prespecs', EXPORT_COLUMNS)
+    writer.add(rows)
+    writer.flush()
+    print(f"[데이터셋] 사전규격 {writer.written}건 반영")
+
+
+def save_to_excel(rows):
+    if not rows:
         print("저장할 데이터가 없습니다.")
         return
 
-    col_map = {
-        'bfSpecRgstNo': '사전규격등록번호',
-        'bsnsDivNm': '업무구분',
-        'refNo': '참조번호',
-        'prdctClsfcNoNm': '품명(사업명)',
-        'orderInsttNm': '발주기관',
-        'rlDminsttNm': '수요기관',
-        'asignBdgtAmt': '배정예산',
-        'rcptDt': '접수일시',
-        'opninRgstClseDt': '의견마감일시',
-        'ofclNm': '담당자',
-        'ofclTelNo': '전화번호',
-        'swBizObjYn': 'SW사업여부',
-        'bidNtceNoList': '연관공고번호',
-        'rgstDt': '등록일시'
-    }
-
-    save_df = df[list(col_map.keys())].rename(columns=col_map)
     today_str = datetime.now().strftime('%Y-%m-%d')
+
+    if DELTA_EXPORT:
+        filename = f'나라장터_사전규격_변경분({today_str}).xlsx'
+        export_delta('prespecs', rows, ['bfSpecRgstNo'], EXPORT_COLUMNS, filename)
+        return
+
     filename = f'나라장터_사전규격_통합조회_1개월({today_str}).xlsx'
 
     try:
-        save_df.to_excel(filename, index=False)
+        write_rows(rows, EXPORT_COLUMNS, filename)
         print(f"\n[성공] 엑셀 저장 완료: {filename}")
-        print(f"총 데이터 수: {len(save_df)}건")
+        print(f"총 데이터 수: {len(rows)}건")
     except Exception as e:
         print(f"\n[오류] 엑셀 저장 중 문제 발생: {e}")
 
@@ -172,23 +299,47 @@ def main():
 
     biz_types = ['물품', '외자', '용역', '공사']
     date_ranges = get_automatic_date_ranges()
-    start_dt, end_dt = date_ranges[0]
+    start_dt, end_dt = date_ranges[0][0], date_ranges[-1][1]
 
     print(f"조회 기간: {start_dt} ~ {end_dt} (최근 1개월)")
     print("사전규격 데이터 수집을 시작합니다...")
 
+    if MAX_WORKERS > 1:
+        # 동시 수집 모드: 필터/중복 제거를 수집과 동시에 처리
+        results, raw_total, removed_count = client.collect_concurrent(
+            biz_types, target_keywords, start_dt, end_dt, exclude_keywords)
+
+        print(f"\n[수집] 원본 {raw_total}건 조회")
+        print(f"[필터링] 제외 키워드 포함 공고 {removed_count}건 삭제 완료 (중복 포함)")
+        print(f"[최종 집계] 중복 제거 후 {len(results)}건 저장 예정")
+
+        if results:
+            NoticeSearchIndex().add_specs(results)
+            DeadlineIndex().add_specs(results)
+            save_to_excel(results)
+            if SAVE_DATASET:
+                save_to_dataset(results)
+            if DOWNLOAD_DOCS:
+                from doc_download import download_rows
+                download_rows(results)
+        else:
+            print("\n최근 1개월간 해당 키워드로 조회된 사전규격이 없습니다.")
+        return
+
     all_results = []
 
     for biz in biz_types:
         print(f"\n>>> [{biz}] 분야 검색 시작")
         for keyword in target_keywords:
-            params = {
-                'inqryBgnDt': start_dt,
-                'inqryEndDt': end_dt,
-                'numOfRows': 100,
-                'keyword': keyword
-            }
-            results = client.fetch_all_pages(biz, params)
+            results = []
+            for w_start, w_end in date_ranges:
+                params = {
+                    'inqryBgnDt': w_start,
+                    'inqryEndDt': w_end,
+                    'numOfRows': 100,
+                    'keyword': keyword
+                }
+                results.extend(client.fetch_all_pages(biz, params))
             if results:
                 all_results.extend(results)
                 print(f"  - '{keyword}': {len(results)}건 발견")
@@ -196,27 +347,33 @@ def main():
                 print(f"  - '{keyword}': 데이터 없음")
 
     if all_results:
-        df = pd.DataFrame(all_results)
         # 1. 중복 제거
-        df_unique = df.drop_duplicates(subset=['bfSpecRgstNo'])
+        unique_rows = dedup_rows(all_results, ['bfSpecRgstNo'])
 
         # 2. [핵심 수정] 제외 키워드 필터링
         # prdctClsfcNoNm(품명/사업명) 컬럼에 제외 키워드가 포함되지 않은 것만 추출
-        if not df_unique.empty:
+        if unique_rows:
             # 정규표현식 패턴 생성 (차량|통학버스|버스)
-            exclude_pattern = '|'.join(exclude_keywords)
-            # 해당 패턴을 포함하지 않는(~) 행만 선택
-            df_filtered = df_unique[~df_unique['prdctClsfcNoNm'].str.contains(exclude_pattern, case=False, na=False)]
+            exclude_pattern = re.compile('|'.join(exclude_keywords), re.IGNORECASE)
+            # 해당 패턴을 포함하지 않는 행만 선택
+            filtered_rows = [r for r in unique_rows if not exclude_pattern.search(r['prdctClsfcNoNm'])]
 
-            removed_count = len(df_unique) - len(df_filtered)
+            removed_count = len(unique_rows) - len(filtered_rows)
             print(f"\n[필터링] 제외 키워드 포함 공고 {removed_count}건 삭제 완료")
-            print(f"[최종 집계] {len(df_filtered)}건 저장 예정")
-
-            save_to_excel(df_filtered)
+            print(f"[최종 집계] {len(filtered_rows)}건 저장 예정")
+
+            NoticeSearchIndex().add_specs(filtered_rows)
+            DeadlineIndex().add_specs(filtered_rows)
+            save_to_excel(filtered_rows)
+            if SAVE_DATASET:
+                save_to_dataset(filtered_rows)
+            if DOWNLOAD_DOCS:
+                from doc_download import download_rows
+                download_rows(filtered_rows)
         else:
             print("\n조회된 데이터가 없습니다.")
     else:
         print("\n최근 1개월간 해당 키워드로 조회된 사전규격이 없습니다.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run_main(main)
\ No newline at end of file
@@ -1,12 +1,67 @@
 import requests
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 import xml.etree.ElementTree as ET
+import math
+import os
+import queue
+import re
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+from coverage_map import CoverageMap, filter_key
+from g2b_dataset import DatasetWriter
+from g2b_export import iter_dedup, write_rows
+from g2b_records import get_schema, reintern
+import g2b_trace
+from g2b_trace import span
+from g2b_windows import calendar_windows, collect_latest
+from institution_index import InstitutionIndex
+from raw_archive import REPLAY, http_get
 
 # === [설정] 서비스 키 입력 ===
 SERVICE_KEY = ""
 
+# === [설정] 파이프라인 수집 (네트워크 I/O -> XML 파싱 -> 필터/저장 단계 병렬화) ===
+USE_PIPELINE = True
+IO_WORKERS = 8                          # 페이지를 받아오는 스레드 수
+PARSE_WORKERS = os.cpu_count() or 2     # XML 파싱 프로세스 수 (파싱은 CPU 작업이라 GIL 우회)
+QUEUE_SIZE = 32                         # 단계 사이 대기열 크기 (가득 차면 앞 단계가 대기)
+
+# === [설정] 출력 항목 선택 ===
+# COLUMN_PRESETS의 이름 중 하나 ('all'이면 88개 전체), CUSTOM_COLUMNS를 채우면 프리셋 대신 해당 항목만 출력
+# 선택한 항목(+ 중복 제거/필터에 필요한 항목)만 XML에서 추출하여 파싱 시간과 메모리를 줄임
+# (기관 인덱스에는 88개 전체 항목을 추출한 경우에만 적재 — 일부 항목만 담긴 행으로 원본 행을 대신하지 않도록)
+COLUMN_PRESET = 'all'
+CUSTOM_COLUMNS = []                     # 예: ['bidNtceNo', 'bidNtceNm', 'ntceInsttNm', 'bdgtAmt']
+
+# === [설정] 수집 구간 재사용 ===
+# 같은 키워드/분야로 이미 수집한 기간은 로컬(coverage_map.py)에 보관된 행을 쓰고, 빈 기간만 API로 조회
+USE_COVERAGE = True                     # 재생 모드(G2B_REPLAY=1)에서는 사용하지 않음 (보관된 원본을 현재 파서로 다시 파싱하기 위함)
+
+# === [설정] 수집 완전성 확인 ===
+# 수집이 끝나면 (분야, 기간, 키워드) 단위마다 서버 totalCount와 페이지별 건수를 대조하여
+# 빠지거나 덜 받은 페이지만 다시 조회 (오류 응답이 빈 페이지로 처리되어 중간에 끊긴 경우 대비)
+VERIFY_COMPLETENESS = True
+VERIFY_RETRIES = 2                      # 누락 페이지당 재조회 횟수
+
+# === [설정] 최신 N건 조회 ===
+# 0이면 기간 전체를 조회, N이면 키워드별 최신 N건만 저장 (최신 반월 구간부터 조회하여 N건이 모인 구간까지만 조회)
+LATEST_N = 0
+
+# === [설정] 분석용 데이터셋 저장 (g2b_dataset.py, pyarrow 또는 duckdb 필요) ===
+SAVE_DATASET = False
+
+# === [설정] 유사 공고(재공고) 묶기 (near_dup.py) ===
+# '' : 사용 안 함 / 'tag' : 묶음 번호·건수 열 추가 / 'collapse' : 묶음마다 최신 공고 1건만 저장
+# 묶으려면 결과 전체가 필요하므로 켜면 저장 전에 결과를 메모리에 모음
+NEAR_DUP_MODE = ''
+
+# === [설정] 표준공고서 다운로드 (doc_download.py) ===
+# True: 저장 후 결과 공고의 표준공고서(stdNtceDocUrl)를 g2b_docs/에 받음 (이미 받은 파일은 건너뜀)
+DOWNLOAD_DOCS = False
+
 # === 사용자가 요청한 전체 88개 출력 항목 매핑 사전 ===
 FIELDS_MAPPING = {
     'bidNtceNo': '입찰공고번호',
@@ -100,13 +155,176 @@ FIELDS_MAPPING = {
 }
 
 
+# 각 스크립트의 엑셀 출력 컬럼과 같은 프리셋 (키: API 태그, 값: 엑셀 컬럼명)
+COLUMN_PRESETS = {
+    'all': dict({'bizType': '업무구분'}, **FIELDS_MAPPING),
+    'main': {   # main.py
+        'bidNtceNo': '공고번호',
+        'rgstTyNm': '등록유형',
+        'ntceKindNm': '공고종류',
+        'bidNtceDt': '공고일시',
+        'bidNtceNm': '공고명',
+        'ntceInsttNm': '공고기관',
+        'dminsttNm': '수요기관',
+        'ntceInsttOfclNm': '담당자',
+        'ntceInsttOfclTelNo': '전화번호',
+        'bidClseDt': '마감일시',
+        'opengDt': '개찰일시'
+    },
+    'search_keyword_date': {   # search_keyword_date.py
+        'bizType': '업무구분',
+        'bidNtceNo': '공고번호',
+        'untyNtceNo': '통합공고번호',
+        'bidNtceDt': '공고일시',
+        'bidNtceNm': '공고명',
+        'ntceInsttNm': '공고기관',
+        'bdgtAmt': '예산금액',
+        'presmptPrce': '추정가격',
+        'bidBeginDt': '입찰개시일시',
+        'bidQlfctRgstDt': '입찰참가자격등록마감일시',
+        'bidClseDt': '입찰마감일시',
+        'opengDt': '개찰일시',
+        'ntceInsttOfclNm': '담당자',
+        'ntceInsttOfclTelNo': '전화번호',
+        'ntceInsttOfclEmailAdrs': '담당자이메일주소(공고/수요)'
+    },
+    'institution': {   # specific_bid.py
+        'bizType': '분야',
+        'bidNtceNo': '공고번호',
+        'bidNtceNm': '공고명',
+        'ntceInsttNm': '공고기관',
+        'dminsttNm': '수요기관',
+        'ntceInsttOfclNm': '담당자명',
+        'ntceInsttOfclTelNo': '전화번호',
+        'ntceInsttOfclEmailAdrs': '이메일',
+        'bidNtceDt': '공고일시'
+    }
+}
+
+ALL_FIELDS = tuple(FIELDS_MAPPING)
+
+# 출력 항목과 관계없이 항상 추출하는 항목 (중복 제거 키, 키워드 필터, 기관 인덱스)
+REQUIRED_FIELDS = ('bidNtceNo', 'bidNtceOrd', 'bidNtceNm', 'bidNtceDt',
+                   'ntceInsttCd', 'ntceInsttNm', 'dminsttCd', 'dminsttNm')
+
+# 값의 종류가 적어 행끼리 같은 문자열 객체를 공유할 항목 (기관/방식/코드 등)
+# 'Y'/'N' 같은 한 글자 값은 파이썬이 이미 하나의 객체로 공유하므로 제외
+INTERN_FIELDS = ('bizType',) + tuple(
+    key for key in FIELDS_MAPPING
+    if key.endswith(('Cd', 'MthdNm', 'Methd', 'Rt', 'Num'))
+) + ('bidNtceOrd', 'rgstTyNm', 'ntceKindNm', 'ntceInsttNm', 'dminsttNm', 'bidMethdNm', 'exctvNm', 'mainCnsttyNm',
+     'opengPlce', 'crdtrNm', 'sucsfbidLwltRate', 'cnstrtsiteRgnNm', 'rgnLmtBidLocplcJdgmBssNm')
+
+# 값이 비어 있을 때 대신 사용할 태그 (예산금액: 물품/용역/외자는 asignBdgtAmt, 이메일: 수요기관 담당자)
+FALLBACK_FIELDS = {
+    'bdgtAmt': 'asignBdgtAmt',
+    'ntceInsttOfclEmailAdrs': 'dminsttOfclEmailAdrs'
+}
+
+
+def resolve_columns(preset=None, custom=None):
+    """설정값으로 엑셀 출력 컬럼 매핑 결정 (custom이 있으면 우선, 컬럼명은 FIELDS_MAPPING 사용)"""
+    if custom:
+        unknown = [key for key in custom if key not in FIELDS_MAPPING]
+        if unknown:
+            raise ValueError(f"알 수 없는 항목: {', '.join(unknown)}")
+        return dict({'bizType': '업무구분'}, **{key: FIELDS_MAPPING[key] for key in custom})
+
+    preset = preset or 'all'
+    if preset not in COLUMN_PRESETS:
+        raise ValueError(f"알 수 없는 프리셋: {preset} (사용 가능: {', '.join(COLUMN_PRESETS)})")
+    return COLUMN_PRESETS[preset]
+
+
+def projection_fields(col_map):
+    """출력 컬럼 + 필수 항목 -> XML에서 추출할 태그 목록 (FIELDS_MAPPING 순서 유지)"""
+    wanted = set(col_map) | set(REQUIRED_FIELDS)
+    if DOWNLOAD_DOCS:
+        wanted.add('stdNtceDocUrl')
+    return tuple(key for key in FIELDS_MAPPING if key in wanted)
+
+
+def _get_text(item, tag_name):
+    """XML 태그에서 텍스트를 안전하게 추출 (공백 제거)"""
+    text = item.findtext(tag_name)
+    return text.strip() if text else ''
+
+
+def parse_items(items, biz_type, fields=None):
+    """
+    항목 추출 (fields가 없으면 88개 전체) -> Record 목록 (dict처럼 읽기 가능)
+    태그마다 findtext로 하위 요소를 다시 훑지 않고, item의 하위 요소를 한 번만 순회하며 필요한 태그만 꺼냄
+    행마다 dict를 만들지 않고 항목 순서를 공유하는 값 튜플로 보관하며, 종류가 적은 값은 문자열을 공유함
+    """
+    fields = fields or ALL_FIELDS
+    wanted = set(fields)
+    wanted.update(FALLBACK_FIELDS[key] for key in fields if key in FALLBACK_FIELDS)
+    schema = get_schema(('bizType',) + tuple(fields), INTERN_FIELDS)  # 엑셀 첫 번째 열이 될 '업무구분' 포함
+
+    result = []
+    for item in items:
+        values = {}
+        for child in item:
+            if child.tag in wanted and child.text:
+                values[child.tag] = child.text.strip()
+
+        data = [biz_type]
+        for key in fields:
+            val = values.get(key, '')
+            if not val and key in FALLBACK_FIELDS:
+                val = values.get(FALLBACK_FIELDS[key], '')
+            data.append(val)
+
+        result.append(schema.make(data))
+    return result
+
+
+def parse_response(content, biz_type, fields=None):
+    """
+    API 응답(XML 바이트) 파싱 -> (행 목록, 오류 메시지 또는 None), fields: 추출할 태그 (None이면 전체)
+    프로세스 풀에서 실행할 수 있도록 모듈 수준 함수로 정의
+    """
+    try:
+        with span('xml', cpu=True, bytes=len(content)):
+            root = ET.fromstring(content)
+        result_code = root.findtext('.//resultCode')
+
+        if result_code != '00':
+            result_msg = root.findtext('.//resultMsg', default="알 수 없는 오류")
+            if "조회된 데이터가 없습니다" in result_msg:
+                return [], None
+            return [], f"[API 메시지] {result_msg}"
+
+        items = root.findall('.//item')
+        with span('parse_items', cpu=True, rows=len(items)):
+            return parse_items(items, biz_type, fields), None
+
+    except Exception as e:
+        return [], f"[시스템 오류] {e}"
+
+
+def _total_count(content):
+    """응답 전체를 파싱하지 않고 totalCount만 추출 (없으면 0)"""
+    match = re.search(rb'<totalCount>\s*(\d+)\s*</totalCount>', content)
+    return int(match.group(1)) if match else 0
+
+
 class G2BAPIClient:
     def __init__(self, service_key):
         self.base_url = "http://apis.data.go.kr/1230000/ad/BidPublicInfoService/"
         self.service_key = service_key
-
-    def fetch_bid_notices(self, op_name, biz_type, search_params):
-        """API 1회 호출"""
+        self._local = threading.local()
+        self.last_fetch_ok = True  # 직전 iter_pages 호출이 오류 없이 끝났는지 여부 (순차 수집용)
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    def fetch_raw(self, op_name, search_params):
+        """API 1회 호출 -> 응답 바이트 (HTTP/네트워크 오류 시 None)"""
         url = self.base_url + op_name
         params = {
             'ServiceKey': self.service_key,
@@ -121,77 +339,393 @@ class G2BAPIClient:
             params['bidNtceNm'] = search_params['bidNtceNm']
 
         try:
-            response = requests.get(url, params=params, timeout=30)
+            response = http_get(url, params, session=self._session())
             if response.status_code != 200:
                 print(f"    [HTTP 오류] {response.status_code}")
-                return []
-
-            root = ET.fromstring(response.content)
-            result_code = root.findtext('.//resultCode')
-
-            if result_code != '00':
-                result_msg = root.findtext('.//resultMsg', default="알 수 없는 오류")
-                if "조회된 데이터가 없습니다" in result_msg:
-                    return []
-                print(f"    [API 메시지] {result_msg}")
-                return []
-
-            items = root.findall('.//item')
-            return self._parse_items(items, biz_type)
+                return None
+            return response.content
 
         except Exception as e:
             print(f"    [시스템 오류] {e}")
-            return []
-
-    def _get_text(self, item, tag_name):
-        """XML 태그에서 텍스트를 안전하게 추출 (공백 제거)"""
-        text = item.findtext(tag_name)
-        return text.strip() if text else ''
+            return None
 
-    def _parse_items(self, items, biz_type):
-        """요청된 88개 항목 전체를 반복문으로 동적 추출"""
-        result = []
-        for item in items:
-            data = {'bizType': biz_type}  # 엑셀 첫 번째 열이 될 '업무구분' 추가
+    def fetch_page(self, op_name, biz_type, search_params, fields=None):
+        """API 1회 호출 -> (행 목록, totalCount, 오류 없이 응답 여부)"""
+        content = self.fetch_raw(op_name, search_params)
+        if content is None:
+            return [], 0, False
 
-            for key in FIELDS_MAPPING.keys():
-                val = self._get_text(item, key)
+        rows, message = parse_response(content, biz_type, fields)
+        if message:
+            print(f"    {message}")
+            return [], 0, False
+        return rows, _total_count(content), True
 
-                # 예산금액 누락 방지: 공사는 bdgtAmt, 물품/용역/외자는 asignBdgtAmt를 사용함
-                if key == 'bdgtAmt' and not val:
-                    val = self._get_text(item, 'asignBdgtAmt')
-
-                # 이메일 누락 방지: 공고기관 이메일이 없으면 수요기관 이메일로 보완
-                if key == 'ntceInsttOfclEmailAdrs' and not val:
-                    val = self._get_text(item, 'dminsttOfclEmailAdrs')
+    def fetch_bid_notices(self, op_name, biz_type, search_params, fields=None):
+        """API 1회 호출"""
+        rows, _, ok = self.fetch_page(op_name, biz_type, search_params, fields)
+        if not ok:
+            self.last_fetch_ok = False
+        return rows
 
-                data[key] = val
+    def _get_text(self, item, tag_name):
+        """XML 태그에서 텍스트를 안전하게 추출 (공백 제거)"""
+        return _get_text(item, tag_name)
 
-            result.append(data)
-        return result
+    def _parse_items(self, items, biz_type, fields=None):
+        """요청된 항목(기본 88개 전체)을 반복문으로 동적 추출"""
+        return parse_items(items, biz_type, fields)
 
-    def fetch_all_pages(self, op_name, biz_type, search_params):
-        """페이징 처리"""
-        all_data = []
+    def iter_pages(self, op_name, biz_type, search_params, fields=None, unit=None):
+        """
+        페이징 처리 (한 페이지씩 행 목록을 yield, 전체 결과를 모아두지 않음)
+        unit이 있으면 페이지별 건수와 totalCount를 기록 (완전성 확인용)
+        """
         page_no = 1
         num_of_rows = search_params.get('numOfRows', 100)
+        self.last_fetch_ok = True
 
         while True:
             search_params['pageNo'] = page_no
-            data = self.fetch_bid_notices(op_name, biz_type, search_params)
+            data, total_count, ok = self.fetch_page(op_name, biz_type, search_params, fields)
+            if not ok:
+                self.last_fetch_ok = False
+                break
+            if unit is not None:
+                record_page(unit, page_no, len(data), total_count)
 
             if not data:
                 break
 
-            all_data.extend(data)
+            yield data
             if len(data) < num_of_rows:
                 break
             page_no += 1
             time.sleep(0.1)
 
+    def fetch_all_pages(self, op_name, biz_type, search_params, fields=None):
+        """페이징 처리"""
+        all_data = []
+        for data in self.iter_pages(op_name, biz_type, search_params, fields):
+            all_data.extend(data)
         return all_data
 
 
+def collect_pipeline(client, units, io_workers=IO_WORKERS, parse_workers=PARSE_WORKERS, queue_size=QUEUE_SIZE,
+                     fields=None):
+    """
+    수집을 단계별 파이프라인으로 실행하여 네트워크 대기와 XML 파싱이 겹치도록 함
+    1) I/O 스레드: 페이지 요청 (1페이지의 totalCount로 나머지 페이지를 바로 예약)
+    2) 프로세스 풀: 응답 XML 파싱 (fields로 지정한 항목, 기본 88개)
+    3) 호출한 쪽(제너레이터 소비자): 필터/중복 제거/저장
+    단계 사이는 크기가 제한된 대기열로 연결되어, 뒤 단계가 밀리면 앞 단계가 대기함
+    units: [{'op_name', 'biz_type', 'params'}, ...] / 반환: (unit, 행 목록)을 순서 없이 yield
+    """
+    fetch_queue = queue.Queue()
+    raw_queue = queue.Queue(maxsize=queue_size)
+    parsed_queue = queue.Queue(maxsize=queue_size)
+
+    for unit in units:
+        fetch_queue.put((unit, 1))
+
+    def io_worker():
+        while True:
+            task = fetch_queue.get()
+            if task is None:
+                fetch_queue.task_done()
+                return
+            unit, page_no = task
+            try:
+                params = dict(unit['params'], pageNo=page_no)
+                content = client.fetch_raw(unit['op_name'], params)
+                if content is None:
+                    unit['failed'] = True
+                else:
+                    if page_no == 1:
+                        num_of_rows = int(params.get('numOfRows', 100))
+                        for next_page in range(2, math.ceil(_total_count(content) / num_of_rows) + 1):
+                            fetch_queue.put((unit, next_page))
+                    raw_queue.put((unit, page_no, content))
+                time.sleep(0.1)
+            finally:
+                fetch_queue.task_done()
+
+    def coordinator():
+        # 예약된 모든 페이지 요청이 끝나면 I/O 스레드와 파싱 단계에 종료 신호 전달
+        fetch_queue.join()
+        for _ in range(io_workers):
+            fetch_queue.put(None)
+        raw_queue.put(None)
+
+    with ProcessPoolExecutor(max_workers=parse_workers) as pool:
+        def dispatcher():
+            while True:
+                entry = raw_queue.get()
+                if entry is None:
+                    parsed_queue.put(None)
+                    return
+                unit, page_no, content = entry
+                future = g2b_trace.submit(pool, parse_response, content, unit['biz_type'], fields)
+                parsed_queue.put((unit, page_no, _total_count(content), future))
+
+        threads = [threading.Thread(target=io_worker, daemon=True) for _ in range(io_workers)]
+        threads += [threading.Thread(target=coordinator, daemon=True), threading.Thread(target=dispatcher, daemon=True)]
+        for thread in threads:
+            thread.start()
+
+        while True:
+            entry = parsed_queue.get()
+            if entry is None:
+                break
+            unit, page_no, total_count, future = entry
+            rows, message = g2b_trace.result(future)
+            reintern(rows)
+            if message:
+                print(f"    [{unit['biz_type']}] {message}")
+                unit['failed'] = True
+            else:
+                record_page(unit, page_no, len(rows), total_count)
+            yield unit, rows
+
+
+def filter_by_keyword(rows, keyword):
+    """공백을 무시하고 공고명에 키워드가 포함된 행만 선택"""
+    stripped_target_keyword = keyword.replace(" ", "").lower()
+    with span('filter', cpu=True, rows=len(rows)):
+        return [
+            item for item in rows
+            if item.get('bidNtceNm') and stripped_target_keyword in item['bidNtceNm'].replace(" ", "").lower()
+        ]
+
+
+def build_units(operations, keywords, date_ranges, coverage=None, fields=None):
+    """
+    (키워드 x 업무구분 x 기간) 수집 단위 목록 -> (API로 받을 단위, 로컬 보관분에서 꺼낼 단위)
+    coverage가 있으면 각 기간을 이미 수집한 부분과 빈 부분으로 나누어, 빈 부분만 API 단위로 만듦
+    """
+    fetch_units, local_units = [], []
+    row_format = 'all_88:' + ','.join(fields or ALL_FIELDS)
+    for keyword in keywords:
+        for biz_type, op_name in operations.items():
+            filters = {'inqryDiv': '1', 'bidNtceNm': keyword}
+            fkey = filter_key(filters, row_format)
+            for start_dt, end_dt in date_ranges:
+                if coverage is None:
+                    covered, gaps = [], [(start_dt, end_dt)]
+                else:
+                    covered, gaps = coverage.split(op_name, fkey, start_dt, end_dt)
+                for parts, units in ((covered, local_units), (gaps, fetch_units)):
+                    units.extend(
+                        {
+                            'keyword': keyword,
+                            'biz_type': biz_type,
+                            'op_name': op_name,
+                            'filter_key': fkey,
+                            'params': dict(filters, inqryBgnDt=bgn_dt, inqryEndDt=end_dt, numOfRows=100)
+                        }
+                        for bgn_dt, end_dt in parts
+                    )
+    return fetch_units, local_units
+
+
+def iter_pipeline_pages(client, units, fields=None):
+    """파이프라인 수집 -> (수집 단위, 페이지 행 목록)"""
+    yield from collect_pipeline(client, units, fields=fields)
+
+
+def iter_serial_pages(client, units, fields=None):
+    """기존 순차 수집 -> (수집 단위, 페이지 행 목록)"""
+    current = None
+    for unit in units:
+        if current is None or current[0] != unit['keyword']:
+            print(f"--- '{unit['keyword']}' 키워드 검색 시작 ---")
+        if current != (unit['keyword'], unit['biz_type']):
+            print(f"  [{unit['biz_type']}] 분야 조회 중...")
+        current = (unit['keyword'], unit['biz_type'])
+
+        for rows in client.iter_pages(unit['op_name'], unit['biz_type'], dict(unit['params']), fields, unit):
+            yield unit, rows
+        if not client.last_fetch_ok:
+            unit['failed'] = True
+
+
+def record_page(unit, page_no, row_count, total_count):
+    """수집 단위의 페이지별 건수와 서버 totalCount 기록"""
+    unit.setdefault('pages', {})[page_no] = row_count
+    unit['total'] = total_count
+
+
+def missing_pages(unit):
+    """totalCount 기준으로 빠졌거나 덜 받은 페이지 번호 목록 (1페이지를 받지 못했으면 전체 건수를 모르므로 [1])"""
+    if 'total' not in unit:
+        return [1]
+    num_of_rows = int(unit['params'].get('numOfRows', 100))
+    pages = unit.get('pages', {})
+    last_page = max(1, math.ceil(unit['total'] / num_of_rows))
+    return [
+        page_no for page_no in range(1, last_page + 1)
+        if pages.get(page_no, -1) < min(num_of_rows, unit['total'] - (page_no - 1) * num_of_rows)
+    ]
+
+
+def _row_key(row):
+    return row.get('bidNtceNo', ''), row.get('bidNtceOrd', '')
+
+
+def iter_verified(client, pages, units, fields=None, report=None):
+    """
+    수집한 페이지를 그대로 전달한 뒤, 단위별로 totalCount와 대조하여 빠지거나 덜 받은 페이지만 다시 조회
+    (1페이지를 다시 받아 전체 건수를 알게 되면 나머지 누락 페이지도 이어서 조회)
+    끝까지 채우지 못한 단위는 failed로 표시하여 수집 완료로 기록하지 않고, 마지막에 완전성 보고 출력
+    report: new_report() 결과를 넘기면 출력하지 않고 합산만 함 (여러 번 수집한 결과를 한 번에 보고할 때)
+    덜 받은 페이지를 다시 받으면 앞서 전달한 행은 빼고 새로 받은 행만 전달 (키워드별 건수가 부풀지 않도록)
+    """
+    delivered = {}  # id(수집 단위) -> 이미 전달한 (공고번호, 차수)
+    for unit, rows in pages:
+        delivered.setdefault(id(unit), set()).update(_row_key(row) for row in rows)
+        yield unit, rows
+
+    refetched = 0
+    incomplete = []
+    for unit in units:
+        attempts = {}
+        while True:
+            todo = [page_no for page_no in missing_pages(unit) if attempts.get(page_no, 0) < VERIFY_RETRIES]
+            if not todo:
+                break
+            for page_no in todo:
+                attempts[page_no] = attempts.get(page_no, 0) + 1
+                params = dict(unit['params'], pageNo=page_no)
+                rows, total_count, ok = client.fetch_page(unit['op_name'], unit['biz_type'], params, fields)
+                refetched += 1
+                if ok:
+                    record_page(unit, page_no, len(rows), total_count)
+                    seen = delivered.setdefault(id(unit), set())
+                    new_rows = [row for row in rows if _row_key(row) not in seen]
+                    seen.update(_row_key(row) for row in new_rows)
+                    if new_rows:
+                        yield unit, new_rows
+                time.sleep(0.1)
+
+        missing = missing_pages(unit)
+        unit['failed'] = bool(missing)
+        if missing:
+            incomplete.append((unit, missing))
+
+    if report is None:
+        print_completeness_report(units, refetched, incomplete)
+    else:
+        report['units'].extend(units)
+        report['refetched'] += refetched
+        report['incomplete'].extend(incomplete)
+
+
+def new_report():
+    """iter_verified 결과를 모아 print_completeness_report(**report)로 한 번에 출력하기 위한 집계"""
+    return {'units': [], 'refetched': 0, 'incomplete': []}
+
+
+def print_completeness_report(units, refetched, incomplete):
+    """수집 단위별 totalCount 대조 결과 출력"""
+    collected = sum(sum(unit.get('pages', {}).values()) for unit in units)
+    expected = sum(unit.get('total', 0) for unit in units)
+    print(f"\n[완전성 확인] 수집 단위 {len(units)}개 / 재조회 {refetched}페이지 / "
+          f"수집 {collected}건 (서버 totalCount 합계 {expected}건)")
+    if not incomplete:
+        print("  모든 단위가 totalCount만큼 수집되었습니다.")
+        return
+
+    print(f"  [미완료] {len(incomplete)}개 단위는 수집 완료로 기록하지 않습니다:")
+    for unit, missing in incomplete[:20]:
+        params = unit['params']
+        received = sum(unit.get('pages', {}).values())
+        print(f"    [{unit['biz_type']}] '{unit['keyword']}' {params['inqryBgnDt']}~{params['inqryEndDt']}: "
+              f"{received}/{unit.get('total', '?')}건, 페이지 {', '.join(map(str, missing))}")
+    if len(incomplete) > 20:
+        print(f"    ... 외 {len(incomplete) - 20}개 단위")
+
+
+def iter_local_pages(coverage, units):
+    """이미 수집한 부분의 보관된 행 -> (수집 단위, 행 목록)"""
+    for unit in units:
+        params = unit['params']
+        rows = coverage.covered_rows(unit['op_name'], unit['filter_key'], params['inqryBgnDt'], params['inqryEndDt'])
+        yield unit, rows
+
+
+def iter_stored(pages, coverage, units):
+    """
+    API로 받은 페이지를 로컬에 보관하며 전달
+    모든 페이지를 받은 뒤 오류가 없었던 단위의 기간만 수집 완료로 기록 (중간에 멈추면 기록하지 않음)
+    """
+    for unit, rows in pages:
+        coverage.store_rows(unit['op_name'], unit['filter_key'], rows)
+        yield unit, rows
+
+    for unit in units:
+        if not unit.get('failed'):
+            params = unit['params']
+            coverage.add(unit['op_name'], unit['filter_key'], params['inqryBgnDt'], params['inqryEndDt'])
+
+
+def iter_collect(client, fetch_units, local_units, coverage=None, fields=None, report=None):
+    """
+    수집 단위 -> (수집 단위, 페이지 행 목록) (로컬 보관분 먼저, API 조회분은 보관하며 전달)
+    report: 완전성 확인 결과를 바로 출력하지 않고 모을 집계 (new_report())
+    """
+    if USE_PIPELINE:
+        pages = iter_pipeline_pages(client, fetch_units, fields)
+    else:
+        pages = iter_serial_pages(client, fetch_units, fields)
+    if VERIFY_COMPLETENESS:
+        pages = iter_verified(client, pages, fetch_units, fields, report)
+    if coverage is None:
+        return pages
+    return chain(iter_local_pages(coverage, local_units), iter_stored(pages, coverage, fetch_units))
+
+
+def iter_latest_batches(client, operations, keywords, date_ranges, limit, found, coverage=None, fields=None):
+    """
+    키워드별 최신 limit건 -> 키워드마다 행 목록 1개 (최신 구간부터 4개 분야를 함께 조회, limit건이 모이면 중단)
+    중단은 반월 구간 단위 (collect_latest 참고), 완전성 확인 결과는 구간마다가 아니라 마지막에 한 번 출력
+    """
+    report = new_report()
+    for keyword in keywords:
+        def fetch_window(start_dt, end_dt):
+            print(f"  '{keyword}' {start_dt[:8]}~{end_dt[:8]} 조회 중...")
+            fetch_units, local_units = build_units(operations, [keyword], [(start_dt, end_dt)], coverage, fields)
+            pages = iter_collect(client, fetch_units, local_units, coverage, fields, report)
+            return [row for rows in iter_filtered(pages, {}) for row in rows]
+
+        latest = collect_latest(date_ranges, fetch_window, limit, 'bidNtceDt', ['bidNtceNo'])
+        for row in latest:
+            found[(keyword, row['bizType'])] = found.get((keyword, row['bizType']), 0) + 1
+        yield latest
+
+    if VERIFY_COMPLETENESS and report['units']:
+        print_completeness_report(**report)
+
+
+def iter_filtered(pages, found):
+    """페이지별 키워드 필터 (found에 (키워드, 업무구분)별 건수 집계)"""
+    for unit, rows in pages:
+        keyword, biz_type = unit['keyword'], unit['biz_type']
+        filtered_results = filter_by_keyword(rows, keyword)
+        found[(keyword, biz_type)] = found.get((keyword, biz_type), 0) + len(filtered_results)
+        yield filtered_results
+
+
+def iter_indexed(batches, instt_index):
+    """
+    수집된 공고를 기관 인덱스에도 적재 (이후 기관별 조회 시 재사용)하고 행 단위로 전달
+    instt_index가 None이면 적재 없이 전달만 함 (출력 항목을 줄여 수집한 행은 원본 행이 아니므로 적재하지 않음)
+    """
+    for batch in batches:
+        if batch and instt_index is not None:
+            instt_index.ingest(batch)
+        yield from batch
+
+
 def get_user_date_ranges():
     while True:
         try:
@@ -211,21 +745,7 @@ def get_user_date_ranges():
         except ValueError:
             print("날짜 형식이 올바르지 않습니다. YYYY-MM-DD 형식으로 다시 입력해주세요.\n")
 
-    ranges = []
-    current_start = start_date
-
-    while current_start < end_date:
-        current_end = current_start + timedelta(days=29, hours=23, minutes=59)
-        if current_end > end_date:
-            current_end = end_date
-
-        str_start = current_start.strftime('%Y%m%d%H%M')
-        str_end = current_end.strftime('%Y%m%d%H%M')
-
-        ranges.append((str_start, str_end))
-        current_start = current_end + timedelta(minutes=1)
-
-    return ranges, start_str, end_str
+    return calendar_windows(start_date, end_date), start_str, end_str
 
 
 def get_user_keywords():
@@ -244,27 +764,29 @@ def get_user_keywords():
             print("유효한 키워드를 입력해주세요.")
 
 
-def save_to_excel(df, start_str, end_str):
-    if df.empty:
+def save_to_excel(rows, start_str, end_str, col_map=None):
+    """rows: 행 목록 또는 이터레이터 (한 번만 순회하며 바로 기록) -> 저장 건수"""
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
         print("저장할 데이터가 없습니다.")
-        return
+        return 0
 
-    # 엑셀 출력을 위한 컬럼 이름 매핑 생성 (업무구분 + 요청하신 88개 전체 항목)
-    col_map = {'bizType': '업무구분'}
-    col_map.update(FIELDS_MAPPING)
+    # 엑셀 출력을 위한 컬럼 이름 매핑 (기본: 업무구분 + 요청하신 88개 전체 항목)
+    col_map = col_map or COLUMN_PRESETS['all']
 
-    # DataFrame 컬럼 이름 변경
-    save_df = df[list(col_map.keys())].rename(columns=col_map)
     filename = f'입찰공고_전분야상세결과_{start_str}_to_{end_str}.xlsx'
 
     try:
-        save_df.to_excel(filename, index=False)
+        count = write_rows(chain([first], rows), col_map, filename)
         print(f"\n[성공] '{filename}' 파일로 상세 저장이 완료되었습니다.")
-        print(f"총 공고 수: {len(save_df)}건 / 출력 항목 수: {len(save_df.columns)}개")
+        print(f"총 공고 수: {count}건 / 출력 항목 수: {len(col_map)}개")
+        return count
     except PermissionError:
         print(f"\n[오류] '{filename}' 파일이 이미 열려있습니다. 파일을 닫고 다시 실행해주세요.")
     except Exception as e:
         print(f"\n[오류] 엑셀 저장 중 문제가 발생했습니다: {e}")
+    return 0
 
 
 def main():
@@ -274,6 +796,8 @@ def main():
     target_keywords = get_user_keywords()
 
     client = G2BAPIClient(SERVICE_KEY)
+    col_map = resolve_columns(COLUMN_PRESET, CUSTOM_COLUMNS)
+    fields = projection_fields(col_map)
 
     # [cite_start]4가지 업무 분야별 오퍼레이션 명확히 지정 [cite: 18]
     operations = {
@@ -285,58 +809,53 @@ def main():
 
     print(f"\n조회 기간: {start_str} ~ {end_str}")
     print(f"검색 키워드: {', '.join(target_keywords)}")
+    print(f"출력 항목: {len(col_map)}개 (XML 추출 {len(fields)}개)")
     print("데이터 수집을 시작합니다...\n")
 
-    all_results = []
+    # 수집 -> 필터 -> 기관 인덱스 적재 -> 중복 제거 -> 저장을 제너레이터로 연결
+    # 페이지 단위로 흘려보내므로 메모리 사용량이 조회 기간(전체 결과 수)과 무관하게 일정함
+    found = {}
+    # 재생 모드는 아카이브 원본을 현재 parse_items로 다시 파싱하는 것이 목적이므로,
+    # 이전 파서로 만든 로컬 보관 행을 쓰지 않도록 구간 재사용을 끔
+    coverage = CoverageMap() if USE_COVERAGE and not REPLAY else None
+    if LATEST_N:
+        print(f"키워드별 최신 {LATEST_N}건만 조회합니다 (최신 구간부터).\n")
+        batches = iter_latest_batches(client, operations, target_keywords, date_ranges, LATEST_N, found, coverage, fields)
+    else:
+        fetch_units, local_units = build_units(operations, target_keywords, date_ranges, coverage, fields)
+        if local_units:
+            print(f"이전에 수집한 구간 {len(local_units)}개는 로컬 보관분을 사용하고, {len(fetch_units)}개 구간만 조회합니다.\n")
+        batches = iter_filtered(iter_collect(client, fetch_units, local_units, coverage, fields), found)
+
+    instt_index = InstitutionIndex() if fields == ALL_FIELDS else None
+    rows = iter_dedup(iter_indexed(batches, instt_index), ['bidNtceNo'])
+    if SAVE_DATASET:
+        # 업무구분/공고월 파티션 데이터셋에도 추가 (공고번호+차수 기준 중복 제거)
+        rows = DatasetWriter('notices', COLUMN_PRESETS['all']).tee(rows)
+    if NEAR_DUP_MODE:
+        import near_dup
+        rows = near_dup.apply_mode(rows, NEAR_DUP_MODE)
+        col_map = dict(near_dup.CLUSTER_COLUMNS, **col_map)
+    doc_jobs = []
+    if DOWNLOAD_DOCS:
+        from doc_download import tee_jobs
+        rows = tee_jobs(rows, doc_jobs)
+    saved = save_to_excel(rows, start_str, end_str, col_map)
+    if doc_jobs:
+        from doc_download import DocStore
+        DocStore().download_all(doc_jobs)
 
     for keyword in target_keywords:
-        print(f"--- '{keyword}' 키워드 검색 시작 ---")
-
-        for biz_type, op_name in operations.items():
-            print(f"  [{biz_type}] 분야 조회 중...")
-            keyword_biz_results = []
-
-            for start_dt, end_dt in date_ranges:
-                params = {
-                    'inqryDiv': '1',
-                    'inqryBgnDt': start_dt,
-                    'inqryEndDt': end_dt,
-                    'numOfRows': 100,
-                    'bidNtceNm': keyword
-                }
-
-                results = client.fetch_all_pages(op_name, biz_type, params)
-                if results:
-                    keyword_biz_results.extend(results)
-
-            if keyword_biz_results:
-                stripped_target_keyword = keyword.replace(" ", "")
-                filtered_results = []
-
-                for item in keyword_biz_results:
-                    bid_name = item.get('bidNtceNm', '')
-                    if bid_name:
-                        stripped_bid_name = bid_name.replace(" ", "")
-                        if stripped_target_keyword.lower() in stripped_bid_name.lower():
-                            filtered_results.append(item)
-
-                if filtered_results:
-                    all_results.extend(filtered_results)
-                    print(f"    -> {len(filtered_results)}건 발견")
-                else:
-                    print(f"    -> 조건에 맞는 데이터 없음")
-            else:
-                print(f"    -> 데이터 없음")
-
-    if all_results:
-        df = pd.DataFrame(all_results)
-        df_unique = df.drop_duplicates(subset=['bidNtceNo'])
-        print(f"\n[최종 집계] 중복 제거 후 총 {len(df_unique)}건2의 공고가 추출되었습니다.")
+        print(f"--- '{keyword}' 키워드 검색 결과 ---")
+        for biz_type in operations:
+            count = found.get((keyword, biz_type), 0)
+            print(f"  [{biz_type}] -> {count}건 발견" if count else f"  [{biz_type}] -> 조건에 맞는 데이터 없음")
 
-        save_to_excel(df_unique, start_str, end_str)
+    if saved:
+        print(f"\n[최종 집계] 중복 제거 후 총 {saved}건의 공고가 추출되었습니다.")
     else:
         print("\n입력하신 조건으로 조회된 공고가 없습니다.")
 
 
 if __name__ == "__main__":
-    main()
+    g2b_trace.run_main(main)
@@ -0,0 +1,310 @@
+import gzip
+import json
+import os
+import socket
+import sys
+import time
+from datetime import datetime
+
+import requests
+
+from g2b_export import iter_dedup, write_rows
+from g2b_fetch import BID_BASE_URL, BID_OPERATIONS, fetch_page
+from g2b_trace import run_main
+from g2b_windows import calendar_windows
+from institution_index import InstitutionIndex
+
+# === [설정] 서비스 키 입력 ===
+SERVICE_KEY = ""
+
+# === [설정] 분산 백필 ===
+# 여러 프로세스/PC가 같은 공유 폴더(네트워크 드라이브 등)를 가리키면 작업을 나누어 수집
+SHARED_DIR = "g2b_backfill"
+LEASE_SECONDS = 600      # 이 시간 동안 갱신이 없는 작업은 중단된 것으로 보고 다른 작업자가 가져감
+NUM_OF_ROWS = 900
+
+
+def _path(*parts):
+    return os.path.join(SHARED_DIR, *parts)
+
+
+def shard_id(op_code, bgn_dt, end_dt):
+    return f"{op_code}_{bgn_dt}_{end_dt}"
+
+
+def init_shards(start_str, end_str):
+    """
+    전체 (오퍼레이션, 기간)을 샤드로 나누어 공유 폴더에 작업 목록 작성 (이미 있으면 추가분만 반영)
+    샤드 기간은 달력 기준 반월 구간(g2b_windows)이라 다른 스크립트의 조회 구간과 같음
+    """
+    for sub in ('leases', 'parts', 'done'):
+        os.makedirs(_path(sub), exist_ok=True)
+
+    manifest_path = _path('shards.json')
+    shards = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            shards = {s['id']: s for s in json.load(f)}
+
+    for bgn_dt, end_dt in calendar_windows(start_str, end_str):
+        for biz_type, op_code in BID_OPERATIONS.items():
+            sid = shard_id(op_code, bgn_dt, end_dt)
+            shards.setdefault(sid, {'id': sid, 'biz_type': biz_type, 'op_code': op_code,
+                                    'bgn_dt': bgn_dt, 'end_dt': end_dt})
+
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(sorted(shards.values(), key=lambda s: s['id']), f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, manifest_path)
+    print(f"[백필] 샤드 {len(shards)}개 준비 ({SHARED_DIR})")
+
+
+def load_shards():
+    with open(_path('shards.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def is_done(sid):
+    return os.path.exists(_path('done', sid))
+
+
+def _create_lease(lease_path, content):
+    """lease 파일을 O_EXCL로 생성 (이미 있으면 False)"""
+    try:
+        fd = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+
+def _lease_owner(path):
+    """lease 파일에 기록된 작업자 (파일이 없으면 None)"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return f.readline().strip()
+    except FileNotFoundError:
+        return None
+
+
+def try_lease(sid, worker):
+    """
+    샤드 작업권(lease) 획득 시도 (lease 파일 첫 줄에 작업자 이름 기록)
+    - lease 파일을 O_EXCL로 생성하여 한 작업자만 성공
+    - 기존 lease가 LEASE_SECONDS 이상 갱신되지 않았으면 .expired.<작업자>로 이름을 바꿔 회수한 뒤 다시 생성
+    - 만료 확인과 이름 변경 사이에 다른 작업자가 먼저 회수하고 새 lease를 만들었을 수 있으므로,
+      옮긴 파일의 작업자/갱신 시각이 만료 확인 때와 다르면 회수하지 않고 원래 이름으로 되돌림
+    """
+    lease_path = _path('leases', sid)
+    expired_path = f"{lease_path}.expired.{worker}"
+    for _ in range(2):
+        if _create_lease(lease_path, f"{worker}\n{datetime.now().isoformat()}\n"):
+            return True
+
+        try:
+            if time.time() - os.path.getmtime(lease_path) < LEASE_SECONDS:
+                return False
+            stale_owner = _lease_owner(lease_path)
+            os.rename(lease_path, expired_path)
+        except FileNotFoundError:
+            continue  # 다른 작업자가 먼저 회수/반납함 -> 다시 생성 시도
+
+        fresh = time.time() - os.path.getmtime(expired_path) < LEASE_SECONDS
+        if fresh or _lease_owner(expired_path) != stale_owner:
+            # 다른 작업자가 방금 만든 lease를 옮긴 경우 -> 같은 파일을 원래 이름으로 되돌림
+            # (하드 링크라 그 작업자가 쓰는 중인 내용도 유지, 그 사이 또 다른 lease가 생겼으면 그쪽을 둠)
+            try:
+                os.link(expired_path, lease_path)
+            except FileExistsError:
+                pass
+            os.remove(expired_path)
+            return False
+        os.remove(expired_path)
+        print(f"  [회수] {sid} (lease 만료: {stale_owner})")
+    return False
+
+
+def renew_lease(sid, worker):
+    """내 lease의 갱신 시각을 현재로 -> lease를 아직 가지고 있는지 여부 (다른 작업자가 회수했으면 False)"""
+    lease_path = _path('leases', sid)
+    owner = _lease_owner(lease_path)
+    if owner is None:
+        return True  # 다른 작업자가 만료 여부를 확인하느라 잠시 옮긴 상태 (곧 되돌려짐)
+    if owner != worker:
+        return False
+    try:
+        os.utime(lease_path)
+    except FileNotFoundError:
+        pass
+    return True
+
+
+def release_lease(sid, worker):
+    """내 lease만 반납 (회수되어 다른 작업자가 가진 lease는 건드리지 않음)"""
+    lease_path = _path('leases', sid)
+    if _lease_owner(lease_path) != worker:
+        return
+    try:
+        os.remove(lease_path)
+    except FileNotFoundError:
+        pass
+
+
+def fetch_shard(shard, session, worker):
+    """
+    샤드 기간 전체 페이지 수집 -> 원본 태그 dict 목록 (오류 시 None)
+    끝 페이지까지의 건수가 1페이지의 totalCount보다 적으면 그 페이지를 한 번 더 받고, 그래도 모자라면 None (완료 표시 안 함)
+    수집 중 lease를 잃으면(오래 멈춰 다른 작업자가 회수) 중단하고 None
+    """
+    rows = []
+    page_no = 1
+    total_count = None
+    while True:
+        params = {'inqryDiv': '1', 'inqryBgnDt': shard['bgn_dt'], 'inqryEndDt': shard['end_dt'],
+                  'numOfRows': NUM_OF_ROWS, 'pageNo': page_no, 'type': 'xml'}
+        result = fetch_page(BID_BASE_URL, shard['op_code'], params, SERVICE_KEY, session)
+        expected = result.total_count if total_count is None else total_count
+        if result.ok and len(result.items) < NUM_OF_ROWS and len(rows) + len(result.items) < expected:
+            result = fetch_page(BID_BASE_URL, shard['op_code'], params, SERVICE_KEY, session)
+        if not result.ok:
+            print(f"  [{shard['id']}] {page_no}페이지 오류: {result.message}")
+            return None
+
+        if total_count is None:
+            total_count = result.total_count
+        rows.extend(dict(item, bizType=shard['biz_type']) for item in result.items)
+        if not renew_lease(shard['id'], worker):
+            print(f"  [{shard['id']}] lease를 다른 작업자가 회수하여 중단")
+            return None
+        if len(result.items) < NUM_OF_ROWS:
+            if len(rows) < total_count:
+                print(f"  [{shard['id']}] totalCount {total_count}건 중 {len(rows)}건만 수집 ({page_no}페이지에서 끊김)")
+                return None
+            return rows
+        page_no += 1
+        time.sleep(0.1)
+
+
+def save_part(sid, rows):
+    """샤드 결과를 parts/에 기록 (임시 파일 -> 이름 변경으로 완성된 파일만 보이게 함) 후 완료 표시"""
+    part_path = _path('parts', f"{sid}.jsonl.gz")
+    tmp_path = f"{part_path}.{os.getpid()}.tmp"
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+    os.replace(tmp_path, part_path)
+    with open(_path('done', sid), 'w', encoding='utf-8') as f:
+        f.write(f"{len(rows)}\n")
+
+
+def work(worker=None):
+    """남은 샤드를 하나씩 lease로 가져와 수집 (모든 샤드가 완료되거나 남은 것이 모두 다른 작업자 소유일 때 종료)"""
+    worker = worker or f"{socket.gethostname()}-{os.getpid()}"
+    session = requests.Session()
+    completed = 0
+    failed = set()   # 이번 실행에서 오류가 난 샤드 (다른 작업자나 다음 실행에서 재시도)
+
+    while True:
+        pending = [s for s in load_shards() if not is_done(s['id']) and s['id'] not in failed]
+        if not pending:
+            break
+
+        claimed = None
+        for shard in pending:
+            if try_lease(shard['id'], worker):
+                claimed = shard
+                break
+        if claimed is None:
+            print(f"[{worker}] 남은 샤드 {len(pending)}개 모두 다른 작업자가 수집 중")
+            break
+
+        sid = claimed['id']
+        try:
+            if is_done(sid):  # lease 획득 직전에 다른 작업자가 완료한 경우
+                continue
+            rows = fetch_shard(claimed, session, worker)
+            if rows is not None:
+                save_part(sid, rows)
+                completed += 1
+                print(f"[{worker}] {sid}: {len(rows)}건 완료 (남은 샤드 {len(pending) - 1}개)")
+            else:
+                failed.add(sid)
+        finally:
+            release_lease(sid, worker)
+
+    print(f"[{worker}] 종료: 이번 실행에서 {completed}개 샤드 수집" + (f", 오류 {len(failed)}개" if failed else ''))
+
+
+def status():
+    shards = load_shards()
+    done = sum(1 for s in shards if is_done(s['id']))
+    leased = sum(1 for s in shards if not is_done(s['id']) and os.path.exists(_path('leases', s['id'])))
+    print(f"[백필] 전체 {len(shards)} / 완료 {done} / 수집 중 {leased} / 대기 {len(shards) - done - leased}")
+
+
+def iter_part_rows(shards):
+    for shard in shards:
+        part_path = _path('parts', f"{shard['id']}.jsonl.gz")
+        if not os.path.exists(part_path):
+            continue
+        with gzip.open(part_path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                row = json.loads(line)
+                # 예산금액/이메일 누락 보완 (all_88.py와 동일)
+                row['bdgtAmt'] = row.get('bdgtAmt') or row.get('asignBdgtAmt', '')
+                row['ntceInsttOfclEmailAdrs'] = row.get('ntceInsttOfclEmailAdrs') or row.get('dminsttOfclEmailAdrs', '')
+                yield row
+
+
+def merge(filename):
+    """완료된 샤드 결과를 공고번호+차수 기준 중복 제거하여 하나의 파일로 저장하고 기관 인덱스에 반영"""
+    from all_88 import COLUMN_PRESETS
+
+    shards = load_shards()
+    done_shards = [s for s in shards if is_done(s['id'])]
+    if len(done_shards) < len(shards):
+        print(f"[주의] 완료되지 않은 샤드 {len(shards) - len(done_shards)}개는 제외하고 병합합니다.")
+
+    instt_index = InstitutionIndex()
+    batch = []
+
+    def indexed():
+        for shard in done_shards:
+            for row in iter_part_rows([shard]):
+                batch.append(row)
+                if len(batch) >= 5000:
+                    instt_index.ingest(batch)
+                    batch.clear()
+                yield row
+            # 샤드의 행을 모두 적재한 뒤에만 수집 완료 구간으로 기록 (병합이 중간에 멈추면 남은 샤드는 기록되지 않음)
+            instt_index.ingest(batch)
+            batch.clear()
+            instt_index.mark_covered(shard['op_code'], shard['bgn_dt'], shard['end_dt'])
+
+    count = write_rows(iter_dedup(indexed(), ['bidNtceNo', 'bidNtceOrd']), COLUMN_PRESETS['all'], filename)
+    print(f"[병합] {count}건 -> {filename}")
+
+
+def main():
+    usage = ("사용법:\n"
+             "  python backfill.py init 2020-01-01 2024-12-31   # 공유 폴더에 샤드 목록 작성 (한 번)\n"
+             "  python backfill.py work [작업자이름]             # 각 프로세스/PC에서 실행\n"
+             "  python backfill.py status\n"
+             "  python backfill.py merge 결과.xlsx")
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+
+    if command == 'init' and len(sys.argv) >= 4:
+        init_shards(sys.argv[2], sys.argv[3])
+    elif command == 'work':
+        work(sys.argv[2] if len(sys.argv) > 2 else None)
+    elif command == 'status':
+        status()
+    elif command == 'merge' and len(sys.argv) >= 3:
+        merge(sys.argv[2])
+    else:
+        print(usage)
+
+
+if __name__ == "__main__":
+    run_main(main)
@@ -0,0 +1,269 @@
+import json
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from coverage_map import CoverageMap, filter_key
+from g2b_export import dedup_rows, write_rows
+from g2b_fetch import BID_BASE_URL, BID_OPERATIONS, SPEC_BASE_URL, SPEC_OPERATIONS, RequestCoalescer
+from g2b_trace import run_main, span
+from g2b_windows import calendar_windows
+from institution_index import InstitutionIndex, normalize_instt_name
+
+# === [설정] 서비스 키 입력 ===
+SERVICE_KEY = ""
+
+# 동시에 실행할 검색 작업 수
+MAX_WORKERS = 4
+
+# 요청 종류별 페이지 크기 (작업 간 요청이 동일해야 합쳐지므로 고정)
+KEYWORD_ROWS = 100   # 서버측 키워드 필터 요청
+SWEEP_ROWS = 900     # 필터 없는 전체 조회 요청 (기관/이메일)
+
+# 작업 종류별 엑셀 출력 컬럼
+KEYWORD_COLUMNS = {
+    'bizType': '업무구분',
+    'bidNtceNo': '공고번호',
+    'untyNtceNo': '통합공고번호',
+    'bidNtceDt': '공고일시',
+    'bidNtceNm': '공고명',
+    'ntceInsttNm': '공고기관',
+    'bdgtAmt': '예산금액',
+    'presmptPrce': '추정가격',
+    'bidBeginDt': '입찰개시일시',
+    'bidQlfctRgstDt': '입찰참가자격등록마감일시',
+    'bidClseDt': '입찰마감일시',
+    'opengDt': '개찰일시',
+    'ntceInsttOfclNm': '담당자',
+    'ntceInsttOfclTelNo': '전화번호',
+    'ntceInsttOfclEmailAdrs': '담당자이메일주소(공고/수요)'
+}
+INSTITUTION_COLUMNS = {
+    'bizType': '분야',
+    'bidNtceNo': '공고번호',
+    'bidNtceNm': '공고명',
+    'ntceInsttNm': '공고기관',
+    'dminsttNm': '수요기관',
+    'ntceInsttOfclNm': '담당자명',
+    'ntceInsttOfclTelNo': '전화번호',
+    'ntceInsttOfclEmailAdrs': '이메일',
+    'bidNtceDt': '공고일시'
+}
+EMAIL_COLUMNS = {
+    'bizType': '분야',
+    'bidNtceNo': '공고번호',
+    'bidNtceNm': '공고명',
+    'ntceInsttNm': '공고기관',
+    'ntceInsttOfclNm': '담당자명',
+    'ntceInsttOfclTelNo': '전화번호',
+    'ntceInsttOfclEmailAdrs': '이메일',
+    'bidNtceDt': '공고일시'
+}
+PRESPEC_COLUMNS = {
+    'bfSpecRgstNo': '사전규격등록번호',
+    'bsnsDivNm': '업무구분',
+    'refNo': '참조번호',
+    'prdctClsfcNoNm': '품명(사업명)',
+    'orderInsttNm': '발주기관',
+    'rlDminsttNm': '수요기관',
+    'asignBdgtAmt': '배정예산',
+    'rcptDt': '접수일시',
+    'opninRgstClseDt': '의견마감일시',
+    'ofclNm': '담당자',
+    'ofclTelNo': '전화번호',
+    'swBizObjYn': 'SW사업여부',
+    'bidNtceNoList': '연관공고번호',
+    'rgstDt': '등록일시'
+}
+
+
+def get_date_ranges(start_str, end_str):
+    """YYYY-MM-DD 기간을 get_user_date_ranges와 같은 규칙(달력 기준 반월 구간)으로 분할"""
+    return calendar_windows(start_str, end_str)
+
+
+def load_jobs(path):
+    """
+    작업 파일(JSON) 읽기
+    {"jobs": [{"name": ..., "type": "keyword" | "institution" | "email" | "prespec",
+               "start": "YYYY-MM-DD", "end": "YYYY-MM-DD", ...}, ...]}
+    """
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+
+    jobs = config['jobs'] if isinstance(config, dict) else config
+    for i, job in enumerate(jobs):
+        job.setdefault('name', f"job{i + 1}")
+        if job.get('type') not in JOB_RUNNERS:
+            raise ValueError(f"[{job['name']}] 알 수 없는 작업 종류: {job.get('type')}")
+        datetime.strptime(job['start'], "%Y-%m-%d")
+        datetime.strptime(job['end'], "%Y-%m-%d")
+    return jobs
+
+
+def _biz_types(job):
+    return job.get('biz_types') or list(BID_OPERATIONS)
+
+
+def run_keyword_job(job, coalescer):
+    """search_keyword_date.py와 같은 키워드 검색 (서버측 bidNtceNm 필터 + 공백 무시 부분 일치)"""
+    coverage = CoverageMap()
+    rows = []
+    for keyword in job['keywords']:
+        stripped_keyword = keyword.replace(" ", "").lower()
+        for biz_type in _biz_types(job):
+            op_code = BID_OPERATIONS[biz_type]
+            filters = {'inqryDiv': '1', 'bidNtceNm': keyword}
+            fkey = filter_key(filters, 'raw')
+
+            def fetch_range(bgn_dt, end_dt):
+                params = dict(filters, inqryBgnDt=bgn_dt, inqryEndDt=end_dt)
+                return coalescer.fetch_all_pages(BID_BASE_URL, op_code, params, KEYWORD_ROWS)
+
+            for start_dt, end_dt in get_date_ranges(job['start'], job['end']):
+                # 이전 실행에서 같은 키워드로 수집한 부분은 로컬 보관분 사용
+                items = coverage.fetch(op_code, fkey, start_dt, end_dt, fetch_range)
+
+                with span('filter', cpu=True, rows=len(items)):
+                    for item in items:
+                        if stripped_keyword in item.get('bidNtceNm', '').replace(" ", "").lower():
+                            row = dict(item, bizType=biz_type)
+                            row['bdgtAmt'] = item.get('asignBdgtAmt') or item.get('bdgtAmt', '')
+                            row['ntceInsttOfclEmailAdrs'] = (item.get('ntceInsttOfclEmailAdrs')
+                                                             or item.get('dminsttOfclEmailAdrs', ''))
+                            rows.append(row)
+    return rows, ['bidNtceNo'], KEYWORD_COLUMNS
+
+
+def _sweep(job, coalescer, on_items):
+    """필터 없는 전체 조회 (기관/이메일 작업 공통) — 같은 기간의 작업끼리 요청이 합쳐짐"""
+    instt_index = InstitutionIndex()
+    for start_dt, end_dt in get_date_ranges(job['start'], job['end']):
+        for biz_type in _biz_types(job):
+            op_code = BID_OPERATIONS[biz_type]
+            # 이미 전체 공고를 수집한 부분은 기관 인덱스에서 꺼내고, 빈 부분만 API로 조회
+            covered, gaps = instt_index.coverage.split(op_code, '', start_dt, end_dt)
+            for part_start, part_end in covered:
+                on_items(biz_type, instt_index.rows_between(biz_type, part_start, part_end))
+
+            for gap_start, gap_end in gaps:
+                params = {'inqryDiv': '1', 'inqryBgnDt': gap_start, 'inqryEndDt': gap_end, 'type': 'xml'}
+                items, ok = coalescer.fetch_all_pages(BID_BASE_URL, op_code, params, SWEEP_ROWS)
+
+                instt_index.ingest(items, biz_type)
+                if ok:
+                    instt_index.mark_covered(op_code, gap_start, gap_end)
+                on_items(biz_type, items)
+
+
+def run_institution_job(job, coalescer):
+    """specific_bid.py와 같은 기관별 조회 (공고기관 또는 수요기관명 부분 일치)"""
+    target = normalize_instt_name(job['institution'])
+    rows = []
+
+    def on_items(biz_type, items):
+        for item in items:
+            if (target in normalize_instt_name(item.get('ntceInsttNm', ''))
+                    or target in normalize_instt_name(item.get('dminsttNm', ''))):
+                rows.append(dict(item, bizType=biz_type))
+
+    _sweep(job, coalescer, on_items)
+    return rows, ['bidNtceNo'], INSTITUTION_COLUMNS
+
+
+def run_email_job(job, coalescer):
+    """GetMail.py와 같은 담당자 이메일 수집"""
+    rows = []
+
+    def on_items(biz_type, items):
+        for item in items:
+            email = item.get('ntceInsttOfclEmailAdrs', '')
+            if email and '@' in email:
+                rows.append(dict(item, bizType=biz_type))
+
+    _sweep(job, coalescer, on_items)
+    return rows, ['ntceInsttOfclEmailAdrs'], EMAIL_COLUMNS
+
+
+def run_prespec_job(job, coalescer):
+    """PRE2.py와 같은 사전규격 키워드 검색 (제외 키워드 적용)"""
+    exclude = job.get('exclude') or []
+    exclude_matcher = re.compile('|'.join(re.escape(k) for k in exclude), re.IGNORECASE) if exclude else None
+
+    coverage = CoverageMap()
+    rows = []
+    for biz_type in _biz_types(job):
+        op_code = SPEC_OPERATIONS[biz_type]
+        for keyword in job['keywords']:
+            filters = {'inqryDiv': '1', 'prdctClsfcNoNm': keyword}
+            fkey = filter_key(filters, 'raw')
+
+            def fetch_range(bgn_dt, end_dt):
+                params = dict(filters, inqryBgnDt=bgn_dt, inqryEndDt=end_dt)
+                return coalescer.fetch_all_pages(SPEC_BASE_URL, op_code, params, KEYWORD_ROWS)
+
+            for start_dt, end_dt in get_date_ranges(job['start'], job['end']):
+                items = coverage.fetch(op_code, fkey, start_dt, end_dt, fetch_range,
+                                       key_cols=('bfSpecRgstNo',), date_field='rcptDt')
+                rows.extend(i for i in items
+                            if exclude_matcher is None or not exclude_matcher.search(i.get('prdctClsfcNoNm', '')))
+    return rows, ['bfSpecRgstNo'], PRESPEC_COLUMNS
+
+
+JOB_RUNNERS = {
+    'keyword': run_keyword_job,
+    'institution': run_institution_job,
+    'email': run_email_job,
+    'prespec': run_prespec_job
+}
+
+
+def save_job_result(job, rows, dedup_keys, col_map):
+    if not rows:
+        print(f"[{job['name']}] 저장할 데이터가 없습니다.")
+        return
+
+    unique_rows = dedup_rows(rows, dedup_keys)
+    filename = job.get('output') or f"배치_{job['name']}_{job['start']}_to_{job['end']}.xlsx"
+
+    try:
+        write_rows(unique_rows, col_map, filename)
+        print(f"[{job['name']}] 엑셀 저장 완료: {filename} ({len(unique_rows)}건)")
+    except PermissionError:
+        print(f"[{job['name']}] '{filename}' 파일이 이미 열려있습니다. 파일을 닫고 다시 실행해주세요.")
+    except Exception as e:
+        print(f"[{job['name']}] 엑셀 저장 중 문제가 발생했습니다: {e}")
+
+
+def run_job(job, coalescer):
+    print(f"[{job['name']}] {job['type']} 작업 시작 ({job['start']} ~ {job['end']})")
+    rows, dedup_keys, col_map = JOB_RUNNERS[job['type']](job, coalescer)
+    save_job_result(job, rows, dedup_keys, col_map)
+    return len(rows)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("사용법: python batch_jobs.py <작업파일.json>")
+        return
+
+    jobs = load_jobs(sys.argv[1])
+    print(f"=== 나라장터 일괄 검색: 작업 {len(jobs)}개 ===")
+
+    coalescer = RequestCoalescer(SERVICE_KEY)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [(job, executor.submit(run_job, job, coalescer)) for job in jobs]
+        for job, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"[{job['name']}] 작업 실패: {e}")
+
+    stats = coalescer.stats
+    print(f"\n[요청 통계] 실제 API 호출 {stats['requests']}회 / "
+          f"재사용 {stats['cache_hits']}회 / 동시 요청 합류 {stats['shared_waits']}회")
+
+
+if __name__ == "__main__":
+    run_main(main)
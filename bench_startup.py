@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+import time
+
+from g2b_trace import run_main
+
+# 시작 시간을 측정할 진입점 스크립트
+ENTRY_MODULES = [
+    'main', 'all_88', 'search_keyword_date', 'pre', 'PRE2', 'GetMail',
+    'specific_bid', 'spec_join', 'batch_jobs', 'notice_fts', 'raw_archive', 'g2b_dataset', 'g2b_report', 'backfill',
+    'deadline_index', 'near_dup', 'doc_download'
+]
+
+# 수집 경로에서 불러오면 안 되는 무거운 라이브러리 (엑셀 저장 시점에만 로드)
+HEAVY_MODULES = ['pandas', 'numpy', 'openpyxl', 'pyarrow', 'duckdb']
+
+REPEAT = 5
+
+
+def measure(code):
+    """새 인터프리터에서 code를 실행하는 데 걸린 시간(ms, REPEAT회 중 최소)과 표준출력"""
+    best = None
+    output = ''
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)))
+        elapsed = (time.perf_counter() - started) * 1000
+        if proc.returncode != 0:
+            return None, proc.stderr.strip().splitlines()[-1]
+        best = elapsed if best is None else min(best, elapsed)
+        output = proc.stdout.strip()
+    return best, output
+
+
+def main():
+    print("=== 진입점 import 시간 측정 (pandas/openpyxl 지연 로딩 확인) ===")
+    baseline, _ = measure('pass')
+    print(f"인터프리터 기본 기동: {baseline:.1f}ms\n")
+
+    check = "import sys; print(','.join(m for m in %r if m in sys.modules))" % (HEAVY_MODULES,)
+    failed = False
+
+    for module in ENTRY_MODULES:
+        elapsed, output = measure(f"import {module}; {check}")
+        if elapsed is None:
+            print(f"  {module:<22} import 실패: {output}")
+            failed = True
+            continue
+
+        heavy = output or '-'
+        print(f"  {module:<22} {elapsed - baseline:7.1f}ms  무거운 모듈: {heavy}")
+        if output:
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    run_main(main)
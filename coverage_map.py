@@ -0,0 +1,138 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+import g2b_db
+from g2b_records import as_dict
+from g2b_windows import normalize_dt
+
+# 필터 구분에서 제외하는 파라미터 (기간/페이지/인증/응답 형식)
+NON_FILTER_PARAMS = {'ServiceKey', 'serviceKey', 'pageNo', 'numOfRows', 'type', 'inqryBgnDt', 'inqryEndDt'}
+
+
+def filter_key(params, row_format=''):
+    """
+    서버 측 필터 파라미터(기간/페이지 제외) -> 커버리지 구분 키 (필터가 없으면 '')
+    row_format: 같은 오퍼레이션/필터라도 저장하는 행의 항목이 다르면 따로 기록하기 위한 구분 값
+    """
+    filters = {k: str(v) for k, v in params.items() if k not in NON_FILTER_PARAMS and v not in (None, '')}
+    if row_format:
+        filters['_rows'] = hashlib.sha1(row_format.encode('utf-8')).hexdigest()[:12]
+    return json.dumps(filters, ensure_ascii=False, sort_keys=True) if filters else ''
+
+
+def _shift(dt_str, minutes):
+    """YYYYMMDDHHMM 문자열을 minutes분 이동"""
+    return (datetime.strptime(dt_str, '%Y%m%d%H%M') + timedelta(minutes=minutes)).strftime('%Y%m%d%H%M')
+
+
+class CoverageMap:
+    """
+    (오퍼레이션, 필터)별로 수집을 마친 기간을 구간 집합으로 기록
+    - 새 요청 기간을 이미 수집한 부분(로컬에서 조회)과 빈 부분(API 호출)으로 나눔
+    - 빈 부분의 수집이 끝나면 add()로 기록하고, 맞닿거나 겹치는 구간은 하나로 합침
+    - 필터가 있는 조회 결과는 coverage_rows에 보관하여 다음 요청의 수집된 부분을 채움
+    """
+
+    def __init__(self, db_path=None):
+        self.conn = g2b_db.connect(db_path)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS coverage (
+                op_code TEXT NOT NULL,
+                filter_key TEXT NOT NULL,
+                bgn_dt TEXT NOT NULL,
+                end_dt TEXT NOT NULL,
+                PRIMARY KEY (op_code, filter_key, bgn_dt)
+            );
+
+            CREATE TABLE IF NOT EXISTS coverage_rows (
+                op_code TEXT NOT NULL,
+                filter_key TEXT NOT NULL,
+                row_key TEXT NOT NULL,
+                row_dt TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (op_code, filter_key, row_key)
+            );
+            CREATE INDEX IF NOT EXISTS idx_coverage_rows_dt ON coverage_rows (op_code, filter_key, row_dt);
+            """
+        )
+
+    def _intervals(self, op_code, fkey, bgn_dt, end_dt):
+        return self.conn.execute(
+            "SELECT bgn_dt, end_dt FROM coverage WHERE op_code = ? AND filter_key = ? AND end_dt >= ? AND bgn_dt <= ? "
+            "ORDER BY bgn_dt",
+            (op_code, fkey, bgn_dt, end_dt)
+        ).fetchall()
+
+    def split(self, op_code, fkey, bgn_dt, end_dt):
+        """요청 기간 -> (수집된 부분 목록, 빈 부분 목록), 각 부분은 (YYYYMMDDHHMM, YYYYMMDDHHMM)"""
+        covered, gaps = [], []
+        cursor = bgn_dt
+        for interval in self._intervals(op_code, fkey, bgn_dt, end_dt):
+            if interval['bgn_dt'] > cursor:
+                gaps.append((cursor, _shift(interval['bgn_dt'], -1)))
+            covered.append((max(cursor, interval['bgn_dt']), min(end_dt, interval['end_dt'])))
+            cursor = _shift(interval['end_dt'], 1)
+            if cursor > end_dt:
+                break
+        if cursor <= end_dt:
+            gaps.append((cursor, end_dt))
+        return covered, gaps
+
+    def add(self, op_code, fkey, bgn_dt, end_dt):
+        """수집을 마친 기간 기록 (맞닿거나 겹치는 기존 구간과 합침)"""
+        with self.conn:
+            neighbors = self._intervals(op_code, fkey, _shift(bgn_dt, -1), _shift(end_dt, 1))
+            if neighbors:
+                bgn_dt = min(bgn_dt, neighbors[0]['bgn_dt'])
+                end_dt = max(end_dt, max(n['end_dt'] for n in neighbors))
+                self.conn.executemany(
+                    "DELETE FROM coverage WHERE op_code = ? AND filter_key = ? AND bgn_dt = ?",
+                    [(op_code, fkey, n['bgn_dt']) for n in neighbors]
+                )
+            self.conn.execute(
+                "INSERT INTO coverage (op_code, filter_key, bgn_dt, end_dt) VALUES (?, ?, ?, ?)",
+                (op_code, fkey, bgn_dt, end_dt)
+            )
+
+    def store_rows(self, op_code, fkey, rows, key_cols=('bidNtceNo', 'bidNtceOrd'), date_field='bidNtceDt'):
+        """조회 결과 행 보관 (같은 키는 최신 수집 내용으로 덮어씀)"""
+        params = [
+            (op_code, fkey, '|'.join(str(row.get(k, '')) for k in key_cols),
+             normalize_dt(row.get(date_field, '')), json.dumps(as_dict(row), ensure_ascii=False))
+            for row in rows
+        ]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO coverage_rows (op_code, filter_key, row_key, row_dt, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                params
+            )
+
+    def covered_rows(self, op_code, fkey, bgn_dt, end_dt):
+        """보관된 행 중 기간 내 행 목록"""
+        cursor = self.conn.execute(
+            "SELECT data FROM coverage_rows WHERE op_code = ? AND filter_key = ? AND row_dt BETWEEN ? AND ? "
+            "ORDER BY row_dt",
+            (op_code, fkey, bgn_dt, end_dt)
+        )
+        return [json.loads(r['data']) for r in cursor]
+
+    def fetch(self, op_code, fkey, bgn_dt, end_dt, fetch_range, **store_kwargs):
+        """
+        기간 조회 -> 행 목록 (수집된 부분은 보관된 행, 빈 부분만 fetch_range(bgn, end) -> (행 목록, 성공 여부)로 수집)
+        빈 부분은 오류 없이 끝났을 때만 수집 완료로 기록
+        """
+        covered, gaps = self.split(op_code, fkey, bgn_dt, end_dt)
+        rows = []
+        for part_start, part_end in covered:
+            rows.extend(self.covered_rows(op_code, fkey, part_start, part_end))
+
+        for gap_start, gap_end in gaps:
+            gap_rows, ok = fetch_range(gap_start, gap_end)
+            self.store_rows(op_code, fkey, gap_rows, **store_kwargs)
+            if ok:
+                self.add(op_code, fkey, gap_start, gap_end)
+            rows.extend(gap_rows)
+        return rows
@@ -0,0 +1,194 @@
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+
+import g2b_db
+from g2b_export import write_rows
+from g2b_trace import run_main
+from g2b_windows import normalize_dt
+from institution_index import InstitutionIndex
+
+# 마감 항목 (원본 태그 -> 표시 이름)
+NOTICE_DEADLINES = {
+    'bidQlfctRgstDt': '입찰참가자격등록마감',
+    'bidWgrnteeRcptClseDt': '입찰보증서접수마감',
+    'bidClseDt': '입찰마감',
+    'opengDt': '개찰'
+}
+SPEC_DEADLINES = {
+    'opninRgstClseDt': '의견등록마감'
+}
+DEADLINE_NAMES = dict(NOTICE_DEADLINES, **SPEC_DEADLINES)
+
+# 조회 결과 출력 컬럼
+RESULT_COLUMNS = {
+    'deadline': '마감일시',
+    'deadlineType': '마감구분',
+    'kind': '구분',
+    'key': '공고번호/사전규격번호',
+    'ord': '차수',
+    'bizType': '업무구분',
+    'title': '공고명/품명',
+    'instt': '기관'
+}
+
+
+class DeadlineIndex:
+    """
+    수집된 입찰공고/사전규격의 마감일시를 시간순으로 보관하는 로컬 인덱스
+    - 입찰공고는 로컬 기관 인덱스(notices 테이블)에서 새로 적재/갱신된 행만 반영, 사전규격은 add_specs로 반영
+    - 공고번호별로 가장 높은 차수(정정공고)의 마감일시만 유지하고, 취소 공고는 마감 목록에서 제외
+    - 행에 없는 마감 항목(출력 항목을 줄여 수집한 경우)은 기존 값을 그대로 둠
+    """
+
+    def __init__(self, db_path=None):
+        # 기관 인덱스와 같은 DB 연결 사용 (notices 테이블 생성 보장)
+        self.conn = InstitutionIndex(db_path).conn
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS deadline_docs (
+                doc_key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                doc_ord TEXT NOT NULL DEFAULT '',
+                biz_type TEXT NOT NULL DEFAULT '',
+                title TEXT NOT NULL DEFAULT '',
+                instt TEXT NOT NULL DEFAULT ''
+            );
+
+            CREATE TABLE IF NOT EXISTS deadlines (
+                doc_key TEXT NOT NULL,
+                deadline_type TEXT NOT NULL,
+                deadline_dt TEXT NOT NULL,
+                PRIMARY KEY (doc_key, deadline_type)
+            );
+            CREATE INDEX IF NOT EXISTS idx_deadlines_dt ON deadlines (deadline_dt);
+            """
+        )
+
+    def _upsert(self, doc_key, kind, doc_ord, biz_type, title, instt, row, deadline_fields, cancelled=False):
+        stored = self.conn.execute("SELECT doc_ord FROM deadline_docs WHERE doc_key = ?", (doc_key,)).fetchone()
+        if stored and stored['doc_ord'] > doc_ord:
+            return  # 이미 더 높은 차수(정정공고)가 반영됨
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO deadline_docs (doc_key, kind, doc_ord, biz_type, title, instt) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (doc_key, kind, doc_ord, biz_type, title, instt)
+        )
+        if cancelled or (stored and stored['doc_ord'] != doc_ord):
+            # 새 차수의 마감일시로 전부 교체 (새 차수에서 빠진 마감 항목이 남지 않도록)
+            self.conn.execute("DELETE FROM deadlines WHERE doc_key = ?", (doc_key,))
+        if cancelled:
+            return
+
+        for field in deadline_fields:
+            if field not in row:
+                continue
+            deadline_dt = normalize_dt(row[field])
+            if deadline_dt:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO deadlines (doc_key, deadline_type, deadline_dt) VALUES (?, ?, ?)",
+                    (doc_key, field, deadline_dt)
+                )
+            else:
+                self.conn.execute("DELETE FROM deadlines WHERE doc_key = ? AND deadline_type = ?", (doc_key, field))
+
+    def sync_notices(self):
+        """로컬 기관 인덱스(notices)에 새로 적재/갱신된 공고만 마감 인덱스에 반영"""
+        last_rowid = int(g2b_db.get_sync_state(self.conn, 'deadline', 'notices') or 0)
+        cursor = self.conn.execute(
+            "SELECT rowid, biz_type, data FROM notices WHERE rowid > ? ORDER BY rowid", (last_rowid,)
+        )
+
+        count = 0
+        with self.conn:
+            for r in cursor.fetchall():
+                row = json.loads(r['data'])
+                self._upsert(
+                    f"notice:{row.get('bidNtceNo', '')}", 'notice', row.get('bidNtceOrd', ''),
+                    row.get('bizType', r['biz_type']), row.get('bidNtceNm', ''), row.get('ntceInsttNm', ''),
+                    row, NOTICE_DEADLINES, cancelled='취소' in row.get('ntceKindNm', '')
+                )
+                last_rowid = r['rowid']
+                count += 1
+            g2b_db.set_sync_state(self.conn, 'deadline', 'notices', f"{last_rowid:012d}")
+        return count
+
+    def add_specs(self, rows):
+        """사전규격 수집 결과(PRE2.py 행) 반영 (같은 사전규격번호는 나중에 수집한 내용으로 교체)"""
+        with self.conn:
+            for row in rows:
+                if not row.get('bfSpecRgstNo'):
+                    continue
+                self._upsert(
+                    f"spec:{row['bfSpecRgstNo']}", 'spec', '', row.get('bsnsDivNm', ''),
+                    row.get('prdctClsfcNoNm', ''), row.get('orderInsttNm', ''), row, SPEC_DEADLINES
+                )
+        return len(rows)
+
+    def upcoming(self, hours=72, start=None, types=None, kind=None):
+        """start(기본: 현재)부터 hours시간 안에 도래하는 마감 목록 (마감일시 순)"""
+        start = start or datetime.now()
+        bgn_dt = start.strftime('%Y%m%d%H%M')
+        end_dt = (start + timedelta(hours=hours)).strftime('%Y%m%d%H%M')
+
+        sql = (
+            "SELECT l.deadline_dt, l.deadline_type, d.doc_key, d.kind, d.doc_ord, d.biz_type, d.title, d.instt "
+            "FROM deadlines l JOIN deadline_docs d ON d.doc_key = l.doc_key "
+            "WHERE l.deadline_dt BETWEEN ? AND ?"
+        )
+        params = [bgn_dt, end_dt]
+        if types:
+            sql += f" AND l.deadline_type IN ({','.join('?' * len(types))})"
+            params += list(types)
+        if kind:
+            sql += " AND d.kind = ?"
+            params.append(kind)
+        sql += " ORDER BY l.deadline_dt"
+
+        return [
+            {
+                'deadline': r['deadline_dt'],
+                'deadlineType': DEADLINE_NAMES.get(r['deadline_type'], r['deadline_type']),
+                'kind': '사전규격' if r['kind'] == 'spec' else '입찰공고',
+                'key': r['doc_key'].split(':', 1)[1],
+                'ord': r['doc_ord'],
+                'bizType': r['biz_type'],
+                'title': r['title'],
+                'instt': r['instt']
+            }
+            for r in self.conn.execute(sql, params)
+        ]
+
+
+def main():
+    hours = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else 72
+    export = '저장' in sys.argv[1:]
+
+    index = DeadlineIndex()
+    synced = index.sync_notices()
+    if synced:
+        print(f"마감 인덱스 갱신: {synced}건")
+
+    started = time.perf_counter()
+    rows = index.upcoming(hours)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"=== 앞으로 {hours}시간 안의 마감: {len(rows)}건 ({elapsed_ms:.1f}ms) ===")
+    for row in rows[:50]:
+        dt = row['deadline']
+        print(f"  {dt[4:6]}/{dt[6:8]} {dt[8:10]}:{dt[10:12]} [{row['deadlineType']}] {row['title']} ({row['instt']})")
+    if len(rows) > 50:
+        print(f"  ... 외 {len(rows) - 50}건")
+
+    if export and rows:
+        filename = f"마감임박_{hours}시간_{datetime.now().strftime('%Y-%m-%d')}.xlsx"
+        try:
+            write_rows(rows, RESULT_COLUMNS, filename)
+            print(f"[성공] 엑셀 저장 완료: {filename}")
+        except PermissionError:
+            print(f"[오류] '{filename}' 파일이 이미 열려있습니다. 파일을 닫고 다시 실행해주세요.")
+
+
+if __name__ == "__main__":
+    run_main(main)
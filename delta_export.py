@@ -0,0 +1,116 @@
+import hashlib
+import json
+from datetime import datetime
+
+import g2b_db
+from g2b_export import write_rows
+
+# 변경분 엑셀의 앞/뒤에 붙는 컬럼
+CHANGE_TYPE_COLUMN = {'changeType': '구분'}
+CHANGE_INFO_COLUMNS = {'chgDt': '변경일시', 'chgNtceRsn': '변경사유'}
+
+
+def content_hash(row):
+    """행 전체 내용의 해시 (컬럼 순서와 무관)"""
+    payload = json.dumps({k: v for k, v in row.items() if k != 'changeType'}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class ChangeTracker:
+    """
+    공고별 내용 해시를 로컬 DB에 보관하여 이전 실행 대비 신규/변경/동일을 구분
+    - 키: 입찰공고는 (공고번호, 차수), 사전규격은 사전규격등록번호
+    - 같은 공고번호의 새 차수(정정공고)는 '변경'으로 분류
+    - 해시는 commit()을 호출해야 반영되므로, 저장에 실패하면 다음 실행에서 같은 변경분이 다시 나옴
+    """
+
+    def __init__(self, kind, key_cols, db_path=None):
+        self.kind = kind
+        self.key_cols = key_cols
+        self.conn = g2b_db.connect(db_path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS content_hashes ("
+            " kind TEXT NOT NULL, row_key TEXT NOT NULL, parent_key TEXT NOT NULL, content_hash TEXT NOT NULL,"
+            " first_seen TEXT NOT NULL, last_changed TEXT NOT NULL,"
+            " PRIMARY KEY (kind, row_key))"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_content_hashes_parent ON content_hashes (kind, parent_key)"
+        )
+        self._pending = []
+
+    def classify(self, rows):
+        """rows -> (신규/변경 행 목록(changeType 추가), 건수 dict)"""
+        now = datetime.now().strftime('%Y%m%d%H%M%S')
+        delta = []
+        counts = {'신규': 0, '변경': 0, '동일': 0}
+
+        for row in rows:
+            keys = [str(row.get(k, '')) for k in self.key_cols]
+            row_key, parent_key = '|'.join(keys), keys[0]
+            digest = content_hash(row)
+
+            stored = self.conn.execute(
+                "SELECT content_hash FROM content_hashes WHERE kind = ? AND row_key = ?", (self.kind, row_key)
+            ).fetchone()
+            if stored and stored['content_hash'] == digest:
+                counts['동일'] += 1
+                continue
+
+            if stored is None and len(self.key_cols) > 1:
+                # 처음 보는 차수라도 같은 공고번호가 있으면 정정공고로 보고 '변경'
+                stored = self.conn.execute(
+                    "SELECT 1 FROM content_hashes WHERE kind = ? AND parent_key = ? LIMIT 1", (self.kind, parent_key)
+                ).fetchone()
+
+            change_type = '변경' if stored else '신규'
+            counts[change_type] += 1
+            delta.append(dict(row, changeType=change_type))
+            self._pending.append((self.kind, row_key, parent_key, digest, now, now))
+
+        return delta, counts
+
+    def commit(self):
+        """분류한 행의 해시를 반영 (다음 실행부터 '동일'로 분류)"""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO content_hashes (kind, row_key, parent_key, content_hash, first_seen, last_changed) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(kind, row_key) DO UPDATE SET "
+                "content_hash = excluded.content_hash, last_changed = excluded.last_changed",
+                self._pending
+            )
+        self._pending = []
+
+
+def export_delta(kind, rows, key_cols, col_map, filename):
+    """
+    이전 실행 이후 신규/변경된 행만 저장 (전체 결과 파일은 만들지 않음)
+    저장에 성공했을 때만 해시를 반영
+    """
+    tracker = ChangeTracker(kind, key_cols)
+    delta, counts = tracker.classify(rows)
+    print(f"[변경 감지] 신규 {counts['신규']}건 / 변경 {counts['변경']}건 / 동일 {counts['동일']}건")
+
+    if not delta:
+        tracker.commit()
+        print("이전 실행 이후 새로 올라오거나 변경된 항목이 없습니다.")
+        return 0
+
+    delta_map = dict(CHANGE_TYPE_COLUMN, **col_map)
+    for key, name in CHANGE_INFO_COLUMNS.items():
+        if key not in delta_map and any(key in row for row in delta):
+            delta_map[key] = name
+
+    try:
+        write_rows(delta, delta_map, filename)
+    except PermissionError:
+        print(f"\n[오류] '{filename}' 파일이 이미 열려있습니다. 파일을 닫고 다시 실행해주세요.")
+        return 0
+    except Exception as e:
+        print(f"\n[오류] 엑셀 저장 중 문제가 발생했습니다: {e}")
+        return 0
+
+    tracker.commit()
+    print(f"\n[성공] 변경분 저장 완료: {filename} ({len(delta)}건)")
+    return len(delta)
@@ -0,0 +1,322 @@
+import csv
+import hashlib
+import os
+import re
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import requests
+
+import g2b_db
+from g2b_trace import run_main, span
+
+# === [설정] 첨부 문서 일괄 다운로드 ===
+DOC_DIR = "g2b_docs"          # objects/ (내용 해시별 파일), partial/ (받는 중인 파일)
+DOWNLOAD_WORKERS = 4          # 동시에 받는 파일 수 (스레드마다 연결을 유지하여 재사용)
+DOWNLOAD_RETRIES = 2          # 끊긴 파일은 받은 곳부터 이어서 다시 요청 (Range)
+TIMEOUT = 60
+CHUNK_SIZE = 256 * 1024
+
+# 문서 URL 항목 (원본 태그명 -> 엑셀 컬럼명)
+URL_FIELDS = {
+    'stdNtceDocUrl': '표준공고서URL',
+    'specDocFileUrl1': '규격문서파일URL1',
+    'specDocFileUrl2': '규격문서파일URL2',
+    'specDocFileUrl3': '규격문서파일URL3',
+    'specDocFileUrl4': '규격문서파일URL4',
+    'specDocFileUrl5': '규격문서파일URL5'
+}
+# 문서가 속한 공고/사전규격 번호 항목 (앞에 있는 값부터 사용)
+KEY_FIELDS = {'bidNtceNo': '입찰공고번호', 'bfSpecRgstNo': '사전규격등록번호'}
+
+
+def doc_key(row):
+    for field in KEY_FIELDS:
+        if row.get(field):
+            return row[field]
+    return ''
+
+
+def iter_jobs(rows):
+    """행 목록 -> (문서 번호, 항목, URL) (http(s) URL만)"""
+    for row in rows:
+        key = doc_key(row)
+        for field in URL_FIELDS:
+            url = (row.get(field) or '').strip()
+            if url.startswith(('http://', 'https://')):
+                yield key, field, url
+
+
+def tee_jobs(rows, jobs):
+    """행을 그대로 흘려보내면서 문서 URL을 jobs 목록에 모음 (스트리밍 저장 경로용)"""
+    for row in rows:
+        jobs.extend(iter_jobs([row]))
+        yield row
+
+
+def _filename(response, url):
+    """Content-Disposition(없으면 URL 경로)에서 원본 파일명 추출"""
+    disposition = response.headers.get('Content-Disposition', '')
+    match = re.search(r"filename\*\s*=\s*[^']*'[^']*'([^;]+)", disposition)
+    if match:
+        return urllib.parse.unquote(match.group(1).strip())
+    match = re.search(r'filename\s*=\s*"?([^";]+)"?', disposition)
+    if match:
+        name = match.group(1).strip()
+        try:  # 국내 서버는 EUC-KR 파일명을 그대로 보내는 경우가 있음 (requests는 latin-1로 해석)
+            name = name.encode('latin-1').decode('euc-kr')
+        except UnicodeError:
+            pass
+        return urllib.parse.unquote(name)
+    return urllib.parse.unquote(os.path.basename(urllib.parse.urlparse(url).path))
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DocStore:
+    """
+    첨부 문서 보관소
+    - 파일은 내용의 SHA-256으로 objects/<앞 2자리>/<해시><확장자>에 저장 (같은 내용은 URL이 달라도 한 번만 보관)
+    - URL -> 파일 경로, 공고/사전규격 번호 -> URL 목록은 로컬 인덱스 DB(g2b_db)에 기록
+    - 이미 받은 URL은 다시 받지 않고, 끊긴 파일은 partial/에 남겨 다음 시도에서 이어 받음
+    """
+
+    def __init__(self, doc_dir=None, db_path=None):
+        self.doc_dir = doc_dir or DOC_DIR
+        for sub in ('objects', 'partial'):
+            os.makedirs(os.path.join(self.doc_dir, sub), exist_ok=True)
+        self.conn = g2b_db.connect(db_path)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS doc_files (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                filename TEXT NOT NULL DEFAULT '',
+                path TEXT NOT NULL,
+                fetched_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_doc_files_sha ON doc_files (sha256);
+
+            CREATE TABLE IF NOT EXISTS doc_refs (
+                doc_key TEXT NOT NULL,
+                field TEXT NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (doc_key, field)
+            );
+            """
+        )
+        self._local = threading.local()
+        self._finalize_lock = threading.Lock()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    def fetched(self, url):
+        """이미 받아서 파일이 남아 있는 URL이면 저장 경로, 아니면 None"""
+        r = self.conn.execute("SELECT path FROM doc_files WHERE url = ?", (url,)).fetchone()
+        if r and os.path.exists(os.path.join(self.doc_dir, r['path'])):
+            return r['path']
+        return None
+
+    def _partial_path(self, url):
+        return os.path.join(self.doc_dir, 'partial', hashlib.sha1(url.encode('utf-8')).hexdigest() + '.part')
+
+    def _finalize(self, part_path, filename):
+        """받은 파일을 내용 해시 경로로 옮김 (같은 내용이 이미 있으면 받은 파일은 삭제) -> (해시, 크기, 상대 경로)"""
+        sha = _file_sha256(part_path)
+        size = os.path.getsize(part_path)
+        shard = os.path.join(self.doc_dir, 'objects', sha[:2])
+        with self._finalize_lock:
+            os.makedirs(shard, exist_ok=True)
+            existing = [name for name in os.listdir(shard) if name.startswith(sha)]
+            if existing:
+                os.remove(part_path)
+                name = existing[0]
+            else:
+                name = sha + os.path.splitext(filename)[1].lower()[:10]
+                os.replace(part_path, os.path.join(shard, name))
+        return sha, size, os.path.join('objects', sha[:2], name)
+
+    def _fetch_once(self, url, part_path):
+        """
+        1회 요청: partial 파일이 있으면 Range로 이어 받음 -> (완료 여부, 원본 파일명, 메시지)
+        서버가 Range를 무시하면(200) 처음부터 다시 받고, 416이면 이미 끝까지 받은 것으로 봄
+        """
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+        with span('download', cat='io', resumed=offset) as s:
+            response = self._session().get(url, headers=headers, stream=True, timeout=TIMEOUT)
+            try:
+                s.set(status=response.status_code)
+                if response.status_code == 416 and offset:
+                    return True, '', ''
+                if response.status_code == 206 and offset and \
+                        response.headers.get('Content-Range', '').startswith(f'bytes {offset}-'):
+                    mode = 'ab'
+                elif response.status_code == 200:
+                    mode, offset = 'wb', 0
+                elif response.status_code == 206:
+                    os.remove(part_path)  # 요청과 다른 구간이 왔으면 다음 시도에서 처음부터 받음
+                    return False, '', "Range 응답 불일치"
+                else:
+                    return False, '', f"HTTP {response.status_code}"
+
+                expected = response.headers.get('Content-Length')
+                written = 0
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+                        written += len(chunk)
+                s.set(bytes=written)
+                if expected is not None and written < int(expected):
+                    return False, '', f"{offset + written}바이트에서 끊김"
+                return True, _filename(response, url), ''
+            finally:
+                response.close()
+
+    def download(self, url):
+        """URL 1개 다운로드 (작업 스레드에서 실행) -> 결과 dict (ok, url, sha256, size, filename, path, message)"""
+        part_path = self._partial_path(url)
+        message = ''
+        for attempt in range(DOWNLOAD_RETRIES + 1):
+            try:
+                ok, filename, message = self._fetch_once(url, part_path)
+            except Exception as e:
+                ok, filename, message = False, '', str(e)
+            if ok:
+                sha, size, path = self._finalize(part_path, filename)
+                return {'ok': True, 'url': url, 'sha256': sha, 'size': size, 'filename': filename, 'path': path}
+            if message.startswith('HTTP 4'):
+                break  # 없는 파일/권한 오류는 다시 요청해도 같음
+            time.sleep(1 + attempt)
+        return {'ok': False, 'url': url, 'message': message}
+
+    def _record(self, result):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO doc_files (url, sha256, size, filename, path, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (result['url'], result['sha256'], result['size'], result['filename'], result['path'],
+             datetime.now().strftime('%Y%m%d%H%M%S'))
+        )
+
+    def download_all(self, jobs):
+        """
+        (문서 번호, 항목, URL) 목록을 동시에 다운로드 -> 통계 dict
+        URL별로 한 번만 받고, DB 기록은 메인 스레드에서만 함
+        """
+        jobs = list(jobs)
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO doc_refs (doc_key, field, url) VALUES (?, ?, ?)",
+                [job for job in jobs if job[0]]
+            )
+
+        stats = {'urls': 0, 'skipped': 0, 'downloaded': 0, 'duplicates': 0, 'failed': 0, 'bytes': 0}
+        pending = []
+        for url in dict.fromkeys(url for _, _, url in jobs):
+            stats['urls'] += 1
+            if self.fetched(url):
+                stats['skipped'] += 1
+            else:
+                pending.append(url)
+
+        if pending:
+            print(f"[문서] {len(pending)}개 다운로드 시작 (이미 받은 파일 {stats['skipped']}개 제외)")
+        known = {r['sha256'] for r in self.conn.execute("SELECT DISTINCT sha256 FROM doc_files")}
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as pool:
+            futures = [pool.submit(self.download, url) for url in pending]
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                if not result['ok']:
+                    stats['failed'] += 1
+                    print(f"  [실패] {result['url']}: {result['message']}")
+                    continue
+                if result['sha256'] in known:
+                    stats['duplicates'] += 1
+                else:
+                    known.add(result['sha256'])
+                    stats['downloaded'] += 1
+                    stats['bytes'] += result['size']
+                with self.conn:
+                    self._record(result)
+                if done % 50 == 0:
+                    print(f"  {done}/{len(pending)}개 완료")
+
+        print(f"[문서] URL {stats['urls']}개: 새 파일 {stats['downloaded']}개 ({stats['bytes'] / 1024 / 1024:.1f}MB), "
+              f"같은 내용 {stats['duplicates']}개, 이미 받음 {stats['skipped']}개, 실패 {stats['failed']}개 "
+              f"-> {os.path.join(self.doc_dir, 'objects')}")
+        return stats
+
+
+def download_rows(rows):
+    """수집 결과 행의 문서 URL을 모두 받음 (PRE2.py / pre.py / all_88.py에서 사용)"""
+    return DocStore().download_all(iter_jobs(rows))
+
+
+def read_rows(path):
+    """저장된 결과 파일(.xlsx/.csv)의 행 목록 (한글/원본 컬럼명 모두 허용)"""
+    reverse = {ko: key for key, ko in dict(URL_FIELDS, **KEY_FIELDS).items()}
+    if os.path.splitext(path)[1].lower() == '.csv':
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            records = list(csv.reader(f))
+    else:
+        from openpyxl import load_workbook  # 엑셀 읽기에만 필요하므로 사용할 때 불러옴
+        wb = load_workbook(path, read_only=True)
+        records = [['' if v is None else str(v) for v in values] for values in wb.active.iter_rows(values_only=True)]
+        wb.close()
+    if not records:
+        return []
+    header = [reverse.get(name, name) for name in records[0]]
+    return [dict(zip(header, values)) for values in records[1:]]
+
+
+def load_notice_rows(bgn_dt, end_dt):
+    """로컬 기관 인덱스에 적재된 기간 내 입찰공고 행"""
+    import json
+    from institution_index import InstitutionIndex
+
+    cursor = InstitutionIndex().conn.execute(
+        "SELECT data FROM notices WHERE bid_ntce_dt BETWEEN ? AND ?", (bgn_dt, end_dt)
+    )
+    return [json.loads(r['data']) for r in cursor]
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("사용법:")
+        print("  python doc_download.py 결과.xlsx [결과2.csv ...]       # 저장한 결과 파일의 문서 URL 다운로드")
+        print("  python doc_download.py 2025-01-01 2025-01-31           # 로컬 기관 인덱스의 기간 내 공고 표준공고서")
+        return
+
+    if len(sys.argv) >= 3 and re.fullmatch(r'\d{4}-\d{2}-\d{2}', sys.argv[1]):
+        bgn_dt = datetime.strptime(sys.argv[1], "%Y-%m-%d").strftime('%Y%m%d0000')
+        end_dt = datetime.strptime(sys.argv[2], "%Y-%m-%d").strftime('%Y%m%d2359')
+        rows = load_notice_rows(bgn_dt, end_dt)
+    else:
+        rows = []
+        for path in sys.argv[1:]:
+            rows.extend(read_rows(path))
+
+    jobs = list(iter_jobs(rows))
+    if not jobs:
+        print("문서 URL이 있는 행이 없습니다.")
+        return
+    DocStore().download_all(jobs)
+
+
+if __name__ == "__main__":
+    run_main(main)
@@ -0,0 +1,116 @@
+import g2b_db
+
+
+class EmailIndex:
+    """
+    담당자 이메일 디렉터리 (이메일 -> 담당자명/전화번호/기관/최초·최근 공고일시/공고 수)
+    매 실행마다 새로 수집된 구간의 행만 반영하여 누적 관리
+    """
+
+    def __init__(self, db_path=None):
+        self.conn = g2b_db.connect(db_path)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS email_directory (
+                email TEXT PRIMARY KEY,
+                officer_nm TEXT,
+                tel_no TEXT,
+                instt_nm TEXT,
+                biz_type TEXT,
+                first_seen TEXT,
+                last_seen TEXT,
+                notice_count INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS email_notices (
+                email TEXT NOT NULL,
+                bid_ntce_no TEXT NOT NULL,
+                PRIMARY KEY (email, bid_ntce_no)
+            );
+            """
+        )
+
+    def update(self, rows):
+        """
+        수집된 행(GetMail 형식: '이메일', '담당자명', '전화번호', '공고기관', '공고일시' ...)을 인덱스에 반영
+        같은 공고가 다시 들어와도 공고 수는 한 번만 증가, 담당자 정보는 가장 최근 공고 기준으로 갱신
+        """
+        added = 0
+        with self.conn:
+            for row in rows:
+                email = row['이메일'].strip().lower()
+                notice_dt = row.get('공고일시', '')
+
+                cur = self.conn.execute(
+                    "INSERT OR IGNORE INTO email_notices (email, bid_ntce_no) VALUES (?, ?)",
+                    (email, row.get('공고번호', ''))
+                )
+                is_new_notice = cur.rowcount
+
+                existing = self.conn.execute(
+                    "SELECT first_seen, last_seen FROM email_directory WHERE email = ?", (email,)
+                ).fetchone()
+
+                if existing is None:
+                    self.conn.execute(
+                        "INSERT INTO email_directory "
+                        "(email, officer_nm, tel_no, instt_nm, biz_type, first_seen, last_seen, notice_count) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (email, row.get('담당자명', ''), row.get('전화번호', ''), row.get('공고기관', ''),
+                         row.get('분야', ''), notice_dt, notice_dt, is_new_notice)
+                    )
+                    added += 1
+                    continue
+
+                if notice_dt >= (existing['last_seen'] or ''):
+                    # 더 최근 공고의 담당자 정보로 갱신 (빈 값은 기존 값 유지)
+                    self.conn.execute(
+                        "UPDATE email_directory SET "
+                        " officer_nm = COALESCE(NULLIF(?, ''), officer_nm),"
+                        " tel_no = COALESCE(NULLIF(?, ''), tel_no),"
+                        " instt_nm = COALESCE(NULLIF(?, ''), instt_nm),"
+                        " biz_type = COALESCE(NULLIF(?, ''), biz_type),"
+                        " last_seen = ? "
+                        "WHERE email = ?",
+                        (row.get('담당자명', ''), row.get('전화번호', ''), row.get('공고기관', ''),
+                         row.get('분야', ''), notice_dt, email)
+                    )
+                if notice_dt and notice_dt < (existing['first_seen'] or notice_dt):
+                    self.conn.execute(
+                        "UPDATE email_directory SET first_seen = ? WHERE email = ?", (notice_dt, email)
+                    )
+                if is_new_notice:
+                    self.conn.execute(
+                        "UPDATE email_directory SET notice_count = notice_count + 1 WHERE email = ?", (email,)
+                    )
+        return added
+
+    def get_last_synced(self, operation_code):
+        """오퍼레이션별 마지막 수집 완료 시점 (YYYYMMDDHHMM), 최초 실행이면 None"""
+        return g2b_db.get_sync_state(self.conn, 'email', operation_code)
+
+    def mark_synced(self, operation_code, end_dt):
+        with self.conn:
+            g2b_db.set_sync_state(self.conn, 'email', operation_code, end_dt)
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM email_directory").fetchone()[0]
+
+    def export_rows(self):
+        """엑셀 저장용 행 목록 (최근 공고일시 순)"""
+        cursor = self.conn.execute(
+            "SELECT biz_type, instt_nm, officer_nm, tel_no, email, notice_count, first_seen, last_seen "
+            "FROM email_directory ORDER BY last_seen DESC"
+        )
+        return [
+            {
+                '분야': r['biz_type'],
+                '공고기관': r['instt_nm'],
+                '담당자명': r['officer_nm'],
+                '전화번호': r['tel_no'],
+                '이메일': r['email'],
+                '공고수': r['notice_count'],
+                '최초공고일시': r['first_seen'],
+                '최근공고일시': r['last_seen']
+            }
+            for r in cursor
+        ]
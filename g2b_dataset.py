@@ -0,0 +1,340 @@
+import os
+import sys
+from datetime import datetime
+
+from g2b_trace import run_main
+from g2b_windows import normalize_dt
+from institution_index import like_contains
+
+# === [설정] 분석용 데이터셋 ===
+# 'parquet': 업무구분/공고월 파티션 Parquet 데이터셋 (pyarrow 필요)
+# 'duckdb' : DuckDB 파일 하나에 테이블로 저장 (duckdb, pyarrow 필요)
+DATASET_FORMAT = 'parquet'
+DATASET_DIR = "g2b_dataset"
+DUCKDB_PATH = "g2b_dataset.duckdb"
+BATCH_SIZE = 5000   # 이 건수만큼 모일 때마다 기록
+
+# 데이터셋 종류별 키 / 파티션 컬럼 (업무구분, 기준일시) / 기관명 컬럼
+DATASETS = {
+    'notices': {
+        'keys': ('bidNtceNo', 'bidNtceOrd'),
+        'biz': 'bizType',
+        'date': 'bidNtceDt',
+        'instt': ('ntceInsttNm', 'dminsttNm')
+    },
+    'prespecs': {
+        'keys': ('bfSpecRgstNo',),
+        'biz': 'bsnsDivNm',
+        'date': 'rcptDt',
+        'instt': ('orderInsttNm', 'rlDminsttNm')
+    }
+}
+
+# 문자열 대신 숫자로 저장할 항목 (그 외 *Dt 항목은 일시, 나머지는 문자열)
+INT_FIELDS = {
+    'bdgtAmt', 'asignBdgtAmt', 'presmptPrce', 'govsplyAmt', 'mainCnsttyCnstwkPrearngAmt',
+    'contrctrcnstrtnGovsplyMtrlAmt', 'govcnstrtnGovsplyMtrlAmt', 'bidPrtcptFee', 'mainCnsttyPresmptPrce',
+    'VAT', 'indutyVAT', 'totPrdprcNum', 'drwtPrdprcNum', 'cmmnSpldmdCnum'
+}
+FLOAT_FIELDS = {'sucsfbidLwltRate', 'rgnDutyJntcontrctRt', 'indstrytyEvlRt'}
+
+
+def column_type(name):
+    if name in INT_FIELDS:
+        return 'int'
+    if name in FLOAT_FIELDS:
+        return 'float'
+    if name.endswith('Dt'):
+        return 'timestamp'
+    return 'string'
+
+
+def to_typed(name, value):
+    """API 문자열 값을 컬럼 타입으로 변환 (빈 값/변환 불가 값은 None)"""
+    kind = column_type(name)
+    if value is None or kind == 'string':
+        return value
+    if not isinstance(value, str):
+        return value
+
+    text = value.strip().replace(',', '')
+    if not text:
+        return None
+    try:
+        if kind == 'int':
+            return int(float(text))
+        if kind == 'float':
+            return float(text)
+        return datetime.strptime(normalize_dt(text), '%Y%m%d%H%M')
+    except ValueError:
+        return None
+
+
+def typed_row(kind, row):
+    """행을 타입 변환하고 파티션용 month(YYYYMM, 일시가 없으면 0) 추가"""
+    typed = {key: to_typed(key, value) for key, value in row.items()}
+    date = typed.get(DATASETS[kind]['date'])
+    typed['month'] = date.year * 100 + date.month if isinstance(date, datetime) else 0
+    return typed
+
+
+def _arrow_type(name):
+    import pyarrow as pa
+
+    if name == 'month':
+        return pa.int32()
+    return {
+        'int': pa.int64(),
+        'float': pa.float64(),
+        'timestamp': pa.timestamp('s'),
+        'string': pa.string()
+    }[column_type(name)]
+
+
+def _sql_type(name):
+    if name == 'month':
+        return 'INTEGER'
+    return {'int': 'BIGINT', 'float': 'DOUBLE', 'timestamp': 'TIMESTAMP', 'string': 'VARCHAR'}[column_type(name)]
+
+
+class ParquetDataset:
+    """
+    {DATASET_DIR}/{종류}/{업무구분 컬럼}={값}/month={YYYYMM}/data.parquet 형태의 hive 파티션 데이터셋
+    - 새 행은 해당 파티션 파일과 합쳐 키 기준으로 중복 제거 후 다시 기록 (기존 행에 없는 항목만 보존)
+    - 파티션 안에서는 기준일시 순으로 정렬하여 행 그룹 통계로 범위 조건을 걸러낼 수 있게 함
+    """
+
+    def __init__(self, kind, columns, base_dir=None):
+        self.kind = kind
+        self.spec = DATASETS[kind]
+        self.root = os.path.join(base_dir or DATASET_DIR, kind)
+        # 파티션 컬럼(업무구분)은 경로에만 기록
+        self.columns = [c for c in dict.fromkeys(list(columns) + ['month']) if c != self.spec['biz']]
+
+    def _partition_path(self, biz, month):
+        return os.path.join(self.root, f"{self.spec['biz']}={biz or '미상'}", f"month={month}", 'data.parquet')
+
+    def write(self, rows):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        partitions = {}
+        for row in rows:
+            typed = typed_row(self.kind, row)
+            partitions.setdefault((typed.pop(self.spec['biz'], ''), typed['month']), []).append(typed)
+
+        schema = pa.schema([(c, _arrow_type(c)) for c in self.columns])
+        date_col = self.spec['date']
+        for (biz, month), new_rows in partitions.items():
+            path = self._partition_path(biz, month)
+            merged = {}
+            if os.path.exists(path):
+                for old in pq.read_table(path).to_pylist():
+                    merged[tuple(old.get(k) for k in self.spec['keys'])] = old
+            for new in new_rows:
+                key = tuple(new.get(k) for k in self.spec['keys'])
+                merged[key] = dict(merged.get(key, {}), **{k: v for k, v in new.items() if v is not None})
+
+            ordered = sorted(merged.values(), key=lambda r: r.get(date_col) or datetime.min)
+            table = pa.Table.from_pylist([{c: r.get(c) for c in self.columns} for r in ordered], schema=schema)
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            pq.write_table(table, path + '.tmp', compression='zstd')
+            os.replace(path + '.tmp', path)
+
+    def query(self, bgn=None, end=None, institution=None, biz_type=None):
+        """기간(datetime) / 기관명(부분 일치) / 업무구분 조건 -> pyarrow Table (파티션 + 행 그룹 단위로 걸러서 읽음)"""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+
+        if not os.path.isdir(self.root):
+            return None
+
+        dataset = ds.dataset(self.root, format='parquet', partitioning='hive')
+        conditions = []
+        date_field = ds.field(self.spec['date'])
+        if bgn is not None:
+            conditions.append(ds.field('month') >= bgn.year * 100 + bgn.month)
+            conditions.append(date_field >= pa.scalar(bgn, pa.timestamp('s')))
+        if end is not None:
+            conditions.append(ds.field('month') <= end.year * 100 + end.month)
+            conditions.append(date_field <= pa.scalar(end, pa.timestamp('s')))
+        if biz_type:
+            conditions.append(ds.field(self.spec['biz']) == biz_type)
+        if institution:
+            matches = [pc.match_substring(ds.field(c), institution) for c in self.spec['instt'] if c in self.columns]
+            if matches:
+                condition = matches[0]
+                for match in matches[1:]:
+                    condition = condition | match
+                conditions.append(condition)
+
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return dataset.to_table(filter=expression)
+
+
+class DuckDBDataset:
+    """DuckDB 파일 하나에 종류별 테이블로 저장 (키 기준 upsert, 기존 행에 없는 항목은 보존)"""
+
+    def __init__(self, kind, columns, db_path=None):
+        import duckdb
+
+        self.kind = kind
+        self.spec = DATASETS[kind]
+        self.columns = list(dict.fromkeys(list(columns) + ['month']))
+        self.conn = duckdb.connect(db_path or DUCKDB_PATH)
+        column_defs = ', '.join(f'"{c}" {_sql_type(c)}' for c in self.columns)
+        keys = ', '.join(f'"{k}"' for k in self.spec['keys'])
+        self.conn.execute(f'CREATE TABLE IF NOT EXISTS {kind} ({column_defs}, PRIMARY KEY ({keys}))')
+        existing = {r[0] for r in self.conn.execute(f"DESCRIBE {kind}").fetchall()}
+        for c in self.columns:
+            if c not in existing:
+                self.conn.execute(f'ALTER TABLE {kind} ADD COLUMN "{c}" {_sql_type(c)}')
+
+    def write(self, rows):
+        import pyarrow as pa
+
+        # 같은 명령 안에서 한 행을 두 번 갱신할 수 없으므로 배치 안의 중복 키를 먼저 합침
+        merged = {}
+        for row in rows:
+            typed = typed_row(self.kind, row)
+            key = tuple(typed.get(k) for k in self.spec['keys'])
+            merged[key] = dict(merged.get(key, {}), **{k: v for k, v in typed.items() if v is not None})
+        if not merged:
+            return
+
+        # 행 단위 executemany 대신 Arrow 테이블로 한 번에 upsert
+        schema = pa.schema([(c, _arrow_type(c)) for c in self.columns])
+        batch = pa.Table.from_pylist([{c: r.get(c) for c in self.columns} for r in merged.values()], schema=schema)
+        self.conn.register('incoming', batch)
+
+        names = ', '.join(f'"{c}"' for c in self.columns)
+        keys = ', '.join(f'"{k}"' for k in self.spec['keys'])
+        updates = ', '.join(f'"{c}" = COALESCE(excluded."{c}", {self.kind}."{c}")'
+                            for c in self.columns if c not in self.spec['keys'])
+        try:
+            self.conn.execute(
+                f'INSERT INTO {self.kind} ({names}) SELECT {names} FROM incoming '
+                f'ON CONFLICT ({keys}) DO UPDATE SET {updates}'
+            )
+        finally:
+            self.conn.unregister('incoming')
+
+    def query(self, bgn=None, end=None, institution=None, biz_type=None):
+        """기간(datetime) / 기관명(부분 일치) / 업무구분 조건 -> pyarrow Table"""
+        conditions, params = [], []
+        if bgn is not None:
+            conditions.append(f'"{self.spec["date"]}" >= ?')
+            params.append(bgn)
+        if end is not None:
+            conditions.append(f'"{self.spec["date"]}" <= ?')
+            params.append(end)
+        if biz_type:
+            conditions.append(f'"{self.spec["biz"]}" = ?')
+            params.append(biz_type)
+        if institution:
+            conditions.append('(' + ' OR '.join(f'"{c}" LIKE ? ESCAPE \'\\\'' for c in self.spec['instt']) + ')')
+            params.extend(like_contains(institution) for _ in self.spec['instt'])
+
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+        return self.conn.execute(f"SELECT * FROM {self.kind}{where}", params).fetch_arrow_table()
+
+
+def open_dataset(kind, columns):
+    if DATASET_FORMAT == 'duckdb':
+        return DuckDBDataset(kind, columns)
+    return ParquetDataset(kind, columns)
+
+
+class DatasetWriter:
+    """수집 결과를 BATCH_SIZE 단위로 데이터셋에 추가 (스트리밍 수집 중간에 끼워 사용 가능)"""
+
+    def __init__(self, kind, columns, batch_size=BATCH_SIZE):
+        self.dataset = open_dataset(kind, columns)
+        self.batch_size = batch_size
+        self.buffer = []
+        self.written = 0
+
+    def add(self, rows):
+        for row in rows:
+            self.buffer.append(row)
+            if len(self.buffer) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.dataset.write(self.buffer)
+            self.written += len(self.buffer)
+            self.buffer = []
+
+    def tee(self, rows):
+        """행을 그대로 흘려보내면서 데이터셋에도 기록하는 제너레이터"""
+        for row in rows:
+            self.buffer.append(row)
+            if len(self.buffer) >= self.batch_size:
+                self.flush()
+            yield row
+        self.flush()
+
+
+def dataset_columns(kind):
+    """종류별 전체 컬럼 / 엑셀 컬럼명 매핑 (수집 스크립트의 출력 항목과 동일)"""
+    if kind == 'notices':
+        from all_88 import COLUMN_PRESETS
+        return COLUMN_PRESETS['all']
+    from PRE2 import EXPORT_COLUMNS
+    return EXPORT_COLUMNS
+
+
+def import_exports(kind, paths):
+    """기존 엑셀 결과 파일을 데이터셋으로 옮기기 (파일 간 겹치는 공고는 키 기준으로 하나만 남음)"""
+    from spec_join import read_export
+
+    col_map = dataset_columns(kind)
+    writer = DatasetWriter(kind, col_map)
+    for path in paths:
+        rows = read_export(path, col_map)
+        writer.add({k: v for k, v in row.items() if k in col_map} for row in rows)
+        print(f"  {path}: {len(rows)}건")
+    writer.flush()
+    print(f"[데이터셋] {kind} {writer.written}건 반영 ({DATASET_FORMAT})")
+
+
+def main():
+    usage = ("사용법:\n"
+             "  python g2b_dataset.py import notices|prespecs <엑셀파일> ...\n"
+             "  python g2b_dataset.py query notices|prespecs 2025-01-01 2025-03-31 [기관명]")
+    if len(sys.argv) < 3 or sys.argv[1] not in ('import', 'query') or sys.argv[2] not in DATASETS:
+        print(usage)
+        return
+
+    command, kind = sys.argv[1], sys.argv[2]
+    if command == 'import':
+        import_exports(kind, sys.argv[3:])
+        return
+
+    if len(sys.argv) < 5:
+        print(usage)
+        return
+    bgn = datetime.strptime(sys.argv[3], "%Y-%m-%d")
+    end = datetime.strptime(sys.argv[4], "%Y-%m-%d").replace(hour=23, minute=59)
+    institution = sys.argv[5] if len(sys.argv) > 5 else None
+
+    col_map = dataset_columns(kind)
+    table = open_dataset(kind, col_map).query(bgn, end, institution)
+    if table is None or table.num_rows == 0:
+        print("조회된 데이터가 없습니다.")
+        return
+
+    from g2b_export import write_rows
+
+    filename = f"데이터셋조회_{kind}_{sys.argv[3]}_to_{sys.argv[4]}.xlsx"
+    write_rows(table.to_pylist(), col_map, filename)
+    print(f"[데이터셋] {table.num_rows}건 -> {filename}")
+
+
+if __name__ == "__main__":
+    run_main(main)
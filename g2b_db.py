@@ -0,0 +1,37 @@
+import sqlite3
+
+# === [설정] 로컬 인덱스 DB 경로 ===
+# 수집 스크립트들이 공유하는 로컬 SQLite 파일 (이메일/기관 인덱스 등)
+DB_PATH = "g2b_local.db"
+
+
+def connect(db_path=None):
+    """로컬 인덱스 DB 연결 (WAL 모드, 컬럼명으로 접근 가능한 Row 반환)"""
+    conn = sqlite3.connect(db_path or DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def get_sync_state(conn, scope, key):
+    """마지막으로 수집이 완료된 시점(YYYYMMDDHHMM) 조회, 없으면 None"""
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS sync_state ("
+        " scope TEXT NOT NULL, key TEXT NOT NULL, last_end TEXT NOT NULL,"
+        " PRIMARY KEY (scope, key))"
+    )
+    row = conn.execute(
+        "SELECT last_end FROM sync_state WHERE scope = ? AND key = ?", (scope, key)
+    ).fetchone()
+    return row['last_end'] if row else None
+
+
+def set_sync_state(conn, scope, key, last_end):
+    """수집이 끝난 구간의 마지막 시점 기록 (더 과거 값으로는 되돌리지 않음)"""
+    get_sync_state(conn, scope, key)
+    conn.execute(
+        "INSERT INTO sync_state (scope, key, last_end) VALUES (?, ?, ?) "
+        "ON CONFLICT(scope, key) DO UPDATE SET last_end = MAX(last_end, excluded.last_end)",
+        (scope, key, last_end)
+    )
@@ -0,0 +1,91 @@
+import csv
+import os
+
+from g2b_trace import span
+
+
+def iter_dedup(rows, keys):
+    """키 컬럼 기준 중복 제거 제너레이터 (먼저 들어온 행 유지, 키 값만 기억하므로 행 전체를 모아두지 않음)"""
+    seen = set()
+    for row in rows:
+        key = tuple(row.get(k, '') for k in keys)
+        if key in seen:
+            continue
+        seen.add(key)
+        yield row
+
+
+def dedup_rows(rows, keys):
+    """키 컬럼 기준 중복 제거 (먼저 들어온 행 유지, drop_duplicates(keep='first')와 동일)"""
+    with span('dedup', cpu=True) as s:
+        unique = list(iter_dedup(rows, keys))
+        s.set(rows=len(unique))
+    return unique
+
+
+def dedup_latest(rows, keys, order_key):
+    """키 컬럼 기준 중복 제거 (order_key 값이 가장 큰 행 유지, 결과 순서는 키가 처음 나온 순서)"""
+    with span('dedup', cpu=True) as s:
+        latest = {}
+        for row in rows:
+            key = tuple(row.get(k, '') for k in keys)
+            kept = latest.get(key)
+            if kept is None or row.get(order_key, '') > kept.get(order_key, ''):
+                latest[key] = row
+        s.set(rows=len(latest))
+    return list(latest.values())
+
+
+def write_rows(rows, col_map, filename):
+    """
+    행(dict) 목록 또는 이터레이터를 col_map 순서/이름으로 저장 -> 저장 건수
+    .csv는 표준 라이브러리만 사용하고, .xlsx일 때만 openpyxl을 불러옴 (pandas 불필요)
+    두 형식 모두 한 행씩 바로 기록하므로 제너레이터를 넘기면 전체 결과를 메모리에 올리지 않음
+    (제너레이터를 넘기면 'export' 구간 안에 앞 단계의 수집/파싱 구간이 함께 포함됨)
+    """
+    with span('export', cpu=True, file=os.path.basename(filename)) as s:
+        count = _write_rows(rows, col_map, filename)
+        s.set(rows=count)
+    return count
+
+
+def _write_rows(rows, col_map, filename):
+    header = list(col_map.values())
+    keys = list(col_map.keys())
+
+    if os.path.splitext(filename)[1].lower() == '.csv':
+        with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            count = 0
+            for row in rows:
+                writer.writerow([row.get(k, '') for k in keys])
+                count += 1
+        return count
+
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(header)
+    count = 0
+    for row in rows:
+        ws.append([row.get(k, '') for k in keys])
+        count += 1
+    wb.save(filename)
+    return count
+
+
+def write_sheets(sheets, filename):
+    """[(시트명, 행 목록, col_map), ...]을 시트별로 나누어 하나의 엑셀 파일로 저장"""
+    from openpyxl import Workbook
+
+    with span('export', cpu=True, file=os.path.basename(filename)):
+        wb = Workbook(write_only=True)
+        for title, rows, col_map in sheets:
+            ws = wb.create_sheet(title=title)
+            ws.append(list(col_map.values()))
+            keys = list(col_map.keys())
+            for row in rows:
+                ws.append([row.get(k, '') for k in keys])
+        wb.save(filename)
@@ -0,0 +1,163 @@
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+import requests
+
+from g2b_trace import span
+from institution_index import item_to_dict
+from raw_archive import http_get
+
+# 입찰공고정보서비스 / 사전규격정보서비스 베이스 URL
+BID_BASE_URL = "http://apis.data.go.kr/1230000/ad/BidPublicInfoService/"
+SPEC_BASE_URL = "http://apis.data.go.kr/1230000/ao/HrcspSsstndrdInfoService/"
+
+# 업무구분별 오퍼레이션
+BID_OPERATIONS = {
+    '물품': 'getBidPblancListInfoThngPPSSrch',
+    '외자': 'getBidPblancListInfoFrgcptPPSSrch',
+    '용역': 'getBidPblancListInfoServcPPSSrch',
+    '공사': 'getBidPblancListInfoCnstwkPPSSrch'
+}
+SPEC_OPERATIONS = {
+    '물품': 'getPublicPrcureThngInfoThngPPSSrch',
+    '외자': 'getPublicPrcureThngInfoFrgcptPPSSrch',
+    '용역': 'getPublicPrcureThngInfoServcPPSSrch',
+    '공사': 'getPublicPrcureThngInfoCnstwkPPSSrch'
+}
+
+
+class PageResult:
+    """API 1회 호출 결과 (items: 원본 태그 dict 목록, total_count: 서버 totalCount, ok: 오류 없이 응답 여부)"""
+
+    def __init__(self, items=None, total_count=0, ok=True, message=''):
+        self.items = items or []
+        self.total_count = total_count
+        self.ok = ok
+        self.message = message
+
+
+def fetch_page(base_url, op_code, params, service_key, session=None):
+    """
+    오퍼레이션 1페이지 호출 -> PageResult
+    '조회된 데이터가 없습니다'는 정상(빈 결과)으로, 그 외 오류는 ok=False로 반환
+    """
+    query = {'ServiceKey': service_key}
+    query.update(params)
+
+    try:
+        response = http_get(base_url + op_code, query, session=session)
+        if response.status_code != 200:
+            return PageResult(ok=False, message=f"HTTP {response.status_code}")
+
+        with span('xml', cpu=True, bytes=len(response.content)):
+            root = ET.fromstring(response.content)
+        result_code = root.findtext('.//resultCode')
+        result_msg = root.findtext('.//resultMsg', default='')
+
+        if result_code != '00':
+            if "조회된 데이터가 없습니다" in result_msg or "NO DATA" in result_msg.upper():
+                return PageResult()
+            return PageResult(ok=False, message=result_msg or "알 수 없는 오류")
+
+        total_count = int(root.findtext('.//totalCount') or 0)
+        with span('parse_items', cpu=True) as s:
+            rows = [item_to_dict(item) for item in root.iter('item')]
+            s.set(rows=len(rows))
+        return PageResult(rows, total_count)
+
+    except Exception as e:
+        return PageResult(ok=False, message=str(e))
+
+
+class RequestCoalescer:
+    """
+    여러 검색 작업에서 발생하는 동일한 API 요청을 실행 1회당 한 번만 호출
+    - 요청 키: (오퍼레이션, 조회 파라미터) — 서비스 키는 키에 포함하지 않음
+    - 이미 받은 결과는 재사용, 같은 요청이 동시에 진행 중이면 먼저 시작한 호출 결과를 기다림 (singleflight)
+    - 실패한 결과는 저장하지 않아 이후 요청에서 다시 호출
+    """
+
+    def __init__(self, service_key, delay=0.1):
+        self.service_key = service_key
+        self.delay = delay
+        self._results = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {'requests': 0, 'cache_hits': 0, 'shared_waits': 0}
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    def fetch(self, base_url, op_code, params, refresh=False):
+        """refresh=True면 이미 받은 결과를 쓰지 않고 다시 호출 (덜 받은 페이지 재조회)"""
+        key = (base_url + op_code, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+        with self._lock:
+            if key in self._results and not refresh:
+                self.stats['cache_hits'] += 1
+                return self._results[key]
+            waiter = self._inflight.get(key)
+            if waiter is None:
+                waiter = {'event': threading.Event(), 'result': None}
+                self._inflight[key] = waiter
+                leader = True
+            else:
+                self.stats['shared_waits'] += 1
+                leader = False
+
+        if not leader:
+            waiter['event'].wait()
+            return waiter['result']
+
+        try:
+            result = fetch_page(base_url, op_code, params, self.service_key, self._session())
+            time.sleep(self.delay)  # API 서버 부하 방지
+        except Exception as e:
+            result = PageResult(ok=False, message=str(e))
+
+        with self._lock:
+            self.stats['requests'] += 1
+            if result.ok:
+                self._results[key] = result
+            waiter['result'] = result
+            del self._inflight[key]
+        waiter['event'].set()
+        return result
+
+    def fetch_all_pages(self, base_url, op_code, params, num_of_rows=100):
+        """
+        페이징 처리 -> (원본 태그 dict 목록, 전체 페이지 오류 없이 수집 여부)
+        마지막 페이지까지의 건수가 1페이지의 totalCount보다 적으면 그 페이지만 한 번 더 조회하고,
+        그래도 모자라면 미완료(False)로 반환 (수집 완료로 기록하지 않음)
+        """
+        all_items = []
+        page_no = 1
+        total_count = None
+
+        while True:
+            page_params = dict(params, numOfRows=num_of_rows, pageNo=page_no)
+            result = self.fetch(base_url, op_code, page_params)
+            expected = result.total_count if total_count is None else total_count
+            if result.ok and len(result.items) < num_of_rows and len(all_items) + len(result.items) < expected:
+                result = self.fetch(base_url, op_code, page_params, refresh=True)
+
+            if not result.ok:
+                print(f"    [{op_code}] {params.get('inqryBgnDt', '')[:8]} {page_no}페이지 오류: {result.message}")
+                return all_items, False
+
+            if total_count is None:
+                total_count = result.total_count
+            all_items.extend(result.items)
+            if len(result.items) < num_of_rows:
+                if len(all_items) < total_count:
+                    print(f"    [{op_code}] {params.get('inqryBgnDt', '')[:8]} totalCount {total_count}건 중 "
+                          f"{len(all_items)}건만 수집 ({page_no}페이지에서 끊김)")
+                    return all_items, False
+                return all_items, True
+            page_no += 1
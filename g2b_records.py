@@ -0,0 +1,94 @@
+import sys
+from collections.abc import Mapping
+
+
+class RecordSchema:
+    """
+    여러 행이 공유하는 필드 순서 (행마다 키 문자열/해시 테이블을 따로 두지 않음)
+    intern_fields: 값의 종류가 적은 필드 (기관명, 입찰방식, Y/N 여부 등) -> 같은 값은 문자열 객체 하나를 공유
+    """
+
+    __slots__ = ('fields', 'index', 'intern_positions')
+
+    def __init__(self, fields, intern_fields=()):
+        self.fields = tuple(fields)
+        self.index = {field: i for i, field in enumerate(self.fields)}
+        self.intern_positions = tuple(sorted(self.index[f] for f in set(intern_fields) if f in self.index))
+
+    def __reduce__(self):
+        # 프로세스 풀에서 넘어온 행도 이 프로세스의 같은 스키마 객체를 공유
+        return get_schema, (self.fields, tuple(self.fields[i] for i in self.intern_positions))
+
+    def make(self, values):
+        """필드 순서대로 나열한 값 목록 -> Record (intern_fields 값은 공유 문자열로 교체, 목록은 그대로 수정함)"""
+        intern = sys.intern
+        for i in self.intern_positions:
+            values[i] = intern(values[i])
+        return Record(self, tuple(values))
+
+
+class Record(Mapping):
+    """
+    수집 행의 경량 표현 (스키마 + 값 튜플)
+    dict처럼 get / [] / items()로 읽을 수 있고, 엑셀/DB에 쓰는 시점에만 to_dict()로 변환
+    """
+
+    __slots__ = ('schema', 'values')
+
+    def __init__(self, schema, values):
+        self.schema = schema
+        self.values = values
+
+    def __reduce__(self):
+        return Record, (self.schema, self.values)
+
+    def __getitem__(self, key):
+        return self.values[self.schema.index[key]]
+
+    def get(self, key, default=None):
+        i = self.schema.index.get(key)
+        return default if i is None else self.values[i]
+
+    def __contains__(self, key):
+        return key in self.schema.index
+
+    def __iter__(self):
+        return iter(self.schema.fields)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return f"Record({self.to_dict()!r})"
+
+    def to_dict(self):
+        return dict(zip(self.schema.fields, self.values))
+
+
+_schemas = {}
+
+
+def get_schema(fields, intern_fields=()):
+    """같은 필드 구성의 스키마는 하나만 만들어 공유"""
+    fields = tuple(fields)
+    key = (fields, frozenset(intern_fields).intersection(fields))
+    schema = _schemas.get(key)
+    if schema is None:
+        schema = _schemas[key] = RecordSchema(fields, intern_fields)
+    return schema
+
+
+def as_dict(row):
+    """Record 또는 dict -> dict (JSON 저장 등 dict가 필요한 곳에서 사용)"""
+    return row.to_dict() if isinstance(row, Record) else row
+
+
+def reintern(rows):
+    """
+    다른 프로세스에서 파싱되어 넘어온 Record의 공유 문자열을 이 프로세스에서 다시 공유
+    (pickle은 한 번에 보낸 행 목록 안에서만 같은 객체를 공유하므로 페이지 간에는 중복이 생김)
+    """
+    for row in rows:
+        if isinstance(row, Record) and row.schema.intern_positions:
+            row.values = row.schema.make(list(row.values)).values
+    return rows
@@ -0,0 +1,87 @@
+import sys
+import time
+from datetime import datetime
+
+from g2b_dataset import dataset_columns, open_dataset
+from g2b_export import write_sheets
+from g2b_trace import run_main
+
+# 집계 기준별 시트 (시트명, 그룹 컬럼, 그룹 컬럼의 엑셀 컬럼명)
+GROUPINGS = [
+    ('분야별', ['bizType'], ['업무구분']),
+    ('월별', ['month'], ['공고월']),
+    ('분야x월', ['bizType', 'month'], ['업무구분', '공고월']),
+    ('기관별', ['ntceInsttNm'], ['공고기관']),
+    ('낙찰방법별', ['sucsfbidMthdNm'], ['낙찰방법'])
+]
+
+# 집계 항목 (컬럼, 집계 함수) -> 엑셀 컬럼명
+AGGREGATES = {
+    ('bidNtceNo', 'count'): '공고수',
+    ('bdgtAmt', 'sum'): '예산금액합계',
+    ('bdgtAmt', 'mean'): '예산금액평균',
+    ('presmptPrce', 'sum'): '추정가격합계'
+}
+
+
+def latest_orders(table):
+    """같은 공고번호의 여러 차수(정정공고) 중 최신 차수만 남김 (금액 이중 합산 방지)"""
+    latest = table.group_by('bidNtceNo').aggregate([('bidNtceOrd', 'max')])
+    latest = latest.rename_columns(['bidNtceNo', 'bidNtceOrd'])
+    return table.join(latest, keys=['bidNtceNo', 'bidNtceOrd'], join_type='inner')
+
+
+def aggregate(table, group_cols):
+    """group_cols 기준 공고수/예산/추정가격 집계 (pyarrow 컬럼 연산) -> 예산합계 내림차순 행 목록"""
+    aggregations = [(col, func) for col, func in AGGREGATES]
+    result = table.group_by(group_cols).aggregate(aggregations)
+    sort_key = 'month' if group_cols == ['month'] else 'bdgtAmt_sum'
+    order = 'ascending' if sort_key == 'month' else 'descending'
+    return result.sort_by([(sort_key, order)]).to_pylist()
+
+
+def build_report(bgn, end):
+    """기간 내 입찰공고 집계 -> [(시트명, 행 목록, col_map), ...]"""
+    table = open_dataset('notices', dataset_columns('notices')).query(bgn, end)
+    if table is None or table.num_rows == 0:
+        return []
+
+    columns = ['bizType', 'month', 'bidNtceNo', 'bidNtceOrd', 'ntceInsttNm', 'sucsfbidMthdNm', 'bdgtAmt', 'presmptPrce']
+    table = latest_orders(table.select(columns))
+
+    sheets = []
+    for title, group_cols, group_names in GROUPINGS:
+        col_map = dict(zip(group_cols, group_names))
+        col_map.update({f"{col}_{func}": name for (col, func), name in AGGREGATES.items()})
+        sheets.append((title, aggregate(table, group_cols), col_map))
+    return sheets
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("사용법: python g2b_report.py 2025-01-01 2025-12-31")
+        print("(all_88.py의 SAVE_DATASET 또는 g2b_dataset.py import로 쌓은 데이터셋을 집계)")
+        return
+
+    start_str, end_str = sys.argv[1], sys.argv[2]
+    bgn = datetime.strptime(start_str, "%Y-%m-%d")
+    end = datetime.strptime(end_str, "%Y-%m-%d").replace(hour=23, minute=59)
+
+    started = time.perf_counter()
+    sheets = build_report(bgn, end)
+    if not sheets:
+        print("조회된 데이터가 없습니다.")
+        return
+
+    filename = f'입찰공고_집계_{start_str}_to_{end_str}.xlsx'
+    try:
+        write_sheets(sheets, filename)
+        print(f"[성공] '{filename}' 저장 완료 ({time.perf_counter() - started:.1f}초)")
+        for title, rows, _ in sheets:
+            print(f"  {title}: {len(rows)}행")
+    except PermissionError:
+        print(f"[오류] '{filename}' 파일이 이미 열려있습니다. 파일을 닫고 다시 실행해주세요.")
+
+
+if __name__ == "__main__":
+    run_main(main)
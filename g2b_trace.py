@@ -0,0 +1,185 @@
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+# === [설정] 실행 구간 기록 ===
+# 명령줄에 --profile (구간 기록) 또는 --profile=cpu (구간 기록 + 파싱/필터/저장 단계 cProfile)를 붙이거나
+# 환경 변수 G2B_PROFILE=1 / G2B_PROFILE=cpu 로 켬 (더블클릭 실행 시)
+PROFILE_ENV = os.environ.get('G2B_PROFILE', '')
+TOP_FUNCTIONS = 25  # cProfile 결과 중 콘솔에 출력할 함수 수 (누적 시간순)
+
+_events = None  # None이면 기록하지 않음 (span은 아무 일도 하지 않는 객체를 반환)
+_profiler = None
+_profile_depth = 0
+# 프로세스마다 다른 perf_counter 기준을 벽시계 기준으로 맞춤 (프로세스 풀의 구간도 같은 타임라인에 표시)
+_clock_offset = time.time() - time.perf_counter()
+
+
+def _now_us():
+    return (time.perf_counter() + _clock_offset) * 1_000_000
+
+
+class _Span:
+    """with 블록의 실행 시간을 Chrome trace 'X'(완료) 이벤트로 기록"""
+
+    __slots__ = ('name', 'cat', 'args', 'cpu', 'started')
+
+    def __init__(self, name, cat, cpu, args):
+        self.name = name
+        self.cat = cat
+        self.cpu = cpu
+        self.args = args
+
+    def set(self, **args):
+        """블록 안에서 알게 된 값 추가 (행 수, 응답 크기 등)"""
+        self.args.update(args)
+
+    def __enter__(self):
+        global _profile_depth
+        # cProfile은 메인 스레드의 CPU 단계만 측정 (I/O 스레드의 대기 시간이 섞이지 않도록)
+        self.cpu = self.cpu and _profiler is not None and threading.current_thread() is threading.main_thread()
+        if self.cpu:
+            if _profile_depth == 0:
+                _profiler.enable()
+            _profile_depth += 1
+        self.started = _now_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        global _profile_depth
+        ended = _now_us()
+        if self.cpu:
+            _profile_depth -= 1
+            if _profile_depth == 0:
+                _profiler.disable()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        _events.append({
+            'name': self.name, 'cat': self.cat, 'ph': 'X',
+            'ts': round(self.started, 1), 'dur': round(ended - self.started, 1),
+            'pid': os.getpid(), 'tid': threading.get_ident(), 'args': self.args
+        })
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def enabled():
+    return _events is not None
+
+
+def span(name, cat='stage', cpu=False, **args):
+    """
+    단계 구간 기록: with span('xml', op=..., page=...) as s: ... s.set(rows=len(rows))
+    cpu=True인 단계는 --profile=cpu일 때 cProfile로도 측정
+    기록이 꺼져 있으면 아무 일도 하지 않음
+    """
+    if _events is None:
+        return _NULL_SPAN
+    return _Span(name, cat, cpu, args)
+
+
+def _traced_call(fn, args):
+    """프로세스 풀 작업: 작업 프로세스에서 구간을 기록하여 결과와 함께 돌려줌"""
+    global _events
+    _events = []
+    try:
+        return fn(*args), _events
+    finally:
+        _events = None
+
+
+def submit(pool, fn, *args):
+    """pool.submit 대신 사용 (기록 중이면 작업 프로세스의 구간도 모음), 결과는 result(future)로 받음"""
+    if _events is None:
+        return pool.submit(fn, *args)
+    return pool.submit(_traced_call, fn, args)
+
+
+def result(future):
+    """submit으로 예약한 작업의 결과 (작업 프로세스에서 기록한 구간은 현재 기록에 합침)"""
+    value = future.result()
+    if _events is None:
+        return value
+    value, events = value
+    _events.extend(events)
+    return value
+
+
+def start(cpu=False):
+    global _events, _profiler
+    _events = []
+    if cpu:
+        import cProfile
+        _profiler = cProfile.Profile()
+
+
+def finish(label):
+    """기록 종료: trace 파일 저장, 단계별 합계(및 cProfile 상위 함수) 출력"""
+    global _events, _profiler
+    events, profiler = _events, _profiler
+    _events, _profiler = None, None
+    if events is None:
+        return None
+
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f"trace_{label}_{stamp}.json"
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+
+    totals = {}
+    for event in events:
+        count, dur = totals.get(event['name'], (0, 0.0))
+        totals[event['name']] = (count + 1, dur + event['dur'])
+    print("\n=== 단계별 소요 시간 (합계, 병렬 단계는 겹쳐서 합산됨) ===")
+    for name, (count, dur) in sorted(totals.items(), key=lambda kv: -kv[1][1]):
+        print(f"  {name:<20} {dur / 1_000_000:9.2f}초  ({count}회)")
+    print(f"[기록] {filename} (chrome://tracing 또는 https://ui.perfetto.dev 에서 열기)")
+
+    if profiler is not None:
+        import pstats
+        prof_name = f"profile_{label}_{stamp}.prof"
+        profiler.dump_stats(prof_name)
+        print(f"\n=== CPU 단계 cProfile 상위 {TOP_FUNCTIONS}개 (누적 시간순) ===")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+        print(f"[기록] {prof_name} (python -m pstats / snakeviz 등으로 열기)")
+    return filename
+
+
+def run_main(main):
+    """
+    진입점 실행: --profile / --profile=cpu 인자(또는 G2B_PROFILE)가 있으면 구간을 기록하고 종료 시 저장
+    인자는 sys.argv에서 제거한 뒤 main()을 호출하므로 기존 인자 처리에 영향 없음
+    """
+    mode = PROFILE_ENV
+    for arg in sys.argv[1:]:
+        if arg == '--profile' or arg.startswith('--profile='):
+            mode = arg.partition('=')[2] or '1'
+    sys.argv = [arg for arg in sys.argv if not (arg == '--profile' or arg.startswith('--profile='))]
+    if mode in ('', '0'):
+        return main()
+
+    label = os.path.splitext(os.path.basename(sys.argv[0] or 'run'))[0]
+    start(cpu=(mode == 'cpu'))
+    try:
+        with span(label, cat='run'):
+            return main()
+    finally:
+        finish(label)
@@ -0,0 +1,93 @@
+import re
+from datetime import datetime, timedelta
+
+# 구간을 나누는 날짜 (매월 1일, 16일 시작 -> 1~15일 / 16일~말일, 최대 16일로 API 조회 기간 제한 이내)
+SPLIT_DAYS = (1, 16)
+
+
+def normalize_dt(value):
+    """'2025-01-02 10:00:00' 같은 일시 문자열을 API 포맷(YYYYMMDDHHMM)으로 변환"""
+    digits = re.sub(r"\D", '', value or '')
+    return digits[:12].ljust(12, '0') if digits else ''
+
+
+def _parse(value, end_of_day=False):
+    """datetime 또는 'YYYY-MM-DD' / 'YYYYMMDDHHMM' 문자열 -> datetime (날짜만 있는 종료일은 23:59)"""
+    if isinstance(value, datetime):
+        return value
+    if '-' in value:
+        parsed = datetime.strptime(value, "%Y-%m-%d")
+        return parsed.replace(hour=23, minute=59) if end_of_day else parsed
+    return datetime.strptime(value, "%Y%m%d%H%M")
+
+
+def window_start(dt):
+    """dt가 속한 구간의 시작 시각"""
+    day = max(d for d in SPLIT_DAYS if d <= dt.day)
+    return dt.replace(day=day, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_window_start(dt):
+    """dt가 속한 구간 다음 구간의 시작 시각"""
+    start = window_start(dt)
+    later = [d for d in SPLIT_DAYS if d > start.day]
+    if later:
+        return start.replace(day=later[0])
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1, day=SPLIT_DAYS[0])
+    return start.replace(month=start.month + 1, day=SPLIT_DAYS[0])
+
+
+def calendar_windows(start, end=None, align_start=False):
+    """
+    [start, end] 기간을 달력 기준 반월 구간으로 나눔 -> [(YYYYMMDDHHMM, YYYYMMDDHHMM), ...]
+    - 구간 경계가 실행 시각과 무관하므로 지난 구간은 매번 똑같은 요청이 됨 (아카이브/커버리지/요청 병합 재사용)
+    - 각 구간은 00:00 ~ 마지막 날 23:59로, 구간 사이에 겹치거나 빠지는 분이 없음
+    - start/end가 구간 중간이면 그 부분만 자르고, align_start=True면 start를 구간 시작으로 내림
+    - end는 현재 시각(분 단위)을 넘지 않음
+    """
+    now = datetime.now().replace(second=0, microsecond=0)
+    start = _parse(start).replace(second=0, microsecond=0)
+    end = min(_parse(end, end_of_day=True).replace(second=0, microsecond=0) if end is not None else now, now)
+    if align_start:
+        start = window_start(start)
+
+    windows = []
+    current = start
+    while current <= end:
+        current_end = min(next_window_start(current) - timedelta(minutes=1), end)
+        windows.append((current.strftime('%Y%m%d%H%M'), current_end.strftime('%Y%m%d%H%M')))
+        current = current_end + timedelta(minutes=1)
+    return windows
+
+
+def recent_windows(days):
+    """최근 days일을 포함하는 구간 목록 (시작을 구간 경계로 내려 지난 구간이 실행마다 같도록 함)"""
+    return calendar_windows(datetime.now() - timedelta(days=days), align_start=True)
+
+
+def collect_latest(windows, fetch_window, limit, date_key, key_cols=None):
+    """
+    최근 limit건 조회: 구간을 최신 구간부터 거꾸로 돌며 fetch_window(bgn, end) -> 조건에 맞는 행 목록을 모음
+    - 한 구간의 행은 그 이전 구간의 행보다 항상 최신이므로, 누적 건수가 limit에 도달한 구간에서 중단
+      (조회 기간이 길어도 호출 수는 limit건이 모이는 구간 수에만 비례)
+    - 중단은 구간 단위: API 응답은 공고일시 순 정렬이 보장되지 않아 구간 안에서는 남은 페이지에 더 최신 행이
+      없다고 확인할 수 없으므로, limit건이 모이는 구간도 끝까지 조회함
+    - key_cols가 있으면 같은 키의 행은 한 번만 셈
+    반환: date_key 기준 최신순 상위 limit건
+    """
+    rows = []
+    seen = set()
+    for bgn_dt, end_dt in reversed(windows):
+        for row in fetch_window(bgn_dt, end_dt):
+            if key_cols:
+                key = tuple(row.get(k, '') for k in key_cols)
+                if key in seen:
+                    continue
+                seen.add(key)
+            rows.append(row)
+        if len(rows) >= limit:
+            break
+
+    rows.sort(key=lambda r: r.get(date_key, ''), reverse=True)
+    return rows[:limit]
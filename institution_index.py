@@ -0,0 +1,197 @@
+import json
+import re
+import unicodedata
+
+import g2b_db
+from coverage_map import CoverageMap
+from g2b_records import as_dict
+from g2b_windows import normalize_dt
+
+
+def normalize_instt_name(name):
+    """기관명 정규화: 전각/반각 통일, 소문자, 공백·괄호·구두점 제거 ('(주) 한국 전력' -> '주한국전력')"""
+    if not name:
+        return ''
+    name = unicodedata.normalize('NFKC', name).lower()
+    return re.sub(r"[\s()\[\]{}·.,\-_/]", '', name)
+
+
+def like_contains(text):
+    """LIKE 부분 일치 패턴 ('%', '_', '\\'는 문자 그대로 비교하도록 이스케이프, ESCAPE '\\'와 함께 사용)"""
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+def item_to_dict(item):
+    """XML <item>의 모든 하위 태그를 {태그: 텍스트} 형태로 변환 (공백 제거)"""
+    return {child.tag: (child.text or '').strip() for child in item}
+
+
+class InstitutionIndex:
+    """
+    공고기관/수요기관 기준 로컬 공고 인덱스
+    - 기관코드(ntceInsttCd/dminsttCd)와 정규화된 기관명으로 공고를 조회
+    - 전체 공고를 훑은(기관 필터 없이 수집한) 구간은 커버리지로 기록하여 재조회 시 API 호출 생략
+    """
+
+    def __init__(self, db_path=None):
+        self.conn = g2b_db.connect(db_path)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS notices (
+                bid_ntce_no TEXT NOT NULL,
+                bid_ntce_ord TEXT NOT NULL DEFAULT '',
+                biz_type TEXT NOT NULL DEFAULT '',
+                bid_ntce_dt TEXT NOT NULL DEFAULT '',
+                ntce_instt_cd TEXT NOT NULL DEFAULT '',
+                ntce_instt_nm TEXT NOT NULL DEFAULT '',
+                ntce_instt_norm TEXT NOT NULL DEFAULT '',
+                dminstt_cd TEXT NOT NULL DEFAULT '',
+                dminstt_nm TEXT NOT NULL DEFAULT '',
+                dminstt_norm TEXT NOT NULL DEFAULT '',
+                data TEXT NOT NULL,
+                PRIMARY KEY (bid_ntce_no, bid_ntce_ord)
+            );
+            CREATE INDEX IF NOT EXISTS idx_notices_ntce_instt ON notices (ntce_instt_cd, bid_ntce_dt);
+            CREATE INDEX IF NOT EXISTS idx_notices_dminstt ON notices (dminstt_cd, bid_ntce_dt);
+            CREATE INDEX IF NOT EXISTS idx_notices_dt ON notices (bid_ntce_dt);
+
+            CREATE TABLE IF NOT EXISTS institutions (
+                instt_cd TEXT NOT NULL,
+                norm_nm TEXT NOT NULL,
+                instt_nm TEXT NOT NULL,
+                PRIMARY KEY (instt_cd, norm_nm)
+            );
+            """
+        )
+        # 전체 공고 수집 구간은 (오퍼레이션, 필터 없음) 커버리지로 기록
+        self.coverage = CoverageMap(db_path)
+        self._migrate_sweep_coverage()
+
+    def _migrate_sweep_coverage(self):
+        """예전 sweep_coverage 테이블에 기록된 구간을 커버리지로 옮김 (한 번만)"""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sweep_coverage'"
+        ).fetchone()
+        if not exists:
+            return
+        for row in self.conn.execute("SELECT op_code, bgn_dt, end_dt FROM sweep_coverage").fetchall():
+            self.coverage.add(row['op_code'], '', row['bgn_dt'], row['end_dt'])
+        with self.conn:
+            self.conn.execute("DROP TABLE sweep_coverage")
+
+    def ingest(self, rows, biz_type=''):
+        """
+        수집된 공고 행(원본 태그명 키: bidNtceNo, ntceInsttCd, ntceInsttNm ...)을 인덱스에 반영
+        같은 공고번호/차수가 이미 있으면 기존 행에 합침 (새 행에 있는 항목만 최신 값으로 바꾸고,
+        일부 항목만 추출한 행이 들어와도 나머지 항목은 그대로 유지)
+        """
+        merged = {}  # (공고번호, 차수) -> [합친 행, 업무구분] (같은 배치 안의 중복도 합침)
+        for row in rows:
+            bid_ntce_no = row.get('bidNtceNo', '')
+            if not bid_ntce_no:
+                continue
+            key = (bid_ntce_no, row.get('bidNtceOrd', ''))
+            if key not in merged:
+                stored = self.conn.execute(
+                    "SELECT biz_type, data FROM notices WHERE bid_ntce_no = ? AND bid_ntce_ord = ?", key
+                ).fetchone()
+                merged[key] = [json.loads(stored['data']), stored['biz_type']] if stored else [{}, '']
+            merged[key][0].update(as_dict(row))
+            merged[key][1] = row.get('bizType') or biz_type or merged[key][1]
+
+        notice_params = []
+        instt_params = set()
+
+        for (bid_ntce_no, bid_ntce_ord), (row, row_biz_type) in merged.items():
+            ntce_cd, ntce_nm = row.get('ntceInsttCd', ''), row.get('ntceInsttNm', '')
+            dm_cd, dm_nm = row.get('dminsttCd', ''), row.get('dminsttNm', '')
+            ntce_norm, dm_norm = normalize_instt_name(ntce_nm), normalize_instt_name(dm_nm)
+
+            notice_params.append((
+                bid_ntce_no, bid_ntce_ord, row_biz_type,
+                normalize_dt(row.get('bidNtceDt', '')),
+                ntce_cd, ntce_nm, ntce_norm, dm_cd, dm_nm, dm_norm,
+                json.dumps(row, ensure_ascii=False)
+            ))
+            if ntce_norm:
+                instt_params.add((ntce_cd, ntce_norm, ntce_nm))
+            if dm_norm:
+                instt_params.add((dm_cd, dm_norm, dm_nm))
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO notices "
+                "(bid_ntce_no, bid_ntce_ord, biz_type, bid_ntce_dt, ntce_instt_cd, ntce_instt_nm, ntce_instt_norm,"
+                " dminstt_cd, dminstt_nm, dminstt_norm, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                notice_params
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO institutions (instt_cd, norm_nm, instt_nm) VALUES (?, ?, ?)",
+                instt_params
+            )
+        return len(notice_params)
+
+    def mark_covered(self, op_code, bgn_dt, end_dt):
+        """기관 필터 없이 전체 공고를 수집 완료한 구간 기록"""
+        self.coverage.add(op_code, '', bgn_dt, end_dt)
+
+    def coverage_gaps(self, op_code, bgn_dt, end_dt):
+        """요청 구간 중 아직 전체 공고를 수집하지 않은 부분 목록 (API로 받아야 하는 부분)"""
+        return self.coverage.split(op_code, '', bgn_dt, end_dt)[1]
+
+    def is_covered(self, op_code, bgn_dt, end_dt):
+        """요청 구간이 이미 수집 완료된 구간들로 빈틈없이 덮여 있는지 확인"""
+        return not self.coverage_gaps(op_code, bgn_dt, end_dt)
+
+    def rows_between(self, biz_type, bgn_dt, end_dt):
+        """인덱스에 적재된 업무구분의 공고 중 공고일시가 기간 내인 원본 행 목록"""
+        cursor = self.conn.execute(
+            "SELECT data FROM notices WHERE biz_type = ? AND bid_ntce_dt BETWEEN ? AND ? ORDER BY bid_ntce_dt",
+            (biz_type, bgn_dt, end_dt)
+        )
+        return [json.loads(r['data']) for r in cursor]
+
+    def resolve_codes(self, query):
+        """기관코드 또는 기관명(부분 일치)으로 기관코드 목록 조회"""
+        query = query.strip()
+        norm = normalize_instt_name(query)
+        if not norm:
+            # 공백/구두점만 있는 검색어는 모든 기관과 부분 일치하므로 사용하지 않음
+            return []
+        rows = self.conn.execute(
+            "SELECT DISTINCT instt_cd FROM institutions "
+            "WHERE instt_cd = ? OR instt_nm = ? OR norm_nm LIKE ? ESCAPE '\\'",
+            (query, query, like_contains(norm))
+        ).fetchall()
+        return [r['instt_cd'] for r in rows if r['instt_cd']]
+
+    def lookup(self, query, bgn_dt, end_dt):
+        """
+        기관(코드 또는 이름)에 해당하는 공고를 기간 내에서 조회 (공고기관 또는 수요기관 일치)
+        bgn_dt/end_dt: YYYYMMDDHHMM, 반환값은 수집 당시의 원본 행(dict) 목록 (공고일시 역순)
+        """
+        norm = normalize_instt_name(query)
+        if not norm:
+            return []
+        codes = self.resolve_codes(query)
+        norm_like = like_contains(norm)
+        placeholders = ','.join('?' * len(codes))
+
+        conditions = ["ntce_instt_norm LIKE ? ESCAPE '\\'", "dminstt_norm LIKE ? ESCAPE '\\'"]
+        params = [norm_like, norm_like]
+        if codes:
+            conditions += [f"ntce_instt_cd IN ({placeholders})", f"dminstt_cd IN ({placeholders})"]
+            params += codes + codes
+
+        cursor = self.conn.execute(
+            f"SELECT biz_type, data FROM notices WHERE bid_ntce_dt BETWEEN ? AND ? AND ({' OR '.join(conditions)}) "
+            "ORDER BY bid_ntce_dt DESC",
+            [bgn_dt, end_dt] + params
+        )
+        results = []
+        for r in cursor:
+            row = json.loads(r['data'])
+            row.setdefault('bizType', r['biz_type'])
+            results.append(row)
+        return results
@@ -0,0 +1,226 @@
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timedelta
+
+import g2b_db
+
+# === [설정] 서비스 키 풀 ===
+# 이 파일이 있으면 각 스크립트의 SERVICE_KEY 대신 파일에 등록된 여러 키를 나누어 사용
+# {"keys": [{"name": "계정1", "key": "...", "rate_per_sec": 10, "daily_quota": 1000}, ...]}
+KEYS_FILE = "service_keys.json"
+# 일일 한도는 로컬 DB의 공유 사용량으로 여러 프로세스(동시 실행한 스크립트/백필 작업자)를 합쳐 적용,
+# 초당 호출 수는 프로세스마다 적용 — 여러 프로세스를 동시에 돌리면 rate_per_sec를 프로세스 수로 나누어 설정
+DEFAULT_RATE_PER_SEC = 10
+DEFAULT_DAILY_QUOTA = 1000
+RESERVE_BATCH = 20          # 공유 사용량에서 한 번에 예약하는 호출 수 (남은 예약은 종료 시 반납)
+THROTTLE_BENCH_SECONDS = 60  # HTTP 429 등 일시적 제한 시 쉬는 시간
+
+# 공공데이터포털 인증/한도 오류 코드 (OpenAPI_ServiceResponse의 returnReasonCode)
+QUOTA_ERROR_CODES = {'22'}               # LIMITED_NUMBER_OF_SERVICE_REQUESTS_EXCEEDS_ERROR
+AUTH_ERROR_CODES = {'20', '30', '31', '32', '33'}   # 접근 거부 / 미등록 키 / 기한 만료 / 미등록 IP / 서명 오류
+_REASON_CODE = re.compile(rb'<returnReasonCode>\s*(\d+)\s*</returnReasonCode>')
+
+
+class KeyState:
+    """키 1개의 상태 (호출 간격, 일일 사용량, 사용 중지 여부) — 로그에는 name만 사용"""
+
+    def __init__(self, name, key, rate_per_sec, daily_quota):
+        self.name = name
+        self.key = key
+        self.key_id = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+        self.interval = 1.0 / rate_per_sec if rate_per_sec else 0.0
+        self.daily_quota = daily_quota
+        self.next_at = 0.0
+        self.day = ''
+        self.used_today = 0     # 마지막으로 확인한 공유 사용량 (다른 프로세스 사용분과 이 프로세스의 예약분 포함)
+        self.reserved = 0       # 이 프로세스가 예약해 두고 아직 쓰지 않은 호출 수
+        self.exhausted = False  # 오늘 한도를 다 써서 더 예약할 수 없음
+        self.benched_until = 0.0
+        self.last_error = ''
+
+    def __repr__(self):
+        return f"KeyState({self.name})"
+
+
+class KeyPool:
+    """
+    여러 서비스 키를 번갈아 사용하여 전체 처리량을 높임
+    - 키마다 초당 호출 수 / 일일 한도를 따로 적용하고, 가장 먼저 호출 가능한 키를 배정
+    - 한도 초과 오류가 나면 다음날 0시까지, 인증 오류가 나면 이번 실행 동안 해당 키를 제외
+    - 일일 사용량은 로컬 DB(key_usage)에 키 해시별로 공유하여 다음 실행 / 동시에 실행 중인 다른 프로세스와 합산
+      호출마다 DB에 쓰지 않도록 RESERVE_BATCH건씩 미리 예약해 쓰고, 종료 시 남은 예약을 반납
+      (비정상 종료 시 반납하지 못한 예약분은 그날 사용한 것으로 남음)
+    """
+
+    def __init__(self, entries, db_path=None):
+        self.keys = [
+            KeyState(e.get('name') or f"키{i + 1}", e['key'],
+                     e.get('rate_per_sec', DEFAULT_RATE_PER_SEC), e.get('daily_quota', DEFAULT_DAILY_QUOTA))
+            for i, e in enumerate(entries) if e.get('key')
+        ]
+        self._cond = threading.Condition()
+        self._db_path = db_path
+        self._db_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _update_usage(self, state, update):
+        """
+        공유 사용량을 한 트랜잭션 안에서 읽고 갱신 (BEGIN IMMEDIATE로 다른 프로세스의 갱신과 직렬화)
+        update(used) -> 더할 값, 반환값은 (갱신 전 사용량, 더한 값)
+        """
+        # 여러 스레드에서 호출되므로 연결은 사용할 때마다 열고 닫음
+        with self._db_lock:
+            conn = g2b_db.connect(self._db_path)
+            conn.isolation_level = None
+            try:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS key_usage ("
+                    " key_id TEXT NOT NULL, day TEXT NOT NULL, used INTEGER NOT NULL,"
+                    " PRIMARY KEY (key_id, day))"
+                )
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    row = conn.execute("SELECT used FROM key_usage WHERE key_id = ? AND day = ?",
+                                       (state.key_id, state.day)).fetchone()
+                    used = row['used'] if row else 0
+                    delta = update(used)
+                    if delta:
+                        conn.execute(
+                            "INSERT INTO key_usage (key_id, day, used) VALUES (?, ?, ?) "
+                            "ON CONFLICT(key_id, day) DO UPDATE SET used = used + excluded.used",
+                            (state.key_id, state.day, delta)
+                        )
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            finally:
+                conn.close()
+        state.used_today = used + delta
+        return used, delta
+
+    def _reserve(self, state):
+        """공유 사용량에서 최대 RESERVE_BATCH건 예약, 남은 한도가 없으면 오늘은 제외"""
+        _, granted = self._update_usage(
+            state, lambda used: max(0, min(RESERVE_BATCH, state.daily_quota - used)))
+        state.reserved = granted
+        state.exhausted = granted == 0
+
+    def _release(self):
+        """쓰지 않은 예약분을 공유 사용량에 반납"""
+        for state in self.keys:
+            if state.reserved:
+                reserved, state.reserved = state.reserved, 0
+                self._update_usage(state, lambda used: -min(reserved, used))
+
+    def acquire(self):
+        """호출할 키 배정 (필요하면 호출 간격만큼 대기), 사용 가능한 키가 없으면 RuntimeError"""
+        with self._cond:
+            while True:
+                now = time.time()
+                day = datetime.now().strftime('%Y%m%d')
+                candidates = []
+                for state in self.keys:
+                    if state.day != day:
+                        # 날짜가 바뀌면 어제 예약분은 버리고 새로 예약
+                        state.day, state.reserved, state.exhausted = day, 0, False
+                    if state.benched_until > now or state.exhausted:
+                        continue
+                    if not state.reserved:
+                        self._reserve(state)
+                        if not state.reserved:
+                            continue
+                    candidates.append(state)
+
+                if not candidates:
+                    raise RuntimeError("사용 가능한 서비스 키가 없습니다 (모든 키가 한도 초과 또는 인증 오류)")
+
+                state = min(candidates, key=lambda s: s.next_at)
+                wait = state.next_at - now
+                if wait <= 0:
+                    state.next_at = now + state.interval
+                    state.reserved -= 1
+                    break
+                self._cond.wait(wait)
+        return state
+
+    def check(self, state, response):
+        """
+        응답이 키 문제(한도/인증/일시 제한)인지 확인하여 해당 키를 제외 -> 키 문제면 False (다른 키로 재시도)
+        """
+        reason = None
+        if response.status_code == 429:
+            reason = 'throttle'
+        else:
+            match = _REASON_CODE.search(response.content[:2000])
+            if match and match.group(1).decode() in QUOTA_ERROR_CODES:
+                reason = 'quota'
+            elif match and match.group(1).decode() in AUTH_ERROR_CODES:
+                reason = 'auth'
+        if reason is None:
+            return True
+
+        with self._cond:
+            now = time.time()
+            if reason == 'quota':
+                tomorrow = (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+                state.benched_until = tomorrow.timestamp()
+                state.reserved, state.exhausted = 0, True
+                # 서버 기준으로 한도를 다 썼으므로 다른 프로세스도 이 키를 예약하지 않도록 공유 사용량을 한도까지 채움
+                self._update_usage(state, lambda used: max(0, state.daily_quota - used))
+                state.last_error = '일일 한도 초과'
+            elif reason == 'auth':
+                state.benched_until = float('inf')
+                state.last_error = '인증 오류'
+            else:
+                state.benched_until = now + THROTTLE_BENCH_SECONDS
+                state.last_error = '호출 제한(429)'
+            self._cond.notify_all()
+        print(f"    [키 제외] {state.name}: {state.last_error}")
+        return False
+
+    def redact(self, text):
+        """오류 메시지 등에 섞인 키(원문/URL 인코딩)를 이름으로 치환"""
+        for state in self.keys:
+            for form in (state.key, urllib.parse.quote(state.key, safe=''), urllib.parse.quote_plus(state.key)):
+                text = text.replace(form, f"<{state.name}>")
+        return text
+
+    def summary(self):
+        with self._cond:
+            self._release()
+        lines = []
+        for state in self.keys:
+            status = state.last_error or '정상'
+            lines.append(f"  {state.name}: 오늘 {state.used_today}/{state.daily_quota}회 ({status})")
+        return '\n'.join(lines)
+
+
+_pool = None
+_pool_loaded = False
+_pool_lock = threading.Lock()
+
+
+def get_key_pool():
+    """KEYS_FILE이 있으면 키 풀 반환 (없으면 None -> 스크립트의 SERVICE_KEY 그대로 사용)"""
+    global _pool, _pool_loaded
+    with _pool_lock:
+        if not _pool_loaded:
+            _pool_loaded = True
+            if os.path.exists(KEYS_FILE):
+                with open(KEYS_FILE, encoding='utf-8') as f:
+                    config = json.load(f)
+                entries = config['keys'] if isinstance(config, dict) else config
+                pool = KeyPool(entries)
+                if len(pool):
+                    _pool = pool
+                    atexit.register(lambda: print(f"\n[서비스 키 사용량]\n{pool.summary()}"))
+        return _pool
@@ -1,18 +1,28 @@
-import requests
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 import xml.etree.ElementTree as ET
 import os
 import time
 
+from delta_export import export_delta
+from g2b_export import dedup_latest, write_rows
+from g2b_trace import run_main, span
+from g2b_windows import recent_windows
+from institution_index import InstitutionIndex, item_to_dict
+from raw_archive import http_get
+
 # === [설정] 서비스 키 입력 ===
 SERVICE_KEY = ""
 
+# === [설정] 변경분만 저장 ===
+# True: 이전 실행 이후 새로 올라오거나 변경(정정)된 공고만 저장 / False: 기존처럼 전체 저장
+DELTA_EXPORT = True
+
 
 class G2BAPIClient:
-    def __init__(self, service_key):
+    def __init__(self, service_key, instt_index=None):
         self.base_url = "http://apis.data.go.kr/1230000/ad/BidPublicInfoService/getBidPblancListInfoThngPPSSrch"
         self.service_key = service_key
+        self.instt_index = instt_index  # 받은 공고의 원본 행을 함께 적재할 기관 인덱스 (선택)
 
     def fetch_bid_notices(self, search_params):
         """API 1회 호출"""
@@ -29,12 +39,13 @@ class G2BAPIClient:
             params['bidNtceNm'] = search_params['bidNtceNm']
 
         try:
-            response = requests.get(self.base_url, params=params, timeout=30)
+            response = http_get(self.base_url, params)
             if response.status_code != 200:
                 print(f"  [HTTP 오류] {response.status_code}")
                 return []
 
-            root = ET.fromstring(response.content)
+            with span('xml', cpu=True, bytes=len(response.content)):
+                root = ET.fromstring(response.content)
             result_code = root.find('.//resultCode').text if root.find('.//resultCode') is not None else None
 
             if result_code != '00':
@@ -46,7 +57,11 @@ class G2BAPIClient:
                 return []
 
             items = root.findall('.//item')
-            return self._parse_items(items)
+            # 출력용으로 줄인 행이 아닌 원본 태그 전체를 기관 인덱스에 적재 (기관 조회/로컬 검색에 재사용)
+            if self.instt_index is not None:
+                self.instt_index.ingest([item_to_dict(item) for item in items], '물품')
+            with span('parse_items', cpu=True, rows=len(items)):
+                return self._parse_items(items)
 
         except Exception as e:
             print(f"  [시스템 오류] {e}")
@@ -57,6 +72,7 @@ class G2BAPIClient:
         for item in items:
             data = {
                 'bidNtceNo': self._get_text(item, 'bidNtceNo'),
+                'bidNtceOrd': self._get_text(item, 'bidNtceOrd'),
                 'rgstTyNm': self._get_text(item, 'rgstTyNm'),
                 'ntceKindNm': self._get_text(item, 'ntceKindNm'),
                 'bidNtceDt': self._get_text(item, 'bidNtceDt'),
@@ -66,7 +82,9 @@ class G2BAPIClient:
                 'ntceInsttOfclNm': self._get_text(item, 'ntceInsttOfclNm'),
                 'ntceInsttOfclTelNo': self._get_text(item, 'ntceInsttOfclTelNo'),
                 'bidClseDt': self._get_text(item, 'bidClseDt'),
-                'opengDt': self._get_text(item, 'opengDt')
+                'opengDt': self._get_text(item, 'opengDt'),
+                'chgDt': self._get_text(item, 'chgDt'),
+                'chgNtceRsn': self._get_text(item, 'chgNtceRsn')
             }
             result.append(data)
         return result
@@ -99,63 +117,47 @@ class G2BAPIClient:
 
 def get_automatic_date_ranges():
     """
-    [수정됨] 오늘 기준으로 최근 2주간의 날짜 범위를 생성
+    오늘 기준으로 최근 2주를 포함하는 날짜 범위를 생성
+    (달력 기준 반월 구간으로 나누어 지난 구간은 실행마다 같은 요청이 되도록 함)
     """
-    now = datetime.now()
-
-    # 시작일: 오늘로부터 2주(14일) 전
-    start_date = (now - timedelta(weeks=2)).replace(hour=0, minute=0, second=0, microsecond=0)
-    end_date = now
-
-    ranges = []
-    current_start = start_date
-
-    # 2주 기간이라도 월이 바뀔 수 있으므로 30일 단위 끊기 로직은 유지 (안전장치)
-    while current_start < end_date:
-        current_end = current_start + timedelta(days=29)
-
-        if current_end > end_date:
-            current_end = end_date
-
-        str_start = current_start.strftime('%Y%m%d%H%M')
-        str_end = current_end.strftime('%Y%m%d%H%M')
-
-        ranges.append((str_start, str_end))
-        current_start = current_end + timedelta(minutes=1)
-
-    return ranges
-
-
-def save_to_excel(df):
-    if df.empty:
+    return recent_windows(14)
+
+
+EXPORT_COLUMNS = {
+    'bidNtceNo': '공고번호',
+    'rgstTyNm': '등록유형',
+    'ntceKindNm': '공고종류',
+    'bidNtceDt': '공고일시',
+    'bidNtceNm': '공고명',
+    'ntceInsttNm': '공고기관',
+    'dminsttNm': '수요기관',
+    'ntceInsttOfclNm': '담당자',
+    'ntceInsttOfclTelNo': '전화번호',
+    'bidClseDt': '마감일시',
+    'opengDt': '개찰일시'
+}
+
+
+def save_to_excel(rows):
+    if not rows:
         print("저장할 데이터가 없습니다.")
         return
 
-    col_map = {
-        'bidNtceNo': '공고번호',
-        'rgstTyNm': '등록유형',
-        'ntceKindNm': '공고종류',
-        'bidNtceDt': '공고일시',
-        'bidNtceNm': '공고명',
-        'ntceInsttNm': '공고기관',
-        'dminsttNm': '수요기관',
-        'ntceInsttOfclNm': '담당자',
-        'ntceInsttOfclTelNo': '전화번호',
-        'bidClseDt': '마감일시',
-        'opengDt': '개찰일시'
-    }
-
-    # 필요한 컬럼만 선택 및 이름 변경
-    save_df = df[list(col_map.keys())].rename(columns=col_map)
-
     # 엑셀 파일명 생성 (오늘 날짜 포함)
     today_str = datetime.now().strftime('%Y-%m-%d')
+
+    if DELTA_EXPORT:
+        filename = f'IT장비_입찰공고_변경분({today_str}).xlsx'
+        export_delta('notices', rows, ['bidNtceNo', 'bidNtceOrd'], EXPORT_COLUMNS, filename)
+        return
+
     filename = f'IT장비_입찰공고_최근2주({today_str}).xlsx'
 
     try:
-        save_df.to_excel(filename, index=False)
+        # 필요한 컬럼만 선택 및 이름 변경하여 저장
+        write_rows(rows, EXPORT_COLUMNS, filename)
         print(f"\n[성공] 엑셀 저장 완료: {filename}")
-        print(f"총 공고 수: {len(save_df)}건")
+        print(f"총 공고 수: {len(rows)}건")
     except PermissionError:
         print(f"\n[오류] '{filename}' 파일이 이미 열려있습니다. 파일을 닫고 다시 실행해주세요.")
     except Exception as e:
@@ -163,7 +165,7 @@ def save_to_excel(df):
 
 
 def main():
-    client = G2BAPIClient(SERVICE_KEY)
+    client = G2BAPIClient(SERVICE_KEY, InstitutionIndex())
     # 검색하고 싶은 키워드 리스트
     target_keywords = ["서버", "GPU", "렌탈", "워크스테이션", "임대", "RISE", "혁신"]
 
@@ -193,14 +195,13 @@ def main():
                 print(f"  > 데이터 없음")
 
     if all_results:
-        df = pd.DataFrame(all_results)
-        # 공고번호 기준 중복 제거
-        df_unique = df.drop_duplicates(subset=['bidNtceNo'])
-        print(f"\n[최종 집계] 중복 제거 후 총 {len(df_unique)}건")
-        save_to_excel(df_unique)
+        # 공고번호 기준 중복 제거 (같은 공고번호는 가장 높은 차수(정정공고)를 남겨 변경분 분류에 반영)
+        unique_rows = dedup_latest(all_results, ['bidNtceNo'], 'bidNtceOrd')
+        print(f"\n[최종 집계] 중복 제거 후 총 {len(unique_rows)}건")
+        save_to_excel(unique_rows)
     else:
         print("\n최근 2주간 해당 키워드로 조회된 공고가 없습니다.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run_main(main)
\ No newline at end of file
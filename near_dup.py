@@ -0,0 +1,257 @@
+import hashlib
+import json
+import re
+import struct
+import sys
+import time
+import unicodedata
+from datetime import date, datetime
+
+from g2b_export import write_rows
+from g2b_trace import run_main, span
+from g2b_windows import normalize_dt
+from institution_index import InstitutionIndex
+
+# === [설정] 유사 공고(재공고) 묶기 ===
+NGRAM = 3                 # 공고명 문자 n-gram 길이
+NUM_PERM = 64             # MinHash 서명 길이
+BANDS = 16                # LSH 밴드 수 (밴드당 NUM_PERM / BANDS개 해시, 밴드가 많을수록 후보를 넓게 잡음)
+SIMILARITY = 0.7          # 공고명 n-gram 자카드 유사도가 이 값 이상이면 같은 묶음
+MAX_DAYS_APART = 90       # 공고일 차이가 이보다 큰 쌍은 묶지 않음 (0이면 제한 없음)
+MAX_BUCKET_COMPARE = 8    # 버킷마다 공고 하나와 비교할 직전 공고 수 상한
+
+# 재공고 시 공고명에 붙는 표시 (비교 전에 제거)
+# 괄호로 감싼 경우([재공고], (긴급) 등)와 공고명 맨 앞/뒤의 독립된 단어인 경우만 제거 ('수정구청', '시스템 변경 관리'는 유지)
+REPOST_MARKERS = ('재공고', '재입찰', '긴급', '정정', '수정', '변경')
+
+CLUSTER_COLUMNS = {'clusterId': '유사공고묶음', 'clusterSize': '묶음건수'}
+RESULT_COLUMNS = {
+    'clusterId': '유사공고묶음',
+    'clusterSize': '묶음건수',
+    'bizType': '업무구분',
+    'bidNtceNo': '입찰공고번호',
+    'bidNtceOrd': '입찰공고차수',
+    'bidNtceDt': '입찰공고일시',
+    'bidNtceNm': '입찰공고명',
+    'ntceInsttNm': '공고기관명',
+    'dminsttNm': '수요기관명'
+}
+
+# n-gram 하나당 SHAKE-128 출력을 NUM_PERM개의 32비트 정수로 나누어 해시 함수 NUM_PERM개로 사용
+_unpack_hashes = struct.Struct(f'<{NUM_PERM}I').unpack
+
+_MARKER = '|'.join(map(re.escape, REPOST_MARKERS))
+_MARKER_PATTERNS = (
+    re.compile(rf"[\[(<【〔]\s*(?:(?:{_MARKER})[\s,·/]*)+[\])>】〕]"),   # [재공고], (긴급 재입찰)
+    re.compile(rf"^(?:{_MARKER})(?=[\W_]|$)"),                          # 재공고 ○○ 구매
+    re.compile(rf"(?:^|(?<=[\W_]))(?:{_MARKER})$"),                      # ○○ 구매 재공고
+)
+
+
+def normalize_title(title):
+    """공고명 정규화: 전각/반각 통일, 소문자, 재공고 표시(괄호 안 또는 맨 앞/뒤 단어)/공백/구두점 제거"""
+    title = unicodedata.normalize('NFKC', title or '').lower().strip()
+    stripped = None
+    while stripped != title:  # '[긴급] 재공고 ○○'처럼 표시가 여러 개 붙은 경우
+        stripped = title
+        for pattern in _MARKER_PATTERNS:
+            title = pattern.sub('', title).strip()
+    return re.sub(r"[\W_]", '', title)
+
+
+def shingles(norm_title):
+    """정규화된 공고명 -> 문자 n-gram 집합 (n보다 짧으면 제목 전체 하나)"""
+    if len(norm_title) <= NGRAM:
+        return {norm_title}
+    return {norm_title[i:i + NGRAM] for i in range(len(norm_title) - NGRAM + 1)}
+
+
+def _hashes(gram):
+    return _unpack_hashes(hashlib.shake_128(gram.encode('utf-8')).digest(NUM_PERM * 4))
+
+
+def minhash(grams):
+    """n-gram 집합 -> MinHash 서명 (해시 함수마다 n-gram 해시값의 최솟값)"""
+    return tuple(map(min, zip(*[_hashes(gram) for gram in grams])))
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def block_key(row):
+    """비교 범위(블록): 수요기관코드 (없으면 공고기관코드), 같은 블록 안에서만 유사도를 비교"""
+    return row.get('dminsttCd') or row.get('ntceInsttCd') or ''
+
+
+def _day(row):
+    dt = normalize_dt(row.get('bidNtceDt', ''))
+    return date(int(dt[:4]), int(dt[4:6]), int(dt[6:8])).toordinal() if dt else 0
+
+
+class _UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+
+def cluster_rows(rows):
+    """
+    유사 공고 묶기 -> 행과 같은 순서의 묶음 번호 목록 (묶음 안에서 가장 먼저 게시된 공고번호)
+    - 블록(기관)별로 MinHash 서명을 밴드로 나누어 같은 밴드 값을 가진 공고만 후보로 비교 (LSH)
+    - 공고일 순으로 버킷에 넣으면서 밴드마다 같은 버킷의 직전 공고 최대 MAX_BUCKET_COMPARE개를 후보로 모음
+      (밴드 간 중복 후보와 이미 같은 묶음인 후보는 한 번만/생략, 같은 제목이 수백 번 올라와도 비교 횟수가 선형)
+    - 후보 쌍은 실제 n-gram 자카드 유사도와 공고일 차이로 확인한 뒤 묶음으로 합침 (공고번호가 같은 쌍은 제외)
+    - 정규화 후 빈 공고명(공고명 없음, 구두점/재공고 표시만 있음)은 비교하지 않고 단독 묶음으로 둠
+    전체 처리 시간은 행 수와 후보 쌍 수에 비례
+    """
+    rows_per_band = NUM_PERM // BANDS
+    days = [_day(row) for row in rows]
+    uf = _UnionFind(len(rows))
+
+    blocks = {}
+    for i, row in enumerate(rows):
+        blocks.setdefault(block_key(row), []).append(i)
+
+    signatures = {}  # 정규화된 공고명 -> (n-gram 집합, 서명), 같은 제목은 한 번만 계산
+    with span('near_dup', cpu=True, rows=len(rows), blocks=len(blocks)) as s:
+        compared = 0
+        for members in blocks.values():
+            if len(members) < 2:
+                continue
+            titles = {}
+            buckets = {}
+            for cur in sorted(members, key=days.__getitem__):
+                norm = normalize_title(rows[cur].get('bidNtceNm', ''))
+                if not norm:
+                    continue
+                if norm not in signatures:
+                    grams = shingles(norm)
+                    signatures[norm] = (grams, minhash(grams))
+                titles[cur] = norm
+                grams, signature = signatures[norm]
+
+                candidates = set()
+                keys = [(band, signature[band * rows_per_band:(band + 1) * rows_per_band]) for band in range(BANDS)]
+                for key in keys:
+                    bucket = buckets.get(key)
+                    if bucket:
+                        candidates.update(bucket[-MAX_BUCKET_COMPARE:])
+
+                tried = set()
+                for prev in sorted(candidates, key=days.__getitem__, reverse=True):
+                    if MAX_DAYS_APART and days[cur] - days[prev] > MAX_DAYS_APART:
+                        break
+                    root = uf.find(prev)
+                    if root in tried or root == uf.find(cur) or \
+                            rows[prev].get('bidNtceNo') == rows[cur].get('bidNtceNo'):
+                        continue
+                    tried.add(root)
+                    compared += 1
+                    if titles[prev] == norm or jaccard(signatures[titles[prev]][0], grams) >= SIMILARITY:
+                        uf.union(prev, cur)
+
+                for key in keys:
+                    buckets.setdefault(key, []).append(cur)
+        s.set(compared=compared)
+
+    # 묶음 번호: 묶음 안에서 공고일이 가장 빠른 공고의 공고번호
+    first = {}
+    for i in range(len(rows)):
+        root = uf.find(i)
+        if root not in first or days[i] < days[first[root]]:
+            first[root] = i
+    return [rows[first[uf.find(i)]].get('bidNtceNo', '') for i in range(len(rows))]
+
+
+def tag_clusters(rows):
+    """각 행에 묶음 번호(clusterId)와 묶음 건수(clusterSize)를 붙인 행 목록"""
+    rows = list(rows)
+    labels = cluster_rows(rows)
+    sizes = {}
+    for label in labels:
+        sizes[label] = sizes.get(label, 0) + 1
+    return [dict(row, clusterId=label, clusterSize=sizes[label]) for row, label in zip(rows, labels)]
+
+
+def collapse_clusters(rows):
+    """묶음마다 가장 최근 공고 한 건만 남긴 행 목록 (clusterSize에 묶인 공고 수)"""
+    latest = {}
+    for row in tag_clusters(rows):
+        kept = latest.get(row['clusterId'])
+        if kept is None or normalize_dt(row.get('bidNtceDt', '')) > normalize_dt(kept.get('bidNtceDt', '')):
+            latest[row['clusterId']] = row
+    return list(latest.values())
+
+
+def apply_mode(rows, mode):
+    """mode: 'tag'(묶음 번호 추가) / 'collapse'(묶음별 대표 1건) / 그 외(그대로)"""
+    if mode == 'tag':
+        return tag_clusters(rows)
+    if mode == 'collapse':
+        return collapse_clusters(rows)
+    return rows
+
+
+def load_notices(index, bgn_dt, end_dt):
+    """기관 인덱스에 적재된 기간 내 공고 (공고번호별 가장 높은 차수만)"""
+    latest = {}
+    cursor = index.conn.execute(
+        "SELECT bid_ntce_no, bid_ntce_ord, data FROM notices WHERE bid_ntce_dt BETWEEN ? AND ?", (bgn_dt, end_dt)
+    )
+    for r in cursor:
+        kept = latest.get(r['bid_ntce_no'])
+        if kept is None or r['bid_ntce_ord'] > kept[0]:
+            latest[r['bid_ntce_no']] = (r['bid_ntce_ord'], r['data'])
+    return [json.loads(data) for _, data in latest.values()]
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("사용법: python near_dup.py 시작일 종료일 [대표]   (예: python near_dup.py 2025-01-01 2025-06-30)")
+        print("  로컬 기관 인덱스의 공고를 유사 공고(재공고) 묶음으로 나누어 저장, '대표'를 붙이면 묶음별 최신 1건만 저장")
+        return
+
+    start_str, end_str = sys.argv[1], sys.argv[2]
+    mode = 'collapse' if '대표' in sys.argv[3:] else 'tag'
+    bgn_dt = datetime.strptime(start_str, "%Y-%m-%d").strftime('%Y%m%d0000')
+    end_dt = datetime.strptime(end_str, "%Y-%m-%d").strftime('%Y%m%d2359')
+
+    rows = load_notices(InstitutionIndex(), bgn_dt, end_dt)
+    if not rows:
+        print("기간 내 로컬 기관 인덱스에 적재된 공고가 없습니다.")
+        return
+
+    started = time.perf_counter()
+    result = apply_mode(rows, mode)
+    elapsed = time.perf_counter() - started
+
+    clusters = len({row['clusterId'] for row in result})
+    grouped = sum(1 for row in result if row['clusterSize'] > 1)
+    print(f"공고 {len(rows)}건 -> 묶음 {clusters}개 ({elapsed:.1f}초)")
+    if mode == 'tag':
+        print(f"  2건 이상 묶인 공고: {grouped}건")
+        result.sort(key=lambda row: (row['clusterId'], normalize_dt(row.get('bidNtceDt', ''))))
+
+    suffix = '대표' if mode == 'collapse' else '묶음'
+    filename = f"유사공고{suffix}_{start_str}_to_{end_str}.xlsx"
+    try:
+        write_rows(result, RESULT_COLUMNS, filename)
+        print(f"[성공] 엑셀 저장 완료: {filename}")
+    except PermissionError:
+        print(f"[오류] '{filename}' 파일이 이미 열려있습니다. 파일을 닫고 다시 실행해주세요.")
+
+
+if __name__ == "__main__":
+    run_main(main)
@@ -0,0 +1,266 @@
+import json
+import re
+import sys
+import time
+import unicodedata
+
+import g2b_db
+from g2b_export import write_rows
+from g2b_trace import run_main
+from g2b_windows import normalize_dt
+from institution_index import InstitutionIndex
+
+# 검색 결과 출력 컬럼 (공고/사전규격 공통)
+RESULT_COLUMNS = {
+    'kind': '구분',
+    'key': '공고번호/사전규격번호',
+    'bizType': '업무구분',
+    'title': '공고명/품명',
+    'instt': '기관',
+    'dt': '공고/접수일시'
+}
+
+
+def to_bigrams(text):
+    """
+    한국어 복합명사(띄어쓰기 없음)를 위한 2-gram 토큰화
+    공백/구두점을 제거한 뒤 연속된 두 글자씩 자르고, 마지막 글자는 1-gram으로 추가
+    ('서버 구매' -> '서버 버구 구매 매')
+    """
+    text = re.sub(r"[\W_]", '', unicodedata.normalize('NFKC', text or '').lower())
+    if not text:
+        return ''
+    grams = [text[i:i + 2] for i in range(len(text) - 1)]
+    grams.append(text[-1])
+    return ' '.join(grams)
+
+
+def term_to_match(term):
+    """검색어 1개를 FTS5 MATCH 구문으로 변환 (2글자 이상은 연속 2-gram 구문, 1글자는 접두어 검색)"""
+    column = ''
+    if ':' in term:
+        prefix, rest = term.split(':', 1)
+        if prefix in ('title', 'product', 'instt') and rest:
+            column, term = f"{prefix} : ", rest
+
+    grams = to_bigrams(term).split()
+    if not grams:
+        return None
+    if len(grams) == 1:
+        return f'{column}"{grams[0]}"*'
+    # 마지막 1-gram은 구문 연속성 확인에 불필요
+    return column + '"' + ' '.join(grams[:-1]) + '"'
+
+
+def build_match_query(query):
+    """
+    검색식 -> FTS5 MATCH 식
+    - 공백으로 구분된 검색어는 AND, 대문자 AND / OR / NOT, 괄호 지원
+    - '-검색어'는 제외 조건, "따옴표"는 공백 포함 구문
+    - title: / product: / instt: 접두어로 검색 항목 지정 가능
+    """
+    tokens = re.findall(r'\(|\)|-?"[^"]*"|[^\s()]+', query)
+
+    parts = []
+    excludes = []
+    for token in tokens:
+        if token in ('(', ')', 'AND', 'OR', 'NOT'):
+            parts.append(token)
+            continue
+
+        exclude = token.startswith('-') and len(token) > 1
+        term = token[1:] if exclude else token
+        match = term_to_match(term.strip('"'))
+        if match is None:
+            continue
+        if exclude:
+            excludes.append(match)
+        else:
+            parts.append(match)
+
+    positive = ' '.join(parts).strip()
+    if not positive:
+        raise ValueError("제외 조건 외에 검색어가 하나 이상 필요합니다.")
+    if excludes:
+        return f"({positive}) NOT ({' OR '.join(excludes)})"
+    return positive
+
+
+class NoticeSearchIndex:
+    """
+    수집된 공고명(bidNtceNm) / 품명(prdctClsfcNoNm) / 기관명 대상 로컬 전문 검색 (SQLite FTS5, 2-gram)
+    로컬 기관 인덱스(notices 테이블)와 사전규격 수집 결과를 원본으로 사용
+    """
+
+    def __init__(self, db_path=None):
+        # 기관 인덱스와 같은 DB 연결 사용 (notices 테이블 생성 보장)
+        self.conn = InstitutionIndex(db_path).conn
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS fts_docs (
+                id INTEGER PRIMARY KEY,
+                doc_key TEXT NOT NULL UNIQUE,
+                kind TEXT NOT NULL,
+                biz_type TEXT NOT NULL DEFAULT '',
+                title TEXT NOT NULL DEFAULT '',
+                instt TEXT NOT NULL DEFAULT '',
+                doc_dt TEXT NOT NULL DEFAULT '',
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_fts_docs_dt ON fts_docs (doc_dt);
+            CREATE VIRTUAL TABLE IF NOT EXISTS fts_text USING fts5 (
+                title, product, instt, tokenize = 'unicode61'
+            );
+            """
+        )
+
+    def _upsert(self, doc_key, kind, biz_type, title, product, instt, doc_dt, row):
+        existing = self.conn.execute("SELECT id FROM fts_docs WHERE doc_key = ?", (doc_key,)).fetchone()
+        if existing:
+            self.conn.execute("DELETE FROM fts_text WHERE rowid = ?", (existing['id'],))
+            self.conn.execute("DELETE FROM fts_docs WHERE id = ?", (existing['id'],))
+
+        cur = self.conn.execute(
+            "INSERT INTO fts_docs (doc_key, kind, biz_type, title, instt, doc_dt, data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (doc_key, kind, biz_type, title, instt, doc_dt, json.dumps(row, ensure_ascii=False))
+        )
+        self.conn.execute(
+            "INSERT INTO fts_text (rowid, title, product, instt) VALUES (?, ?, ?, ?)",
+            (cur.lastrowid, to_bigrams(title), to_bigrams(product), to_bigrams(instt))
+        )
+
+    def sync_notices(self):
+        """로컬 기관 인덱스(notices)에 새로 적재/갱신된 공고만 검색 인덱스에 반영"""
+        last_rowid = int(g2b_db.get_sync_state(self.conn, 'fts', 'notices') or 0)
+        cursor = self.conn.execute(
+            "SELECT rowid, biz_type, data FROM notices WHERE rowid > ? ORDER BY rowid", (last_rowid,)
+        )
+
+        count = 0
+        with self.conn:
+            for r in cursor.fetchall():
+                row = json.loads(r['data'])
+                instt = ' '.join(n for n in dict.fromkeys([row.get('ntceInsttNm', ''), row.get('dminsttNm', '')]) if n)
+                self._upsert(
+                    f"notice:{row.get('bidNtceNo', '')}-{row.get('bidNtceOrd', '')}", 'notice',
+                    row.get('bizType', r['biz_type']), row.get('bidNtceNm', ''), row.get('prdctClsfcNoNm', ''),
+                    instt, normalize_dt(row.get('bidNtceDt', '')), row
+                )
+                last_rowid = r['rowid']
+                count += 1
+            g2b_db.set_sync_state(self.conn, 'fts', 'notices', f"{last_rowid:012d}")
+        return count
+
+    def add_specs(self, rows):
+        """사전규격 수집 결과(PRE2.py 행) 반영"""
+        with self.conn:
+            for row in rows:
+                if not row.get('bfSpecRgstNo'):
+                    continue
+                instt = ' '.join(n for n in dict.fromkeys([row.get('orderInsttNm', ''), row.get('rlDminsttNm', '')]) if n)
+                self._upsert(
+                    f"spec:{row['bfSpecRgstNo']}", 'spec', row.get('bsnsDivNm', ''),
+                    row.get('prdctClsfcNoNm', ''), row.get('prdctClsfcNoNm', ''),
+                    instt, normalize_dt(row.get('rcptDt', '')), row
+                )
+        return len(rows)
+
+    def search(self, query, kind=None, bgn_dt=None, end_dt=None, limit=None):
+        """검색식으로 조회 (최근 일시 순), kind: 'notice' / 'spec' / None(전체)"""
+        sql = (
+            "SELECT d.kind, d.doc_key, d.biz_type, d.title, d.instt, d.doc_dt, d.data "
+            "FROM fts_text JOIN fts_docs d ON d.id = fts_text.rowid WHERE fts_text MATCH ?"
+        )
+        params = [build_match_query(query)]
+        if kind:
+            sql += " AND d.kind = ?"
+            params.append(kind)
+        if bgn_dt:
+            sql += " AND d.doc_dt >= ?"
+            params.append(bgn_dt)
+        if end_dt:
+            sql += " AND d.doc_dt <= ?"
+            params.append(end_dt)
+        sql += " ORDER BY d.doc_dt DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+
+        return [
+            {
+                'kind': '사전규격' if r['kind'] == 'spec' else '입찰공고',
+                'key': r['doc_key'].split(':', 1)[1],
+                'bizType': r['biz_type'],
+                'title': r['title'],
+                'instt': r['instt'],
+                'dt': r['doc_dt'],
+                'data': json.loads(r['data'])
+            }
+            for r in self.conn.execute(sql, params)
+        ]
+
+
+def save_to_excel(rows, query):
+    if not rows:
+        print("저장할 데이터가 없습니다.")
+        return
+
+    safe_query = re.sub(r'[\\/:*?"<>|]', '_', query)[:50]
+    filename = f'로컬검색_{safe_query}.xlsx'
+
+    try:
+        write_rows(rows, RESULT_COLUMNS, filename)
+        print(f"[성공] 엑셀 저장 완료: {filename} ({len(rows)}건)")
+    except PermissionError:
+        print(f"[오류] '{filename}' 파일이 이미 열려있습니다. 파일을 닫고 다시 실행해주세요.")
+    except Exception as e:
+        print(f"[오류] 엑셀 저장 중 문제가 발생했습니다: {e}")
+
+
+def main():
+    print("=== 수집 데이터 로컬 검색 (API 호출 없음) ===")
+
+    index = NoticeSearchIndex()
+    synced = index.sync_notices()
+    if synced:
+        print(f"검색 인덱스 갱신: {synced}건")
+
+    queries = sys.argv[1:]
+    interactive = not queries
+    print("검색식 예: 서버 AND (GPU OR 워크스테이션) -임대 / instt:조달청 렌탈 (끝에 '>저장' 입력 시 엑셀 저장)")
+
+    while True:
+        if interactive:
+            query = input("\n검색식 (종료: 엔터): ").strip()
+            if not query:
+                break
+        elif queries:
+            query = queries.pop(0)
+        else:
+            break
+
+        export = query.endswith('>저장')
+        query = query[:-3].strip() if export else query
+
+        try:
+            started = time.perf_counter()
+            rows = index.search(query)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        except ValueError as e:
+            print(f"[검색식 오류] {e}")
+            continue
+        except Exception as e:
+            print(f"[검색 오류] {e}")
+            continue
+
+        print(f"-> {len(rows)}건 ({elapsed_ms:.1f}ms)")
+        for row in rows[:20]:
+            print(f"  [{row['kind']}/{row['bizType']}] {row['dt'][:8]} {row['title']} ({row['instt']})")
+        if len(rows) > 20:
+            print(f"  ... 외 {len(rows) - 20}건")
+
+        if export:
+            save_to_excel(rows, query)
+
+
+if __name__ == "__main__":
+    run_main(main)
@@ -1,12 +1,18 @@
-import requests
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 import xml.etree.ElementTree as ET
 import os
 import time
 
+from g2b_export import dedup_rows, write_rows
+from g2b_trace import run_main, span
+from g2b_windows import recent_windows
+from raw_archive import http_get
+
 # === [설정] 서비스 키 입력 ===
 SERVICE_KEY = ""
+
+# === [설정] 규격문서 다운로드 (doc_download.py) ===
+DOWNLOAD_DOCS = False   # True: 저장 후 규격문서파일URL1~5의 첨부 문서를 g2b_docs/에 받음
 class G2BPublicRangeClient:
     def __init__(self, service_key):
         # 사전규격정보서비스 베이스 URL [cite: 14]
@@ -39,12 +45,13 @@ class G2BPublicRangeClient:
         }
 
         try:
-            response = requests.get(url, params=params, timeout=30)
+            response = http_get(url, params)
             if response.status_code != 200:
                 print(f"  [{biz_type} HTTP 오류] {response.status_code}")
                 return []
 
-            root = ET.fromstring(response.content)
+            with span('xml', cpu=True, bytes=len(response.content)):
+                root = ET.fromstring(response.content)
             result_code = root.find('.//resultCode').text if root.find('.//resultCode') is not None else None
 
             if result_code != '00':
@@ -54,7 +61,8 @@ class G2BPublicRangeClient:
                 return []
 
             items = root.findall('.//item')
-            return self._parse_items(items)
+            with span('parse_items', cpu=True, rows=len(items)):
+                return self._parse_items(items)
 
         except Exception as e:
             print(f"  [{biz_type} 시스템 오류] {e}")
@@ -117,20 +125,14 @@ class G2BPublicRangeClient:
         return all_data
 
 def get_automatic_date_ranges():
-    """오늘 기준으로 최근 1개월(30일)의 날짜 범위를 생성"""
-    now = datetime.now()
-    # 2주(timedelta(weeks=2))에서 1개월(timedelta(days=30))로 변경
-    start_date = (now - timedelta(days=70)).replace(hour=0, minute=0)
-    end_date = now
-
-    ranges = []
-    str_start = start_date.strftime('%Y%m%d%H%M') # YYYYMMDDHHMM 형식 [cite: 20]
-    str_end = end_date.strftime('%Y%m%d%H%M')
-    ranges.append((str_start, str_end))
-    return ranges
-
-def save_to_excel(df):
-    if df.empty:
+    """
+    오늘 기준으로 최근 70일을 포함하는 날짜 범위를 생성
+    (달력 기준 반월 구간으로 나누어 지난 구간은 실행마다 같은 요청이 되도록 함)
+    """
+    return recent_windows(70)
+
+def save_to_excel(rows):
+    if not rows:
         print("저장할 데이터가 없습니다.")
         return
 
@@ -151,14 +153,13 @@ def save_to_excel(df):
         'rgstDt': '등록일시'
     }
 
-    save_df = df[list(col_map.keys())].rename(columns=col_map)
     today_str = datetime.now().strftime('%Y-%m-%d')
     filename = f'나라장터_사전규격_통합조회_1개월({today_str}).xlsx'
 
     try:
-        save_df.to_excel(filename, index=False)
+        write_rows(rows, col_map, filename)
         print(f"\n[성공] 엑셀 저장 완료: {filename}")
-        print(f"총 데이터 수: {len(save_df)}건")
+        print(f"총 데이터 수: {len(rows)}건")
     except Exception as e:
         print(f"\n[오류] 엑셀 저장 중 문제 발생: {e}")
 
@@ -168,7 +169,7 @@ def main():
     biz_types = ['물품', '외자', '용역', '공사']
 
     date_ranges = get_automatic_date_ranges()
-    start_dt, end_dt = date_ranges[0]
+    start_dt, end_dt = date_ranges[0][0], date_ranges[-1][1]
 
     print(f"조회 기간: {start_dt} ~ {end_dt} (최근 1개월)")
     print("사전규격 데이터 수집을 시작합니다...")
@@ -178,13 +179,15 @@ def main():
     for biz in biz_types:
         print(f"\n>>> [{biz}] 분야 검색 시작")
         for keyword in target_keywords:
-            params = {
-                'inqryBgnDt': start_dt,
-                'inqryEndDt': end_dt,
-                'numOfRows': 100,
-                'keyword': keyword
-            }
-            results = client.fetch_all_pages(biz, params)
+            results = []
+            for w_start, w_end in date_ranges:
+                params = {
+                    'inqryBgnDt': w_start,
+                    'inqryEndDt': w_end,
+                    'numOfRows': 100,
+                    'keyword': keyword
+                }
+                results.extend(client.fetch_all_pages(biz, params))
             if results:
                 all_results.extend(results)
                 print(f"  - '{keyword}': {len(results)}건 발견")
@@ -192,13 +195,15 @@ def main():
                 print(f"  - '{keyword}': 데이터 없음")
 
     if all_results:
-        df = pd.DataFrame(all_results)
         # 사전규격등록번호 기준 중복 제거 [cite: 23]
-        df_unique = df.drop_duplicates(subset=['bfSpecRgstNo'])
-        print(f"\n[최종 집계] 중복 제거 후 총 {len(df_unique)}건")
-        save_to_excel(df_unique)
+        unique_rows = dedup_rows(all_results, ['bfSpecRgstNo'])
+        print(f"\n[최종 집계] 중복 제거 후 총 {len(unique_rows)}건")
+        save_to_excel(unique_rows)
+        if DOWNLOAD_DOCS:
+            from doc_download import download_rows
+            download_rows(unique_rows)
     else:
         print("\n최근 1개월간 해당 키워드로 조회된 사전규격이 없습니다.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run_main(main)
\ No newline at end of file
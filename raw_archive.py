@@ -0,0 +1,302 @@
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import sys
+import threading
+import urllib.parse
+from datetime import datetime
+
+import requests
+
+import g2b_trace
+from g2b_windows import normalize_dt
+from key_pool import get_key_pool
+
+try:
+    import zstandard
+except ImportError:  # zstandard가 없으면 gzip으로 압축
+    zstandard = None
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# === [설정] 원본 응답 아카이브 ===
+ARCHIVE_DIR = "g2b_archive"
+ARCHIVE_ENABLED = True
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024   # 세그먼트 파일 최대 크기 (초과 시 새 파일)
+
+# 재파싱(replay) 모드: G2B_REPLAY=1 이면 네트워크 호출 없이 아카이브의 응답만 사용
+REPLAY = os.environ.get('G2B_REPLAY', '') not in ('', '0')
+
+# 요청 키에서 제외할 파라미터 (서비스 키는 아카이브에 남기지 않음)
+EXCLUDED_PARAMS = {'ServiceKey', 'serviceKey'}
+
+
+def request_key(url, params):
+    """요청 URL + 파라미터(서비스 키 제외)로 만든 고정 키"""
+    normalized = sorted((k, str(v)) for k, v in params.items() if k not in EXCLUDED_PARAMS)
+    return hashlib.sha1(json.dumps([url, normalized], ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class ArchivedResponse:
+    """아카이브에서 꺼낸 응답 (requests.Response 중 수집기가 쓰는 속성만 제공)"""
+
+    def __init__(self, content, status_code=200):
+        self.content = content
+        self.status_code = status_code
+
+
+class _FileLock:
+    """
+    같은 아카이브 폴더를 쓰는 프로세스 사이의 배타 잠금 (백필 작업자 여러 개, all_88.py와 GetMail.py 동시 실행 등)
+    threading.Lock은 한 프로세스 안에서만 유효하므로, 세그먼트 선택 -> 끝에 기록 -> 인덱스 갱신을 이 잠금으로 묶음
+    """
+
+    def __init__(self, path):
+        self._f = open(path, 'a+b')
+
+    def __enter__(self):
+        if fcntl is not None:
+            fcntl.flock(self._f.fileno(), fcntl.LOCK_EX)
+            return self
+        self._f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(self._f.fileno(), msvcrt.LK_LOCK, 1)
+                return self
+            except OSError:  # LK_LOCK은 약 10초 대기 후 실패하므로 다시 시도
+                continue
+
+    def __exit__(self, exc_type, exc, tb):
+        if fcntl is not None:
+            fcntl.flock(self._f.fileno(), fcntl.LOCK_UN)
+        else:
+            self._f.seek(0)
+            msvcrt.locking(self._f.fileno(), msvcrt.LK_UNLCK, 1)
+        return False
+
+
+class RawArchive:
+    """
+    API 원본 응답 보관소
+    - 응답 본문을 압축해서 세그먼트 파일(segment_00001.log ...) 끝에 계속 추가 (기존 내용은 수정하지 않음)
+    - 요청 키 -> (세그먼트, 오프셋, 길이) 인덱스는 SQLite에 저장, 같은 요청을 다시 받으면 최신 기록을 가리킴
+    - 읽기는 세그먼트 파일을 메모리 매핑하여 오프셋으로 바로 접근
+    """
+
+    def __init__(self, archive_dir=None):
+        self.archive_dir = archive_dir or ARCHIVE_DIR
+        os.makedirs(self.archive_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file_lock = _FileLock(os.path.join(self.archive_dir, 'archive.lock'))
+        self._maps = {}
+        self._index = sqlite3.connect(os.path.join(self.archive_dir, 'index.db'), timeout=30,
+                                      check_same_thread=False)
+        self._index.execute("PRAGMA journal_mode=WAL")
+        self._index.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            " request_key TEXT PRIMARY KEY, url TEXT NOT NULL, params TEXT NOT NULL,"
+            " segment TEXT NOT NULL, offset INTEGER NOT NULL, length INTEGER NOT NULL,"
+            " codec TEXT NOT NULL, fetched_at TEXT NOT NULL)"
+        )
+        self._index.execute("CREATE INDEX IF NOT EXISTS idx_records_url ON records (url)")
+
+    def _current_segment(self):
+        segments = sorted(f for f in os.listdir(self.archive_dir) if f.startswith('segment_'))
+        if segments:
+            last = segments[-1]
+            if os.path.getsize(os.path.join(self.archive_dir, last)) < SEGMENT_MAX_BYTES:
+                return last
+            number = int(last[len('segment_'):-len('.log')]) + 1
+        else:
+            number = 1
+        return f"segment_{number:05d}.log"
+
+    def put(self, url, params, content):
+        """응답 본문을 압축하여 세그먼트 끝에 추가하고 인덱스 갱신"""
+        if zstandard is not None:
+            codec, data = 'zstd', zstandard.ZstdCompressor(level=10).compress(content)
+        else:
+            codec, data = 'gzip', gzip.compress(content, compresslevel=6)
+
+        stored_params = {k: str(v) for k, v in params.items() if k not in EXCLUDED_PARAMS}
+        with self._lock, self._file_lock:
+            segment = self._current_segment()
+            with open(os.path.join(self.archive_dir, segment), 'ab') as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(data)
+            with self._index:
+                self._index.execute(
+                    "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (request_key(url, params), url, json.dumps(stored_params, ensure_ascii=False),
+                     segment, offset, len(data), codec, datetime.now().strftime('%Y%m%d%H%M%S'))
+                )
+
+    def _read(self, segment, offset, length, codec):
+        with self._lock:
+            mapped = self._maps.get(segment)
+            if mapped is None or offset + length > len(mapped):
+                # 새 세그먼트이거나 매핑 이후 뒤에 기록이 추가된 경우 다시 매핑
+                if mapped is not None:
+                    mapped.close()
+                with open(os.path.join(self.archive_dir, segment), 'rb') as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[segment] = mapped
+            data = mapped[offset:offset + length]
+
+        if codec == 'zstd':
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def get(self, url, params):
+        """요청에 해당하는 응답 본문 (없으면 None)"""
+        with self._lock:
+            row = self._index.execute(
+                "SELECT segment, offset, length, codec FROM records WHERE request_key = ?",
+                (request_key(url, params),)
+            ).fetchone()
+        return self._read(*row) if row else None
+
+    def iter_records(self, url_suffix=''):
+        """보관된 (URL, 파라미터, 응답 본문) 전체 순회 (URL 끝부분으로 오퍼레이션 필터)"""
+        with self._lock:
+            rows = self._index.execute(
+                "SELECT url, params, segment, offset, length, codec FROM records ORDER BY segment, offset"
+            ).fetchall()
+        for url, params, segment, offset, length, codec in rows:
+            if url.endswith(url_suffix):
+                yield url, json.loads(params), self._read(segment, offset, length, codec)
+
+    def stats(self):
+        count, size = self._index.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM records").fetchone()
+        return count, size
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_archive():
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = RawArchive()
+        return _archive
+
+
+def _redact(text, query, pool):
+    """예외 메시지(요청 URL 포함)에서 서비스 키 제거"""
+    key = str(query.get('ServiceKey', ''))
+    if key:
+        for form in (key, urllib.parse.quote(key, safe=''), urllib.parse.quote_plus(key)):
+            text = text.replace(form, '<서비스키>')
+    return pool.redact(text) if pool else text
+
+
+def http_get(url, params, session=None, timeout=30):
+    """
+    모든 수집기가 사용하는 API 호출 지점
+    - 일반 모드: 호출 후 정상 응답(HTTP 200)을 아카이브에 보관
+    - 서비스 키 풀(service_keys.json)이 있으면 키를 배정받아 호출하고, 한도/인증 오류 시 다른 키로 재시도
+    - 재파싱 모드(G2B_REPLAY=1): 네트워크 호출 없이 아카이브에서 응답 반환 (없으면 HTTP 404로 처리)
+    - --profile 실행 시 (오퍼레이션, 기간, 페이지)별 호출 구간을 기록
+    """
+    with g2b_trace.span('http', cat='http', op=url.rsplit('/', 1)[-1], page=params.get('pageNo'),
+                        window=f"{params.get('inqryBgnDt', '')}~{params.get('inqryEndDt', '')}") as s:
+        response = _http_get(url, params, session, timeout)
+        s.set(status=response.status_code, bytes=len(response.content))
+    return response
+
+
+def _http_get(url, params, session, timeout):
+    if REPLAY:
+        content = get_archive().get(url, params)
+        if content is None:
+            return ArchivedResponse(b'', status_code=404)
+        return ArchivedResponse(content)
+
+    pool = get_key_pool()
+    key_ok = True
+    for _ in range(len(pool) if pool else 1):
+        state = pool.acquire() if pool else None
+        query = dict(params, ServiceKey=state.key) if state else params
+        try:
+            response = (session or requests).get(url, params=query, timeout=timeout)
+        except requests.RequestException as e:
+            raise RuntimeError(_redact(str(e), query, pool)) from None
+        key_ok = state is None or pool.check(state, response)
+        if key_ok:
+            break
+
+    if ARCHIVE_ENABLED and key_ok and response.status_code == 200:
+        try:
+            get_archive().put(url, params, response.content)
+        except Exception as e:
+            print(f"    [아카이브 오류] {e}")
+    return response
+
+
+def iter_archived_rows(bgn_dt, end_dt, fields=None, keywords=None):
+    """
+    보관된 입찰공고 응답을 현재 all_88 파서로 다시 파싱하여 기간 내 행을 하나씩 yield
+    keywords를 주면 all_88.py처럼 해당 키워드(bidNtceNm)로 요청한 응답만 골라 공고명 키워드 필터까지 적용,
+    없으면 다른 스크립트가 조회한 응답까지 포함하여 보관된 입찰공고 전체를 yield
+    """
+    from all_88 import filter_by_keyword, parse_response
+    from g2b_fetch import BID_OPERATIONS
+
+    biz_by_op = {op: biz for biz, op in BID_OPERATIONS.items()}
+    for url, params, content in get_archive().iter_records():
+        biz_type = biz_by_op.get(url.rsplit('/', 1)[-1])
+        if biz_type is None or params.get('inqryEndDt', '') < bgn_dt or params.get('inqryBgnDt', '') > end_dt:
+            continue
+        keyword = params.get('bidNtceNm', '')
+        if keywords is not None and keyword not in keywords:
+            continue
+        parsed, _ = parse_response(content, biz_type, fields)
+        if keywords is not None:
+            parsed = filter_by_keyword(parsed, keyword)
+        for row in parsed:
+            if bgn_dt <= normalize_dt(row['bidNtceDt']) <= end_dt:
+                yield row
+
+
+def export_88(start_str, end_str, keywords=None):
+    """
+    아카이브의 입찰공고 응답으로 88개 항목 엑셀 재생성 (네트워크 호출 없음, 스트리밍 저장)
+    keywords를 주면 같은 기간/키워드로 실행한 all_88.py 결과를 재생성,
+    없으면 기간 내 보관된 입찰공고 전체(다른 스크립트의 조회분 포함)를 내보냄
+    """
+    from all_88 import save_to_excel
+    from g2b_export import iter_dedup
+
+    bgn_dt = start_str.replace('-', '') + '0000'
+    end_dt = end_str.replace('-', '') + '2359'
+    # all_88.py와 같은 키(공고번호)로 중복 제거
+    rows = iter_dedup(iter_archived_rows(bgn_dt, end_dt, keywords=keywords), ['bidNtceNo'])
+    saved = save_to_excel(rows, start_str, end_str)
+    print(f"[재파싱] 아카이브에서 {saved}건 복원")
+
+
+def main():
+    if len(sys.argv) >= 4 and sys.argv[1] == 'export-88':
+        keywords = [k.strip() for k in sys.argv[4].split(',') if k.strip()] if len(sys.argv) >= 5 else None
+        export_88(sys.argv[2], sys.argv[3], keywords)
+        return
+
+    count, size = get_archive().stats()
+    print(f"아카이브: {ARCHIVE_DIR} / 응답 {count}건 / 압축 크기 {size / 1024 / 1024:.1f}MB")
+    print("사용법:")
+    print("  python raw_archive.py export-88 2025-01-01 2025-03-31 키워드1,키워드2   # all_88.py 결과 재생성")
+    print("  python raw_archive.py export-88 2025-01-01 2025-03-31                   # 보관된 입찰공고 전체")
+    print("  G2B_REPLAY=1 python all_88.py                          # 같은 조건으로 네트워크 없이 재실행")
+
+
+if __name__ == "__main__":
+    g2b_trace.run_main(main)
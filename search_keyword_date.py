@@ -1,17 +1,29 @@
-import requests
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 import xml.etree.ElementTree as ET
 import time
 
+from coverage_map import CoverageMap, filter_key
+from g2b_export import dedup_rows, write_rows
+from g2b_trace import run_main, span
+from g2b_windows import calendar_windows, collect_latest
+from institution_index import InstitutionIndex, item_to_dict
+from raw_archive import http_get
+
 # === [설정] 서비스 키 입력 ===
 SERVICE_KEY = ""
 
+# === [설정] 최신 N건 조회 ===
+# 0이면 기간 전체를 조회, N이면 키워드별 최신 N건만 저장 (최신 반월 구간부터 조회하여 N건이 모인 구간까지만 조회)
+LATEST_N = 0
+
 
 class G2BAPIClient:
-    def __init__(self, service_key):
+    def __init__(self, service_key, instt_index=None):
         self.base_url = "http://apis.data.go.kr/1230000/ad/BidPublicInfoService/"
         self.service_key = service_key
+        self.instt_index = instt_index  # 받은 공고의 원본 행을 함께 적재할 기관 인덱스 (선택)
+        self.last_fetch_ok = True  # 직전 fetch_all_pages 호출이 오류 없이 끝났는지 여부
+        self.last_total_count = 0  # 직전 fetch_bid_notices 응답의 totalCount
 
     def fetch_bid_notices(self, op_name, biz_type, search_params):
         """API 1회 호출"""
@@ -28,13 +40,16 @@ class G2BAPIClient:
         if 'bidNtceNm' in search_params and search_params['bidNtceNm']:
             params['bidNtceNm'] = search_params['bidNtceNm']
 
+        self.last_total_count = 0
         try:
-            response = requests.get(url, params=params, timeout=30)
+            response = http_get(url, params)
             if response.status_code != 200:
                 print(f"    [HTTP 오류] {response.status_code}")
+                self.last_fetch_ok = False
                 return []
 
-            root = ET.fromstring(response.content)
+            with span('xml', cpu=True, bytes=len(response.content)):
+                root = ET.fromstring(response.content)
             result_code = root.findtext('.//resultCode')
 
             if result_code != '00':
@@ -42,13 +57,20 @@ class G2BAPIClient:
                 if "조회된 데이터가 없습니다" in result_msg:
                     return []
                 print(f"    [API 메시지] {result_msg}")
+                self.last_fetch_ok = False
                 return []
 
+            self.last_total_count = int(root.findtext('.//totalCount') or 0)
             items = root.findall('.//item')
-            return self._parse_items(items, biz_type)
+            # 출력용으로 줄인 행(예산/이메일 대체값 적용)이 아닌 원본 태그 전체를 기관 인덱스에 적재
+            if self.instt_index is not None:
+                self.instt_index.ingest([item_to_dict(item) for item in items], biz_type)
+            with span('parse_items', cpu=True, rows=len(items)):
+                return self._parse_items(items, biz_type)
 
         except Exception as e:
             print(f"    [시스템 오류] {e}")
+            self.last_fetch_ok = False
             return []
 
     def _get_text(self, item, tag_name):
@@ -95,14 +117,26 @@ class G2BAPIClient:
         return result
 
     def fetch_all_pages(self, op_name, biz_type, search_params):
-        """페이징 처리"""
+        """
+        페이징 처리
+        오류가 나거나 totalCount보다 덜 받은 페이지는 그 페이지만 한 번 더 조회하고,
+        그래도 전체 건수가 totalCount보다 적으면 last_fetch_ok=False (수집 완료로 기록하지 않음)
+        """
         all_data = []
         page_no = 1
         num_of_rows = search_params.get('numOfRows', 100)
+        total_count = None
+        self.last_fetch_ok = True
 
         while True:
             search_params['pageNo'] = page_no
             data = self.fetch_bid_notices(op_name, biz_type, search_params)
+            expected = self.last_total_count if total_count is None else total_count
+            if not self.last_fetch_ok or (len(data) < num_of_rows and len(all_data) + len(data) < expected):
+                self.last_fetch_ok = True
+                data = self.fetch_bid_notices(op_name, biz_type, search_params)
+            if total_count is None:
+                total_count = self.last_total_count
 
             if not data:
                 break
@@ -113,9 +147,36 @@ class G2BAPIClient:
             page_no += 1
             time.sleep(0.1)
 
+        if self.last_fetch_ok and len(all_data) < total_count:
+            print(f"    [미완료] totalCount {total_count}건 중 {len(all_data)}건만 수집 ({page_no}페이지에서 끊김)")
+            self.last_fetch_ok = False
         return all_data
 
 
+def filter_by_keyword(rows, keyword):
+    """공백을 무시하고 공고명에 키워드가 포함된 행만 선택"""
+    stripped_target_keyword = keyword.replace(" ", "").lower()
+    with span('filter', cpu=True, rows=len(rows)):
+        return [
+            item for item in rows
+            if item.get('bidNtceNm') and stripped_target_keyword in item['bidNtceNm'].replace(" ", "").lower()
+        ]
+
+
+def fetch_keyword_window(client, coverage, op_name, biz_type, keyword, start_dt, end_dt):
+    """키워드 1개 x 분야 1개 x 구간 1개 조회 -> 공고명 필터를 통과한 행 목록"""
+    filters = {'inqryDiv': '1', 'bidNtceNm': keyword}
+
+    def fetch_range(bgn_dt, end_dt):
+        params = dict(filters, inqryBgnDt=bgn_dt, inqryEndDt=end_dt, numOfRows=100)
+        results = client.fetch_all_pages(op_name, biz_type, params)
+        return results, client.last_fetch_ok
+
+    # 이전 실행에서 같은 키워드로 수집한 부분은 로컬 보관분을 쓰고 빈 부분만 조회
+    fkey = filter_key(filters, 'search_keyword_date')
+    return filter_by_keyword(coverage.fetch(op_name, fkey, start_dt, end_dt, fetch_range), keyword)
+
+
 def get_user_date_ranges():
     while True:
         try:
@@ -135,21 +196,7 @@ def get_user_date_ranges():
         except ValueError:
             print("날짜 형식이 올바르지 않습니다. YYYY-MM-DD 형식으로 다시 입력해주세요.\n")
 
-    ranges = []
-    current_start = start_date
-
-    while current_start < end_date:
-        current_end = current_start + timedelta(days=29, hours=23, minutes=59)
-        if current_end > end_date:
-            current_end = end_date
-
-        str_start = current_start.strftime('%Y%m%d%H%M')
-        str_end = current_end.strftime('%Y%m%d%H%M')
-
-        ranges.append((str_start, str_end))
-        current_start = current_end + timedelta(minutes=1)
-
-    return ranges, start_str, end_str
+    return calendar_windows(start_date, end_date), start_str, end_str
 
 
 def get_user_keywords():
@@ -168,8 +215,8 @@ def get_user_keywords():
             print("유효한 키워드를 입력해주세요.")
 
 
-def save_to_excel(df, start_str, end_str):
-    if df.empty:
+def save_to_excel(rows, start_str, end_str):
+    if not rows:
         print("저장할 데이터가 없습니다.")
         return
 
@@ -192,13 +239,12 @@ def save_to_excel(df, start_str, end_str):
         'ntceInsttOfclEmailAdrs': '담당자이메일주소(공고/수요)'
     }
 
-    save_df = df[list(col_map.keys())].rename(columns=col_map)
     filename = f'입찰공고_전체검색_{start_str}_to_{end_str}.xlsx'
 
     try:
-        save_df.to_excel(filename, index=False)
+        write_rows(rows, col_map, filename)
         print(f"\n[성공] 엑셀 저장 완료: {filename}")
-        print(f"총 공고 수: {len(save_df)}건")
+        print(f"총 공고 수: {len(rows)}건")
     except PermissionError:
         print(f"\n[오류] '{filename}' 파일이 이미 열려있습니다. 파일을 닫고 다시 실행해주세요.")
     except Exception as e:
@@ -211,7 +257,8 @@ def main():
     date_ranges, start_str, end_str = get_user_date_ranges()
     target_keywords = get_user_keywords()
 
-    client = G2BAPIClient(SERVICE_KEY)
+    client = G2BAPIClient(SERVICE_KEY, InstitutionIndex())
+    coverage = CoverageMap()
 
     # 조달청 명세서에 따른 4가지 오퍼레이션 정확히 지정
     operations = {
@@ -230,51 +277,41 @@ def main():
     for keyword in target_keywords:
         print(f"--- '{keyword}' 키워드 검색 시작 ---")
 
+        if LATEST_N:
+            # 최신 구간부터 4개 분야를 함께 조회하고, N건이 모이면 이전 구간은 조회하지 않음
+            def fetch_window(start_dt, end_dt):
+                print(f"  {start_dt[:8]}~{end_dt[:8]} 조회 중...")
+                return [
+                    row for biz_type, op_name in operations.items()
+                    for row in fetch_keyword_window(client, coverage, op_name, biz_type, keyword, start_dt, end_dt)
+                ]
+
+            latest = collect_latest(date_ranges, fetch_window, LATEST_N, 'bidNtceDt', ['bidNtceNo'])
+            all_results.extend(latest)
+            print(f"    -> 최신 {len(latest)}건")
+            continue
+
         for biz_type, op_name in operations.items():
             print(f"  [{biz_type}] 분야 조회 중...")
-            keyword_biz_results = []
-
-            for start_dt, end_dt in date_ranges:
-                params = {
-                    'inqryDiv': '1',
-                    'inqryBgnDt': start_dt,
-                    'inqryEndDt': end_dt,
-                    'numOfRows': 100,
-                    'bidNtceNm': keyword
-                }
-
-                results = client.fetch_all_pages(op_name, biz_type, params)
-                if results:
-                    keyword_biz_results.extend(results)
-
-            if keyword_biz_results:
-                stripped_target_keyword = keyword.replace(" ", "")
-                filtered_results = []
-
-                for item in keyword_biz_results:
-                    bid_name = item.get('bidNtceNm', '')
-                    if bid_name:
-                        stripped_bid_name = bid_name.replace(" ", "")
-                        if stripped_target_keyword.lower() in stripped_bid_name.lower():
-                            filtered_results.append(item)
-
-                if filtered_results:
-                    all_results.extend(filtered_results)
-                    print(f"    -> {len(filtered_results)}건 발견")
-                else:
-                    print(f"    -> 조건에 맞는 데이터 없음")
+            filtered_results = [
+                row for start_dt, end_dt in date_ranges
+                for row in fetch_keyword_window(client, coverage, op_name, biz_type, keyword, start_dt, end_dt)
+            ]
+
+            if filtered_results:
+                all_results.extend(filtered_results)
+                print(f"    -> {len(filtered_results)}건 발견")
             else:
-                print(f"    -> 데이터 없음")
+                print(f"    -> 조건에 맞는 데이터 없음")
 
     if all_results:
-        df = pd.DataFrame(all_results)
-        df_unique = df.drop_duplicates(subset=['bidNtceNo'])
-        print(f"\n[최종 집계] 중복 제거 후 총 {len(df_unique)}건의 공고가 추출되었습니다.")
+        unique_rows = dedup_rows(all_results, ['bidNtceNo'])
+        print(f"\n[최종 집계] 중복 제거 후 총 {len(unique_rows)}건의 공고가 추출되었습니다.")
 
-        save_to_excel(df_unique, start_str, end_str)
+        save_to_excel(unique_rows, start_str, end_str)
     else:
         print("\n입력하신 조건으로 조회된 공고가 없습니다.")
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main)
@@ -0,0 +1,305 @@
+from datetime import datetime, timedelta
+
+from all_88 import FIELDS_MAPPING, G2BAPIClient
+from PRE2 import EXPORT_COLUMNS as PRE_SPEC_COLUMNS, G2BPublicRangeClient
+from g2b_export import write_rows
+from g2b_trace import run_main
+from g2b_windows import calendar_windows, next_window_start, normalize_dt
+from institution_index import InstitutionIndex
+
+# === [설정] 서비스 키 입력 ===
+SERVICE_KEY = ""
+
+# 사전규격 접수 후 본 공고가 게시되기까지 탐색할 최대 기간 (일)
+LINK_WINDOW_DAYS = 60
+
+# 입찰공고 오퍼레이션 (업무구분 -> 오퍼레이션)
+BID_OPERATIONS = {
+    '물품': 'getBidPblancListInfoThngPPSSrch',
+    '외자': 'getBidPblancListInfoFrgcptPPSSrch',
+    '용역': 'getBidPblancListInfoServcPPSSrch',
+    '공사': 'getBidPblancListInfoCnstwkPPSSrch'
+}
+
+# 통합 엑셀 출력 컬럼 (사전규격 + 입찰공고)
+JOIN_COLUMNS = {
+    'bfSpecRgstNo': '사전규격등록번호',
+    'prdctClsfcNoNm': '품명(사업명)',
+    'orderInsttNm': '발주기관',
+    'asignBdgtAmt': '배정예산',
+    'rcptDt': '사전규격접수일시',
+    'bidNtceNo': '입찰공고번호',
+    'bidNtceOrd': '입찰공고차수',
+    'bizType': '업무구분',
+    'bidNtceNm': '입찰공고명',
+    'ntceInsttNm': '공고기관',
+    'bidNtceDt': '입찰공고일시',
+    'bidClseDt': '입찰마감일시',
+    'presmptPrce': '추정가격',
+    'sucsfbidMthdNm': '낙찰방법명',
+    'linkSource': '연결근거'
+}
+
+
+def to_biz_type(bsns_div_nm):
+    """사전규격 업무구분명('일반용역', '기술용역', '물품' ...)을 4개 분야 중 하나로 변환"""
+    for biz_type in BID_OPERATIONS:
+        if biz_type in (bsns_div_nm or ''):
+            return biz_type
+    return ''
+
+
+def split_ntce_no_list(value):
+    """bidNtceNoList('R25BK00000001-000,R25BK00000002') -> 공고번호 목록 (차수 제거)"""
+    numbers = []
+    for token in (value or '').replace(';', ',').split(','):
+        token = token.strip()
+        if token:
+            numbers.append(token.split('-')[0])
+    return numbers
+
+
+def read_export(path, column_mapping):
+    """수집기에서 저장한 엑셀을 원본 태그명 컬럼의 행 목록으로 읽기 (한글/원본 컬럼명 모두 허용)"""
+    import pandas as pd  # 엑셀 읽기에만 필요하므로 사용할 때 불러옴
+
+    reverse = {ko: key for key, ko in column_mapping.items()}
+    df = pd.read_excel(path, dtype=str).fillna('')
+    df = df.rename(columns=lambda c: reverse.get(c, c))
+    return df.to_dict('records')
+
+
+def merge_windows(windows):
+    """
+    (시작, 끝) datetime 구간들 -> 겹치는 달력 기준 반월 구간 목록 (g2b_windows)
+    다른 스크립트의 조회/커버리지/백필 샤드 구간과 경계가 같아 아카이브/요청 병합/커버리지를 그대로 재사용
+    """
+    chunks = set()
+    for start, end in windows:
+        chunks.update(calendar_windows(start, next_window_start(end) - timedelta(minutes=1), align_start=True))
+    return sorted(chunks)
+
+
+class SpecNoticeJoiner:
+    """
+    사전규격 <-> 입찰공고 연결
+    - 사전규격: bfSpecRgstNo, bidNtceNoList(연관공고번호)
+    - 입찰공고: bidNtceNo, bfSpecRgstNo(사전규격등록번호)
+    양쪽 키에 대한 해시 인덱스로 연결하고, 반대편이 없는 키만 기간 단위로 묶어서 조회
+    """
+
+    def __init__(self):
+        self.specs_by_no = {}        # bfSpecRgstNo -> 사전규격 행
+        self.specs_by_notice = {}    # bidNtceNo -> [bfSpecRgstNo] (사전규격의 연관공고번호 기준)
+        self.notices_by_no = {}      # bidNtceNo -> [입찰공고 행] (차수별)
+        self.notices_by_spec = {}    # bfSpecRgstNo -> [bidNtceNo] (입찰공고의 사전규격번호 기준)
+
+    def add_specs(self, rows):
+        for row in rows:
+            spec_no = row.get('bfSpecRgstNo', '')
+            if not spec_no:
+                continue
+            self.specs_by_no[spec_no] = row
+            for ntce_no in split_ntce_no_list(row.get('bidNtceNoList', '')):
+                self.specs_by_notice.setdefault(ntce_no, [])
+                if spec_no not in self.specs_by_notice[ntce_no]:
+                    self.specs_by_notice[ntce_no].append(spec_no)
+
+    def add_notices(self, rows):
+        for row in rows:
+            ntce_no = row.get('bidNtceNo', '')
+            if not ntce_no:
+                continue
+            orders = self.notices_by_no.setdefault(ntce_no, [])
+            orders[:] = [r for r in orders if r.get('bidNtceOrd', '') != row.get('bidNtceOrd', '')]
+            orders.append(row)
+
+            spec_no = row.get('bfSpecRgstNo', '')
+            if spec_no:
+                self.notices_by_spec.setdefault(spec_no, [])
+                if ntce_no not in self.notices_by_spec[spec_no]:
+                    self.notices_by_spec[spec_no].append(ntce_no)
+
+    def missing_notice_numbers(self):
+        """사전규격의 연관공고번호 중 입찰공고 쪽에 없는 번호"""
+        return {no for no in self.specs_by_notice if no not in self.notices_by_no}
+
+    def missing_spec_numbers(self):
+        """입찰공고의 사전규격등록번호 중 사전규격 쪽에 없는 번호"""
+        return {no for no in self.notices_by_spec if no not in self.specs_by_no}
+
+    def notice_search_windows(self, missing):
+        """누락된 공고번호를 (업무구분 -> 조회 구간 목록)으로 묶음: 사전규격 접수일 ~ +LINK_WINDOW_DAYS"""
+        windows = {}
+        now = datetime.now()
+        for ntce_no in missing:
+            for spec_no in self.specs_by_notice[ntce_no]:
+                spec = self.specs_by_no[spec_no]
+                start = _parse_dt(spec.get('rcptDt') or spec.get('rgstDt'))
+                if start is None:
+                    continue
+                end = min(start + timedelta(days=LINK_WINDOW_DAYS), now)
+                biz_type = to_biz_type(spec.get('bsnsDivNm'))
+                biz_types = [biz_type] if biz_type else list(BID_OPERATIONS)
+                for biz_type in biz_types:
+                    windows.setdefault(biz_type, []).append((start, end))
+        return {biz_type: merge_windows(w) for biz_type, w in windows.items()}
+
+    def spec_search_windows(self, missing):
+        """누락된 사전규격번호를 (업무구분 -> 조회 구간 목록)으로 묶음: 공고일 -LINK_WINDOW_DAYS ~ 공고일"""
+        windows = {}
+        for spec_no in missing:
+            for ntce_no in self.notices_by_spec[spec_no]:
+                for notice in self.notices_by_no.get(ntce_no, []):
+                    end = _parse_dt(notice.get('bidNtceDt'))
+                    if end is None:
+                        continue
+                    biz_types = [notice['bizType']] if notice.get('bizType') in BID_OPERATIONS else list(BID_OPERATIONS)
+                    for biz_type in biz_types:
+                        windows.setdefault(biz_type, []).append((end - timedelta(days=LINK_WINDOW_DAYS), end))
+        return {biz_type: merge_windows(w) for biz_type, w in windows.items()}
+
+    def fetch_missing_notices(self, bid_client):
+        """연관공고번호는 있으나 공고 데이터가 없는 키만, 구간 단위로 한 번에 조회하여 채움"""
+        missing = self.missing_notice_numbers()
+        if not missing:
+            return 0
+
+        print(f"\n[입찰공고 보완] 누락 공고번호 {len(missing)}건 조회")
+        instt_index = InstitutionIndex()
+        found = 0
+        for biz_type, chunks in self.notice_search_windows(missing).items():
+            for start_dt, end_dt in chunks:
+                if not missing:
+                    break
+                params = {'inqryDiv': '1', 'inqryBgnDt': start_dt, 'inqryEndDt': end_dt, 'numOfRows': 900}
+                rows = bid_client.fetch_all_pages(BID_OPERATIONS[biz_type], biz_type, params)
+                instt_index.ingest(rows)
+
+                matched = [r for r in rows if r.get('bidNtceNo') in missing]
+                self.add_notices(matched)
+                missing -= {r['bidNtceNo'] for r in matched}
+                found += len(matched)
+                print(f"  [{biz_type}] {start_dt[:8]}~{end_dt[:8]}: {len(rows)}건 중 {len(matched)}건 연결")
+        return found
+
+    def fetch_missing_specs(self, spec_client):
+        """사전규격등록번호는 있으나 사전규격 데이터가 없는 키만, 구간 단위로 한 번에 조회하여 채움"""
+        missing = self.missing_spec_numbers()
+        if not missing:
+            return 0
+
+        print(f"\n[사전규격 보완] 누락 사전규격번호 {len(missing)}건 조회")
+        found = 0
+        for biz_type, chunks in self.spec_search_windows(missing).items():
+            for start_dt, end_dt in chunks:
+                if not missing:
+                    break
+                params = {'inqryBgnDt': start_dt, 'inqryEndDt': end_dt, 'numOfRows': 900}
+                rows = spec_client.fetch_all_pages(biz_type, params)
+
+                matched = [r for r in rows if r.get('bfSpecRgstNo') in missing]
+                self.add_specs(matched)
+                missing -= {r['bfSpecRgstNo'] for r in matched}
+                found += len(matched)
+                print(f"  [{biz_type}] {start_dt[:8]}~{end_dt[:8]}: {len(rows)}건 중 {len(matched)}건 연결")
+        return found
+
+    def linked_notice_numbers(self, spec_no):
+        """사전규격 -> 연결된 공고번호 (양방향 근거 통합)"""
+        spec = self.specs_by_no.get(spec_no, {})
+        links = {}
+        for ntce_no in split_ntce_no_list(spec.get('bidNtceNoList', '')):
+            links[ntce_no] = '사전규격 연관공고번호'
+        for ntce_no in self.notices_by_spec.get(spec_no, []):
+            links[ntce_no] = '양방향' if ntce_no in links else '공고 사전규격번호'
+        return links
+
+    def join_rows(self):
+        """사전규격-입찰공고 통합 행 (양쪽 어느 한쪽만 있는 경우도 포함)"""
+        rows = []
+        used_notices = set()
+
+        for spec_no, spec in self.specs_by_no.items():
+            links = self.linked_notice_numbers(spec_no)
+            notice_rows = [(n, src) for ntce_no, src in links.items() for n in self.notices_by_no.get(ntce_no, [])]
+            if not notice_rows:
+                rows.append(_combine(spec, {}, '연결 공고 없음'))
+                continue
+            for notice, source in notice_rows:
+                used_notices.add((notice['bidNtceNo'], notice.get('bidNtceOrd', '')))
+                rows.append(_combine(spec, notice, source))
+
+        for orders in self.notices_by_no.values():
+            for notice in orders:
+                if (notice['bidNtceNo'], notice.get('bidNtceOrd', '')) not in used_notices:
+                    rows.append(_combine({}, notice, '연결 사전규격 없음'))
+        return rows
+
+
+def _parse_dt(value):
+    dt_str = normalize_dt(value)
+    if not dt_str:
+        return None
+    try:
+        return datetime.strptime(dt_str, '%Y%m%d%H%M')
+    except ValueError:
+        return None
+
+
+def _combine(spec, notice, source):
+    row = {key: notice.get(key, '') for key in JOIN_COLUMNS}
+    for key in ('bfSpecRgstNo', 'prdctClsfcNoNm', 'orderInsttNm', 'asignBdgtAmt', 'rcptDt'):
+        row[key] = spec.get(key, '') or row[key]
+    row['linkSource'] = source
+    return row
+
+
+def save_to_excel(rows):
+    if not rows:
+        print("저장할 데이터가 없습니다.")
+        return
+
+    today_str = datetime.now().strftime('%Y-%m-%d')
+    filename = f'나라장터_사전규격_입찰공고_연결({today_str}).xlsx'
+
+    try:
+        write_rows(rows, JOIN_COLUMNS, filename)
+        print(f"\n[성공] 엑셀 저장 완료: {filename}")
+        print(f"총 연결 행 수: {len(rows)}건")
+    except PermissionError:
+        print(f"\n[오류] '{filename}' 파일이 이미 열려있습니다. 파일을 닫고 다시 실행해주세요.")
+    except Exception as e:
+        print(f"\n[오류] 엑셀 저장 중 문제가 발생했습니다: {e}")
+
+
+def main():
+    print("=== 나라장터 사전규격 <-> 입찰공고 연결 ===")
+
+    spec_path = input("사전규격 엑셀 파일 경로 (PRE2.py 결과): ").strip()
+    notice_path = input("입찰공고 엑셀 파일 경로 (all_88.py 결과): ").strip()
+
+    notice_mapping = {'bizType': '업무구분'}
+    notice_mapping.update(FIELDS_MAPPING)
+
+    joiner = SpecNoticeJoiner()
+    if spec_path:
+        joiner.add_specs(read_export(spec_path, PRE_SPEC_COLUMNS))
+    if notice_path:
+        joiner.add_notices(read_export(notice_path, notice_mapping))
+
+    print(f"사전규격 {len(joiner.specs_by_no)}건 / 입찰공고 {len(joiner.notices_by_no)}건 로드")
+
+    # 반대편이 없는 키만 구간 단위로 묶어서 조회
+    joiner.fetch_missing_notices(G2BAPIClient(SERVICE_KEY))
+    joiner.fetch_missing_specs(G2BPublicRangeClient(SERVICE_KEY))
+
+    rows = joiner.join_rows()
+    linked = sum(1 for r in rows if r['bfSpecRgstNo'] and r['bidNtceNo'])
+    print(f"\n[최종 집계] 연결 {linked}건 / 전체 {len(rows)}건")
+
+    save_to_excel(rows)
+
+
+if __name__ == "__main__":
+    run_main(main)
@@ -1,10 +1,14 @@
-import requests
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 import xml.etree.ElementTree as ET
 import time
 import urllib.parse
 
+from g2b_export import dedup_rows, write_rows
+from g2b_trace import run_main, span
+from g2b_windows import recent_windows
+from institution_index import InstitutionIndex, item_to_dict
+from raw_archive import http_get
+
 # === [설정] 서비스 키 및 기본 설정 ===
 # 제공해주신 키값
 SERVICE_KEY = ""
@@ -26,37 +30,21 @@ OPERATIONS = {
 class G2BBidCollector:
     def __init__(self, service_key):
         self.service_key = service_key
+        self.last_fetch_ok = True  # 직전 fetch_data 호출이 오류 없이 끝났는지 여부
 
     def get_date_chunks(self, days=60):
-        """
-        API 부하를 줄이고 데이터 누락을 방지하기 위해
-        전체 기간을 30일 단위로 쪼개서 리스트로 반환
-        """
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-
-        chunks = []
-        current_start = start_date
-
-        while current_start < end_date:
-            current_end = current_start + timedelta(days=29)
-            if current_end > end_date:
-                current_end = end_date
-
-            # API 포맷: YYYYMMDDHHMM
-            str_start = current_start.strftime('%Y%m%d%H%M')
-            str_end = current_end.strftime('%Y%m%d%H%M')
-
-            chunks.append((str_start, str_end))
-            current_start = current_end + timedelta(minutes=1)  # 1분 뒤부터 다시 시작
-
-        return chunks
+        """최근 days일을 달력 기준 반월 구간(g2b_windows)으로 쪼개서 리스트로 반환"""
+        return recent_windows(days)
 
     def fetch_data(self, operation_name, operation_code, start_dt, end_dt):
-        """특정 오퍼레이션에 대해 API 호출 및 데이터 파싱"""
+        """
+        특정 오퍼레이션에 대해 API 호출 및 데이터 파싱
+        기관 필터 없이 구간 내 전체 공고를 원본 태그 그대로 반환 (기관 인덱스 적재용)
+        """
         url = f"{BASE_URL}/{operation_code}"
         all_rows = []
         page_no = 1
+        self.last_fetch_ok = True
 
         while True:
             params = {
@@ -70,13 +58,15 @@ class G2BBidCollector:
             }
 
             try:
-                response = requests.get(url, params=params, timeout=30)
+                response = http_get(url, params)
 
                 if response.status_code != 200:
                     print(f"[{operation_name}] HTTP 에러: {response.status_code}")
+                    self.last_fetch_ok = False
                     break
 
-                root = ET.fromstring(response.content)
+                with span('xml', cpu=True, bytes=len(response.content)):
+                    root = ET.fromstring(response.content)
                 result_msg = root.find('.//resultMsg').text if root.find('.//resultMsg') is not None else ""
 
                 # 데이터 없음 처리
@@ -88,26 +78,11 @@ class G2BBidCollector:
                     break
 
                 for item in items:
-                    # 기관명 추출
-                    ntce_instt_nm = self._get_text(item, 'ntceInsttNm') # 공고기관
-                    dminstt_nm = self._get_text(item, 'dminsttNm')       # 수요기관
-
-                    # 공고기관명 또는 수요기관명에 타겟 키워드('영남이공대')가 포함된 경우에만 수집
-                    if TARGET_INSTT in ntce_instt_nm or TARGET_INSTT in dminstt_nm:
-                        row = {
-                            '분야': operation_name,
-                            '공고번호': self._get_text(item, 'bidNtceNo'),
-                            '공고명': self._get_text(item, 'bidNtceNm'),
-                            '공고기관': ntce_instt_nm,
-                            '수요기관': dminstt_nm,
-                            '담당자명': self._get_text(item, 'ntceInsttOfclNm'),
-                            '전화번호': self._get_text(item, 'ntceInsttOfclTelNo'),
-                            '이메일': self._get_text(item, 'ntceInsttOfclEmailAdrs'),
-                            '공고일시': self._get_text(item, 'bidNtceDt')
-                        }
-                        all_rows.append(row)
-
-                print(f"[{operation_name}] {start_dt[:8]}~{end_dt[:8]} - {page_no}페이지 탐색 중... (해당 기관 발견: {len(all_rows)}건)")
+                    row = item_to_dict(item)
+                    row['bizType'] = operation_name
+                    all_rows.append(row)
+
+                print(f"[{operation_name}] {start_dt[:8]}~{end_dt[:8]} - {page_no}페이지 탐색 중... (누적 {len(all_rows)}건)")
 
                 # 페이징 탈출 조건 (조회된 전체 데이터가 요청한 row 수보다 적으면 마지막 페이지)
                 if len(items) < int(params['numOfRows']):
@@ -118,6 +93,7 @@ class G2BBidCollector:
 
             except Exception as e:
                 print(f"[{operation_name}] 오류 발생: {e}")
+                self.last_fetch_ok = False
                 break
 
         return all_rows
@@ -132,41 +108,62 @@ def main():
 
     collector = G2BBidCollector(SERVICE_KEY)
     date_chunks = collector.get_date_chunks(days=60)  # 최근 2개월
-
-    total_data = []
+    index = InstitutionIndex()
 
     # 1. 날짜 구간별 순회
     for start_dt, end_dt in date_chunks:
         # 2. 4가지 업무 분야(공사, 용역, 외자, 물품) 순회
         for op_name, op_code in OPERATIONS.items():
-            rows = collector.fetch_data(op_name, op_code, start_dt, end_dt)
-            total_data.extend(rows)
+            # 이미 전체 공고를 수집해 둔 부분은 API 호출 없이 로컬 인덱스에서 조회하고, 빈 부분만 수집
+            gaps = index.coverage_gaps(op_code, start_dt, end_dt)
+            if not gaps:
+                print(f"[{op_name}] {start_dt[:8]}~{end_dt[:8]} - 로컬 인덱스 사용")
+                continue
+
+            for gap_start, gap_end in gaps:
+                rows = collector.fetch_data(op_name, op_code, gap_start, gap_end)
+                index.ingest(rows, op_name)
+                if collector.last_fetch_ok:
+                    index.mark_covered(op_code, gap_start, gap_end)
+
+    # 기관코드/정규화된 기관명 기준으로 로컬 인덱스에서 조회
+    total_data = [
+        {
+            '분야': row.get('bizType', ''),
+            '공고번호': row.get('bidNtceNo', ''),
+            '공고명': row.get('bidNtceNm', ''),
+            '공고기관': row.get('ntceInsttNm', ''),
+            '수요기관': row.get('dminsttNm', ''),
+            '담당자명': row.get('ntceInsttOfclNm', ''),
+            '전화번호': row.get('ntceInsttOfclTelNo', ''),
+            '이메일': row.get('ntceInsttOfclEmailAdrs', ''),
+            '공고일시': row.get('bidNtceDt', '')
+        }
+        for row in index.lookup(TARGET_INSTT, date_chunks[0][0], date_chunks[-1][1])
+    ]
 
     if not total_data:
         print(f"수집된 '{TARGET_INSTT}' 관련 데이터가 없습니다.")
         return
 
-    # 3. 데이터프레임 변환
-    df = pd.DataFrame(total_data)
-
-    print(f"\n총 검색된 건수: {len(df)}건")
+    print(f"\n총 검색된 건수: {len(total_data)}건")
 
-    # 4. 중복 제거 (공고번호 기준)
+    # 3. 중복 제거 (공고번호 기준)
     # 동일한 입찰건이 중복 수집되었을 경우 방지 (최근 데이터 기준 남김)
-    df_unique = df.drop_duplicates(subset=['공고번호'], keep='first')
+    unique_rows = dedup_rows(total_data, ['공고번호'])
 
-    print(f"중복(공고번호 기준) 제거 후 유효 건수: {len(df_unique)}건")
+    print(f"중복(공고번호 기준) 제거 후 유효 건수: {len(unique_rows)}건")
 
-    # 5. 엑셀 저장
+    # 4. 엑셀 저장
     today_str = datetime.now().strftime('%Y-%m-%d')
     file_name = f"나라장터_{TARGET_INSTT}_입찰공고_{today_str}.xlsx"
 
     try:
-        df_unique.to_excel(file_name, index=False)
+        write_rows(unique_rows, {col: col for col in unique_rows[0]}, file_name)
         print(f"\n[성공] '{file_name}' 파일로 저장되었습니다.")
     except Exception as e:
         print(f"\n[오류] 엑셀 저장 실패: {e}")
 
 
 if __name__ == "__main__":
-    main()
+    run_main(main)